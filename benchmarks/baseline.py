@@ -0,0 +1,23 @@
+"""Fichiers de référence des benchmarks : résultats enregistrés sur une machine donnée, auxquels les mesures suivantes sont comparées.
+
+Une référence n'a de sens que sur la machine où elle a été enregistrée, elle n'est donc pas versionnée.
+"""
+
+import json
+import platform
+
+
+def load(path: str) -> "dict[str, float]":
+    "Retourne les résultats enregistrés dans le fichier de référence, ou un dictionnaire vide s'il n'existe pas."
+
+    try:
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)["results"]
+    except FileNotFoundError:
+        return {}
+
+
+def save(path: str, results: "dict[str, float]") -> None:
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"python": platform.python_version(), "machine": platform.machine(), "results": results}, file, indent=4, sort_keys=True)
+        file.write("\n")
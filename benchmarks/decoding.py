@@ -0,0 +1,237 @@
+"""Mesure le débit du chemin de décodage réseau : handling.merge, handling.decompose, les lectures de Data
+et chaque feuille de handlerstree en passant par le parcours complet de son arbre (HandlerNode).
+
+Les données sont représentatives d'une partie : textes courts, grosses mises à jour JSON des joueurs,
+grands lancers de dés et listes de 254 membres. Seule la bibliothèque standard est nécessaire.\n
+Les résultats (opérations par seconde) sont comparés à ceux enregistrés dans le fichier de référence, propre à la machine utilisée.
+Le benchmark échoue (code de retour 1) si le débit d'un cas baisse de plus du seuil donné (20 % par défaut),
+ou si aucune référence n'a été enregistrée, sauf avec --save qui l'enregistre.\n
+À lancer depuis la racine du dépôt : python -m benchmarks.decoding [--save] [--threshold 0.2] [--baseline fichier] [filtre...]\n
+--save enregistre les résultats comme nouvelle référence, les filtres ne gardent que les cas dont le nom contient l'un d'eux.
+"""
+
+import argparse
+import os
+import sys
+from timeit import Timer
+
+from benchmarks import baseline as reference
+from benchmarks.payloads import boolean, byte, frame, jsonString, leafPaths, numeric, string
+from rboclient.network import handlerstree
+from rboclient.network.handling import Data, InvalidFormat, decompose, leavesFullNames, merge
+
+defaultBaseline = os.path.join(os.path.dirname(__file__), "decoding-baseline.json")
+repeat = 5
+
+trees = {
+    "registering": handlerstree.registering,
+    "lobby": handlerstree.lobby,
+    "session": handlerstree.session
+}
+
+MAX_MEMBERS = 254
+
+smallText = "Vous entrez dans la taverne. Le tavernier vous salue d'un signe de tête."
+longText = "[b]Chapitre 3[/b]\n" + " ".join(["Le vent souffle sur la lande tandis que le groupe avance vers le nord."] * 60)
+
+
+def members(count: int) -> bytes:
+    return byte(count) + b"".join(byte(id) + string("Joueur {}".format(id)) + boolean(id % 2 == 0) for id in range(count))
+
+
+def ids(count: int) -> bytes:
+    return byte(count) + bytes(range(count))
+
+
+def playerUpdate(stats: int, inventories: int, items: int) -> dict:
+    return {
+        "death": None,
+        "stats": dict(("Stat {}".format(i), {"main": i < 4, "hidden": i % 10 == 9, "value": i * 3}) for i in range(stats)),
+        "inventories": dict(("Inventaire {}".format(i), dict(("Objet {}".format(j), j % 5 + 1) for j in range(items))) for i in range(inventories)),
+        "capacities": dict(("Inventaire {}".format(i), items * 2) for i in range(inventories))
+    }
+
+
+def diceRoll(players: int, dices: int) -> bytes:
+    results = b"".join(byte(id) + bytes((id + dice) % 6 + 1 for dice in range(dices)) for id in range(players))
+    return byte(255) + string("Lancez les dés !") + byte(dices) + numeric(-2, 4, signed=True) + byte(players) + results
+
+
+# Arguments de chaque feuille, les variantes d'une même feuille étant nommées <feuille>/<variante>
+leaves = {
+    "registered": members(MAX_MEMBERS),
+    "invalid_request": b"",
+    "unavailable_id": b"",
+    "unavailable_name": b"",
+    "unavailable_session": b"",
+    "reserved_id": b"",
+
+    "member_registered": byte(12) + string("Joueur 12"),
+    "member_ready": byte(12),
+    "member_disconnected": byte(12),
+    "member_crashed": byte(12),
+    "master_switch_new": byte(12),
+    "master_switch_none": b"",
+    "preparing_session": numeric(5000, 8),
+    "cancel_preparing": b"",
+    "prepare_session": byte(12),
+    "ask_checkpoint": b"",
+    "ask_yes_no": byte(1),
+    "selecting_checkpoint": b"",
+    "checking_players": b"",
+    "revising_parameters": b"",
+    "session_prepared": b"",
+    "result_done": b"",
+    "result_crash": b"",
+    "result_checkpoint_error": b"",
+    "result_less_members": ids(MAX_MEMBERS),
+    "result_unknown_players": ids(MAX_MEMBERS),
+    "result_no_player_alive": b"",
+    "master_disconnected": b"",
+    "lobby_open": b"",
+
+    "request_number": byte(255) + string("Combien de pièces donnez-vous ?") + byte(0) + byte(100),
+    "request_options": byte(255) + string("Où allez-vous ?") + byte(4) + b"".join(string(option) for option in ["Nord", "Sud", "Est", "Ouest"]),
+    "request_options/254": byte(255) + string("Qui désignez-vous ?") + byte(MAX_MEMBERS) + b"".join(string("Joueur {}".format(i)) for i in range(MAX_MEMBERS)),
+    "request_confirm": byte(255),
+    "request_yes_no": byte(255) + string("Voulez-vous ouvrir le coffre ?"),
+    "request_dice_roll": diceRoll(4, 2),
+    "request_dice_roll/large": diceRoll(MAX_MEMBERS, 50),
+    "finish_request": b"",
+    "text_normal": string(smallText),
+    "text_normal/long": string(longText),
+    "text_important": string(smallText),
+    "text_title": string("Chapitre 3"),
+    "text_note": string(smallText),
+    "player_update": byte(3) + jsonString(playerUpdate(8, 1, 5)),
+    "player_update/large": byte(3) + jsonString(playerUpdate(200, 8, 100)),
+    "global_stat_update": string("Réputation") + boolean(False) + boolean(True) + b"".join(numeric(value, 4, signed=True) for value in [-100, 100, 12]),
+    "scene_switch": numeric(42, 2),
+    "player_reply": byte(3) + byte(1),
+    "reply_validated": b"",
+    "reply_too_late": b"",
+    "reply_out_of_range": b"",
+    "reply_invalid_length": b"",
+    "reply_confirm_expected": b"",
+    "battle_init": jsonString(dict(("Gobelin {}".format(i), {"hp": 30 + i}) for i in range(20))),
+    "battle_atk": byte(3) + string("Gobelin 7") + numeric(-12, 4, signed=True),
+    "battle_end": b"",
+    "player_crash": byte(3),
+    "leader_switch": byte(3),
+    "session_start": string("La crypte oubliée"),
+    "session_stop": b""
+}
+
+
+class MissingLeaf(KeyError):
+    def __init__(self, names: "list[str]"):
+        super().__init__("No payload for leaves " + ", ".join(names))
+
+
+def treeCases() -> dict:
+    "Retourne un cas par feuille (et variante) : le parcours de l'arbre de son mode à partir d'une trame complète."
+
+    paths = {}
+    for tree in trees.values():
+        paths.update(dict((leaf, (tree, path)) for (leaf, path) in leafPaths(tree).items()))
+
+    missing = [leaf for tree in trees.values() for leaf in leavesFullNames(tree) if leaf not in leaves]
+    if len(missing) != 0:
+        raise MissingLeaf(missing)
+
+    cases = {}
+    for (name, args) in leaves.items():
+        (tree, path) = paths[name.split("/")[0]]
+        payload = path + args
+
+        # Les données de chaque cas doivent être lues entièrement, comme une trame reçue du serveur
+        data = Data(payload)
+        tree(data)
+        if len(data.buffer) != 0:
+            raise InvalidFormat("{} bytes left after decoding {}".format(len(data.buffer), name))
+
+        cases["tree:" + name] = (lambda tree, payload: lambda: tree(Data(payload)))(tree, payload)
+
+    return cases
+
+
+def cases() -> dict:
+    small = frame(b"\x01\x00" + string(smallText)) * 100
+    large = frame(b"\x02" + leaves["player_update/large"]) * 10
+    shortString = string(smallText)
+    longString = string(longText)
+
+    benchmarks = {
+        "merge:1": lambda: merge(b"\x12"),
+        "merge:2": lambda: merge(b"\x12\x34"),
+        "merge:4": lambda: merge(b"\x12\x34\x56\x78"),
+        "merge:4/signed": lambda: merge(b"\xff\x34\x56\x78", signed=True),
+        "merge:8": lambda: merge(b"\x12\x34\x56\x78\x9a\xbc\xde\xf0"),
+        "decompose:100 texts": lambda: decompose(small),
+        "decompose:10 large updates": lambda: decompose(large),
+        "data:take": lambda: Data(b"\x01").take(),
+        "data:takeBool": lambda: Data(b"\x01").takeBool(),
+        "data:takeNumeric(4)": lambda: Data(b"\xff\xff\xff\xfe").takeNumeric(4, signed=True),
+        "data:takeNumeric(8)": lambda: Data(b"\x00\x00\x00\x00\x00\x00\x13\x88").takeNumeric(8),
+        "data:takeString": lambda: Data(shortString).takeString(),
+        "data:takeString/long": lambda: Data(longString).takeString()
+    }
+
+    benchmarks.update(treeCases())
+    return benchmarks
+
+
+def measure(operation) -> float:
+    "Retourne le meilleur débit (opérations par seconde) de plusieurs séries d'au moins 0,2 s chacune."
+
+    timer = Timer(operation)
+    (number, _) = timer.autorange()
+
+    return number / min(timer.repeat(repeat=repeat, number=number))
+
+
+def main(args: "list[str]") -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.decoding", description="Benchmark du chemin de décodage réseau.")
+    parser.add_argument("filters", nargs="*", help="ne lance que les cas dont le nom contient l'un des filtres")
+    parser.add_argument("--baseline", default=defaultBaseline, help="fichier des résultats de référence")
+    parser.add_argument("--threshold", type=float, default=0.2, help="baisse de débit tolérée par rapport à la référence (0.2 = 20 %%)")
+    parser.add_argument("--save", action="store_true", help="enregistre les résultats comme nouvelle référence")
+    options = parser.parse_args(args)
+
+    baseline = reference.load(options.baseline)
+    results = {}
+    regressions = []
+
+    print("{:<36} {:>14} {:>14} {:>8}".format("case", "ops/s", "baseline", "change"))
+
+    for (name, operation) in cases().items():
+        if len(options.filters) != 0 and not any(filter in name for filter in options.filters):
+            continue
+
+        results[name] = measure(operation)
+
+        if name in baseline:
+            change = results[name] / baseline[name] - 1
+            print("{:<36} {:>14,.0f} {:>14,.0f} {:>+7.1%}".format(name, results[name], baseline[name], change))
+
+            if change < -options.threshold:
+                regressions.append(name)
+        else:
+            print("{:<36} {:>14,.0f} {:>14} {:>8}".format(name, results[name], "-", "-"))
+
+    if options.save:
+        reference.save(options.baseline, dict(baseline, **results))
+        print("Baseline saved to " + options.baseline)
+    elif len(baseline) == 0:
+        print("No baseline found in {}, run with --save to create it".format(options.baseline))
+        return 1
+
+    if len(regressions) != 0:
+        print("{} case(s) regressed by more than {:.0%} : {}".format(len(regressions), options.threshold, ", ".join(regressions)))
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,46 @@
+"""Mesure le coût d'un appel à DictionnaryView.refresh() pour des dictionnaires de 10 à 10 000 clés.
+
+Trois cas sont mesurés, avec et sans index trié (sortKeys) : le remplissage initial, la mise à jour d'une seule valeur,
+puis l'ajout et la suppression d'une seule clé.\n
+À lancer depuis la racine du dépôt : python -m benchmarks.dictionnaryview
+"""
+
+from time import perf_counter
+from timeit import timeit
+
+import kivy.resources
+from kivy.lang.builder import Builder
+
+kivy.resources.resource_add_path("rboclient/kv")
+Builder.load_file("widgets.kv")
+
+from rboclient.gui.widgets import DictionnaryView  # noqa E402
+
+sizes = [10, 100, 1000, 10000]
+repeat = 100
+
+
+def stats(size: int) -> "dict[str, int]":
+    return dict(("Stat {:05}".format(i), i) for i in range(size))
+
+
+def bench(size: int, sortKeys: bool) -> "tuple[float, float, float]":
+    view = DictionnaryView(sortKeys=sortKeys)
+
+    begin = perf_counter()
+    view.refresh(stats(size))
+    fill = perf_counter() - begin
+
+    update = timeit(lambda: view.refresh({"Stat 00000": 1}), number=repeat) / repeat
+    insertRemove = timeit(lambda: (view.refresh({"Stat 0000a": 1}), view.refresh({"Stat 0000a": None})), number=repeat) / repeat
+
+    return (fill, update, insertRemove)
+
+
+if __name__ == "__main__":
+    print("{:>6} {:>6} {:>12} {:>12} {:>16}".format("keys", "sorted", "fill (ms)", "update (µs)", "ins+rem (µs)"))
+
+    for size in sizes:
+        for sortKeys in [False, True]:
+            (fill, update, insertRemove) = bench(size, sortKeys)
+            print("{:>6} {:>6} {:>12.2f} {:>12.1f} {:>16.1f}".format(size, str(sortKeys), fill * 1e3, update * 1e6, insertRemove * 1e6))
@@ -0,0 +1,104 @@
+"""Benchmark de l'interface pendant le Lobby et la Session, sans serveur ni GPU.
+
+Les scénarios (arrivées des membres, membres prêts, milliers de lignes de texte, salves de mises à jour des stats
+et cycles de requêtes) sont joués dans un processus enfant (voir benchmarks.guiharness), rendu hors écran.
+Pour chaque scénario sont mesurés le temps de dispatch des trames, les durées des handlers, les temps de frame
+ainsi que l'évolution de la mémoire (RSS) et du nombre de widgets.\n
+Sur une machine sans GPU, le rendu logiciel (Mesa llvmpipe) domine les temps de frame : seules les comparaisons
+avec une référence enregistrée sur la même machine ont un sens.
+Le benchmark échoue (code de retour 1) si le 95e centile des frames ou le temps passé dans les handlers d'un scénario
+augmente de plus du seuil donné (25 % par défaut) et d'au moins 1 ms, les scénarios les plus courts étant sinon trop bruités.
+Il échoue aussi si la hausse de la mémoire (RSS) ou du nombre de widgets pendant un scénario dépasse celle de la référence
+de plus d'une tolérance absolue (--rss-tolerance et --widgets-tolerance), une fuite n'étant pas proportionnelle à la référence.
+Sans référence, il échoue également, sauf avec --save qui l'enregistre.\n
+À lancer depuis la racine du dépôt : python -m benchmarks.gui [--save] [--threshold 0.25] [--baseline fichier] [--text-lines 10000]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks import baseline as reference
+
+defaultBaseline = os.path.join(os.path.dirname(__file__), "gui-baseline.json")
+timings = ["p95", "handlers"]  # Durées comparées à la référence avec le seuil relatif, en millisecondes
+growths = {"rss": "KiB", "widgets": "widgets"}  # Hausses pendant un scénario comparées à la référence avec une tolérance absolue
+
+
+def run(handlers: int, textLines: int, timeout: float) -> "list[dict]":
+    "Joue les scénarios dans un nouveau processus et retourne leurs résumés."
+
+    process = subprocess.run([sys.executable, "-m", "benchmarks.guiharness", str(handlers), str(textLines)],
+                             stdout=subprocess.PIPE, text=True, timeout=timeout, check=True)
+
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def main(args: "list[str]") -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.gui", description="Benchmark de l'interface pendant le Lobby et la Session.")
+    parser.add_argument("--baseline", default=defaultBaseline, help="fichier des résultats de référence")
+    parser.add_argument("--threshold", type=float, default=0.25, help="hausse tolérée par rapport à la référence (0.25 = 25 %%)")
+    parser.add_argument("--min-delta", type=float, default=1, help="hausse minimale, en millisecondes, pour qu'une métrique soit en régression")
+    parser.add_argument("--rss-tolerance", type=int, default=32768, help="hausse de la mémoire tolérée par rapport à la référence, en KiB")
+    parser.add_argument("--widgets-tolerance", type=int, default=10, help="hausse du nombre de widgets tolérée par rapport à la référence")
+    parser.add_argument("--save", action="store_true", help="enregistre les résultats comme nouvelle référence")
+    parser.add_argument("--handlers", type=int, default=3, help="nombre de handlers les plus lents affichés par scénario")
+    parser.add_argument("--text-lines", type=int, default=10000, help="nombre de lignes de texte envoyées pendant la session")
+    parser.add_argument("--timeout", type=float, default=3600, help="durée maximale des scénarios, en secondes")
+    options = parser.parse_args(args)
+
+    baseline = reference.load(options.baseline)
+    summaries = run(options.handlers, options.text_lines, options.timeout)
+    results = {}
+    regressions = []
+
+    print("{:<24} {:>7} {:>10} {:>7} {:>8} {:>8} {:>8} {:>10} {:>10} {:>9} {:>8}".format(
+        "scenario", "packets", "wall ms", "frames", "mean ms", "p95 ms", "max ms", "dispatch", "handlers", "rss KiB", "widgets"))
+
+    for summary in summaries:
+        print("{name:<24} {packets:>7} {wall:>10.0f} {frames:>7} {mean:>8.1f} {p95:>8.1f} {max:>8.1f} {dispatch:>10.1f} {handlers:>10.1f} "
+              "{rss:>+9} {widgets:>+8}".format(**summary))
+
+        for (name, count, mean, longest) in summary["slowest"]:
+            print("    {:<52} {:>7} calls, {:>8.3f} ms mean, {:>8.3f} ms max".format(name, count, mean, longest))
+
+        for metric in timings:
+            key = "{}/{}".format(summary["name"], metric)
+            results[key] = summary[metric]
+
+            if key in baseline and baseline[key] > 0:
+                change = results[key] / baseline[key] - 1
+                print("    {:<52} {:>10.1f} ms, baseline {:>10.1f} ms {:>+7.1%}".format(metric, results[key], baseline[key], change))
+
+                if change > options.threshold and results[key] - baseline[key] > options.min_delta:
+                    regressions.append(key)
+
+        for (metric, unit) in growths.items():
+            key = "{}/{}".format(summary["name"], metric)
+            results[key] = summary[metric]
+            tolerance = options.rss_tolerance if metric == "rss" else options.widgets_tolerance
+
+            if key in baseline:
+                print("    {:<52} {:>+10} {}, baseline {:>+10} {}".format(metric, results[key], unit, baseline[key], unit))
+
+                if results[key] - baseline[key] > tolerance:
+                    regressions.append(key)
+
+    if options.save:
+        reference.save(options.baseline, dict(baseline, **results))
+        print("Baseline saved to " + options.baseline)
+    elif len(baseline) == 0:
+        print("No baseline found in {}, run with --save to create it".format(options.baseline))
+        return 1
+
+    if len(regressions) != 0:
+        print("{} metric(s) regressed by more than {:.0%} : {}".format(len(regressions), options.threshold, ", ".join(regressions)))
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,315 @@
+"""Processus enfant du benchmark de l'interface (voir benchmarks.gui) : le client joue les scénarios, sans serveur ni GPU.
+
+Le client est lancé dans une fenêtre hors écran (SDL offscreen, rendu logiciel avec Mesa llvmpipe sur une machine sans GPU).
+Une RboConnectionInterface reçoit, au lieu d'une connexion TCP, des trames construites par le benchmark sur un transport factice :
+chaque trame passe donc par le décodage, le dispatch, le FrameScheduler de l'étape et le rendu, comme en partie.\n
+Les résultats sont écrits en JSON sur la sortie standard, puis le processus se termine immédiatement :
+le reactor Twisted installé par Kivy ne s'arrête pas proprement avec les versions récentes de Twisted.\n
+Usage : python -m benchmarks.guiharness <handlers affichés par scénario> <lignes de texte>
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import traceback
+from time import perf_counter
+
+os.environ.setdefault("SDL_VIDEODRIVER", "offscreen")
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+os.environ.setdefault("KIVY_NO_CONSOLELOG", "1")
+
+import kivy.resources  # noqa E402
+from kivy.base import ExceptionHandler, ExceptionManager  # noqa E402
+from kivy.clock import Clock  # noqa E402
+from kivy.config import ConfigParser  # noqa E402
+from kivy.core.window import Window  # noqa E402
+from kivy.logger import Logger  # noqa E402
+
+kivy.resources.resource_add_path("rboclient/kv")
+
+from benchmarks.payloads import boolean, byte, event, jsonString, numeric, string  # noqa E402
+from rboclient.gui.app import ClientApp  # noqa E402
+from rboclient.gui.overlay import rss, widgetsCount  # noqa E402
+from rboclient.gui.power import setMaxFps  # noqa E402
+from rboclient.gui.scheduler import FrameScheduler, LatencyStats, handlerName  # noqa E402
+from rboclient.network import handlerstree  # noqa E402
+from rboclient.network.protocol import Mode  # noqa E402
+from rboclient.network.protocol import RboConnectionInterface as RboCI  # noqa E402
+from twisted.internet.error import ConnectionDone  # noqa E402
+from twisted.internet.testing import StringTransport  # noqa E402
+from twisted.python.failure import Failure  # noqa E402
+
+SELF_ID = 0
+PLAYERS = 32
+ALL_PLAYERS = 255
+TEXT_LINES_PER_FRAME = 100
+STAT_ROUNDS = 20
+REQUEST_CYCLES = 10
+SETTLE_FRAMES = 2  # Frames attendues après le traitement du dernier event, pour compter la mise en page et le rendu qui le suivent
+
+lobby = handlerstree.lobby
+session = handlerstree.session
+
+
+def textLine(i: int) -> bytes:
+    kinds = ["text_normal"] * 7 + ["text_important", "text_title", "text_note"]
+    return event(session, kinds[i % len(kinds)], string("Ligne {} : le groupe avance prudemment dans la [b]crypte[/b].".format(i)))
+
+
+def playerUpdate(id: int, round: int) -> bytes:
+    update = {
+        "death": None,
+        "stats": dict(("Stat {}".format(i), {"main": i < 4, "hidden": i % 10 == 9, "value": round * 7 + i}) for i in range(50)),
+        "inventories": dict(("Inventaire {}".format(i), dict(("Objet {}".format(j), (round + j) % 5) for j in range(30))) for i in range(3)),
+        "capacities": dict(("Inventaire {}".format(i), 60) for i in range(3))
+    }
+
+    return event(session, "player_update", byte(id) + jsonString(update))
+
+
+def globalStat(i: int, round: int) -> bytes:
+    return event(session, "global_stat_update", string("Global {}".format(i)) + boolean(False) + boolean(i < 2)
+                 + b"".join(numeric(value, 4, signed=True) for value in [0, 1000, round * 10 + i]))
+
+
+def requests() -> "list[list]":
+    "Requêtes visant tous les joueurs, chacune étant suivie des réponses de tous les autres joueurs puis de sa fin."
+
+    return [
+        [event(session, "request_confirm", byte(ALL_PLAYERS))],
+        [event(session, "request_yes_no", byte(ALL_PLAYERS) + string("Voulez-vous ouvrir le coffre ?"))],
+        [event(session, "request_options", byte(ALL_PLAYERS) + string("Où allez-vous ?") + byte(8) + b"".join(string("Salle {}".format(i)) for i in range(8)))],
+        [event(session, "request_number", byte(ALL_PLAYERS) + string("Combien de pièces donnez-vous ?") + byte(0) + byte(100))],
+        [event(session, "request_dice_roll", byte(ALL_PLAYERS) + string("Lancez les dés !") + byte(2) + numeric(1, 4, signed=True) + byte(PLAYERS)
+               + b"".join(byte(id) + byte(id % 6 + 1) + byte((id + 3) % 6 + 1) for id in range(PLAYERS))), skipDiceRoll]
+    ]
+
+
+def skipDiceRoll(harness: "Harness") -> None:
+    "Passe l'animation du lancer de dés puis le termine, comme le joueur avec les boutons de DiceRoll."
+
+    action = harness.app.root.content.step.gameplay.currentAction
+    if action is not None:
+        action.next(skip=True)
+        action.next()
+
+
+def disconnect(harness: "Harness") -> None:
+    harness.connection.connectionLost(Failure(ConnectionDone()))
+
+
+def scenarios(textLines: int) -> "list[tuple[str, list]]":
+    "Scénarios joués dans l'ordre, chacun étant une liste de paquets (un par frame) ou d'actions appelées avec le Harness."
+
+    return [
+        ("lobby:register", [event(handlerstree.registering, "registered", byte(0)) + event(lobby, "master_switch_new", byte(SELF_ID))]),
+        ("lobby:joins", [event(lobby, "member_registered", byte(id) + string("Joueur {}".format(id))) for id in range(1, PLAYERS)]),
+        ("lobby:ready", [b"".join(event(lobby, "member_ready", byte(id)) for id in range(1, PLAYERS)) for round in range(10)]),
+        ("session:start", [event(lobby, "session_prepared") + event(session, "session_start", string("La crypte oubliée"))]),
+        ("session:text({})".format(textLines), [b"".join(textLine(i) for i in range(first, min(first + TEXT_LINES_PER_FRAME, textLines)))
+                                                for first in range(0, textLines, TEXT_LINES_PER_FRAME)]),
+        ("session:stats", [b"".join([playerUpdate(id, round) for id in range(PLAYERS)] + [globalStat(i, round) for i in range(10)])
+                           for round in range(STAT_ROUNDS)]),
+        ("session:requests", [packet for cycle in range(REQUEST_CYCLES) for request in requests() for packet in request + [
+            b"".join(event(session, "player_reply", byte(id) + byte(1)) for id in range(1, PLAYERS)),
+            event(session, "finish_request")
+        ]]),
+        ("home", [disconnect])
+    ]
+
+
+class HandlerProfile:
+    "Durées de chaque handler exécuté par un FrameScheduler, installé dans FrameScheduler.profile pendant un scénario."
+
+    def __init__(self):
+        self.times = {}
+
+    def record(self, handler, duration: float) -> None:
+        stats = self.times.setdefault(handlerName(handler), LatencyStats())
+        stats.record(duration)
+
+    def total(self) -> float:
+        return sum(stats.total for stats in self.times.values())
+
+    def slowest(self, count: int) -> "list[tuple[str, LatencyStats]]":
+        return sorted(self.times.items(), key=lambda item: item[1].total, reverse=True)[:count]
+
+
+class Result:
+    "Mesures d'un scénario : temps de dispatch, temps de frame, durées des handlers et évolution de la mémoire et des widgets."
+
+    def __init__(self, name: str):
+        self.name = name
+        self.packets = 0
+        self.dispatch = 0
+        self.frames = LatencyStats(recent=100000)
+        self.handlers = HandlerProfile()
+
+        self.begin = perf_counter()
+        self.duration = None
+        self.rss = rss()
+        self.widgets = widgetsCount(Window)
+
+    def finish(self) -> None:
+        self.duration = perf_counter() - self.begin
+        if self.rss is not None:
+            self.rss = rss() - self.rss
+        self.widgets = widgetsCount(Window) - self.widgets
+
+    def summary(self, handlers: int) -> dict:
+        "Résumé transmis au processus parent, les durées étant en millisecondes."
+
+        return {
+            "name": self.name,
+            "packets": self.packets,
+            "wall": self.duration * 1e3,
+            "frames": self.frames.count,
+            "mean": self.frames.mean() * 1e3,
+            "p95": self.frames.percentile(95) * 1e3,
+            "max": self.frames.max * 1e3,
+            "dispatch": self.dispatch * 1e3,
+            "handlers": self.handlers.total() * 1e3,
+            "slowest": [(name, stats.count, stats.mean() * 1e3, stats.max * 1e3) for (name, stats) in self.handlers.slowest(handlers)],
+            "rss": (self.rss or 0) // 1024,
+            "widgets": self.widgets
+        }
+
+
+class Harness:
+    """Joue les scénarios dans le client en cours d'exécution, un paquet par frame.
+
+    Un scénario se termine lorsque tous ses paquets ont été envoyés et que le FrameScheduler de l'étape en cours n'a plus rien à traiter.
+    """
+
+    def __init__(self, app: ClientApp, handlers: int, textLines: int):
+        self.app = app
+        self.handlers = handlers
+        self.results = []
+        self.scenarios = scenarios(textLines)
+        self.current = None
+        self.pending = []
+        self.settling = 0
+        self.lastFlip = None
+
+    def start(self, _: float = None) -> None:
+        handlers = {
+            Mode.REGISTERING: handlerstree.registering,
+            Mode.LOBBY: handlerstree.lobby,
+            Mode.SESSION: handlerstree.session
+        }
+
+        self.rboCI = RboCI(SELF_ID, "Bench", handlers)
+        self.connection = self.rboCI.buildProtocol(None)
+        self.connection.makeConnection(StringTransport())
+
+        # Même chemin qu'une connexion réussie depuis l'écran d'accueil (voir Main.login)
+        self.app.root.connection = self.rboCI
+        self.app.root.registering(None)
+
+        Window.bind(on_flip=self.flip)
+        self.ticking = Clock.schedule_interval(self.tick, 0)
+
+    def backlog(self) -> int:
+        step = getattr(self.app.root.content, "step", None)
+        return step.scheduler.pending() if step is not None else 0
+
+    def flip(self, *_) -> None:
+        now = perf_counter()
+        if self.current is not None and self.lastFlip is not None:
+            self.current.frames.record(now - self.lastFlip)
+
+        self.lastFlip = now
+
+    def tick(self, _: float) -> None:
+        if self.current is None:
+            self.next()
+            return
+
+        if len(self.pending) != 0:
+            if callable(self.pending[0]) and self.backlog() != 0:
+                return  # Une action du joueur attend que l'interface ait traité les events précédents, comme le joueur
+
+            packet = self.pending.pop(0)
+
+            begin = perf_counter()
+            if callable(packet):
+                packet(self)
+            else:
+                self.connection.dataReceived(packet)
+
+            self.current.dispatch += perf_counter() - begin
+            self.current.packets += 1
+        elif self.backlog() == 0:
+            self.settling += 1
+            if self.settling > SETTLE_FRAMES:
+                self.current.finish()
+                self.results.append(self.current)
+                Logger.info("Benchmark : {} done in {:.0f} ms".format(self.current.name, self.current.duration * 1e3))
+
+                self.current = None
+
+    def next(self) -> None:
+        if len(self.scenarios) == 0:
+            self.stop()
+            return
+
+        (name, packets) = self.scenarios.pop(0)
+        self.current = Result(name)
+        self.pending = list(packets)
+        self.settling = 0
+
+        FrameScheduler.profile = self.current.handlers
+
+    def stop(self) -> None:
+        self.ticking.cancel()
+        Window.unbind(on_flip=self.flip)
+        FrameScheduler.profile = None
+
+        print(json.dumps([result.summary(self.handlers) for result in self.results]), flush=True)
+
+        shutil.rmtree(self.app.transcripts, ignore_errors=True)
+        os._exit(0)
+
+
+class ExitOnError(ExceptionHandler):
+    "Termine le processus à la première exception, le reactor Twisted empêchant sinon sa fermeture."
+
+    def handle_exception(self, _: BaseException):
+        traceback.print_exc(file=sys.__stderr__)  # Kivy redirige sys.stderr vers ses logs
+        os._exit(1)
+
+
+class BenchmarkApp(ClientApp):
+    def __init__(self, cfg: ConfigParser, transcripts: str, handlers: int, textLines: int):
+        super().__init__(cfg, (900, 650))
+
+        self.transcripts = transcripts
+        self.harness = None
+        self.harnessArgs = (handlers, textLines)
+
+    def on_start(self):
+        super().on_start()
+
+        # La fréquence des frames ne doit pas être limitée, ni par Kivy ni par la mise en veille du client
+        self.powerSaver.stop()
+        setMaxFps(0)
+
+        self.harness = Harness(self, *self.harnessArgs)
+        Clock.schedule_once(self.harness.start, .5)  # Laisse l'écran d'accueil s'afficher avant
+
+
+if __name__ == "__main__":
+    transcripts = tempfile.mkdtemp(prefix="rbo-benchmark-")
+
+    cfg = ConfigParser(name="benchmark")
+    cfg.read_string("[fields]\naddress=\nport=\nplayerID=\nname=\nlocalhost=False\nmaster=False\n"
+                    "[graphics]\nwidth=900\nheight=650\nfullscreen=\nwarmup=False\n"
+                    "[session]\ntranscripts={}\n"
+                    "[profiling]\nsampling=False\n".format(transcripts))
+
+    ExceptionManager.add_handler(ExitOnError())
+    BenchmarkApp(cfg, transcripts, int(sys.argv[1]), int(sys.argv[2])).run()
+
+    sys.exit(1)  # L'application ne revient ici que si elle a été fermée avant la fin des scénarios
@@ -0,0 +1,63 @@
+"""Encodage des trames Rbo envoyées par le serveur, pour construire les données des benchmarks.
+
+Les fonctions suivent les formats lus par rboclient.network.handling.Data : entiers gros-boutistes,
+chaînes précédées de leur taille sur 2 octets et trames précédées de leur taille totale (taille comprise) sur 2 octets.
+"""
+
+import json
+from functools import lru_cache
+
+from rboclient.network.handling import HandlerNode
+
+
+def byte(value: int) -> bytes:
+    return value.to_bytes(1, "big")
+
+
+def boolean(value: bool) -> bytes:
+    return b"\x01" if value else b"\x00"
+
+
+def numeric(value: int, size: int, signed: bool = False) -> bytes:
+    return value.to_bytes(size, "big", signed=signed)
+
+
+def string(value: str) -> bytes:
+    raw = value.encode()
+    return numeric(len(raw), 2) + raw
+
+
+def jsonString(value) -> bytes:
+    return string(json.dumps(value, separators=(",", ":")))
+
+
+def frame(payload: bytes) -> bytes:
+    return numeric(len(payload) + 2, 2) + payload
+
+
+def leafPaths(tree: HandlerNode, tags: "list[str]" = None, prefix: bytes = b"") -> "dict[str, bytes]":
+    "Associe le nom complet de chaque feuille d'un arbre (voir handling.leavesFullNames) aux identifiants de branches menant à elle."
+
+    if tags is None:
+        tags = []
+
+    paths = {}
+
+    for (id, branch) in tree.children.items():
+        if type(branch) == HandlerNode:
+            paths.update(leafPaths(branch, tags + [branch.tag], prefix + byte(id)))
+        else:
+            paths["_".join(tags + [branch.name])] = prefix + byte(id)
+
+    return paths
+
+
+@lru_cache(maxsize=None)
+def treePaths(tree: HandlerNode) -> "dict[str, bytes]":
+    return leafPaths(tree)
+
+
+def event(tree: HandlerNode, name: str, args: bytes = b"") -> bytes:
+    "Construit la trame complète déclenchant la feuille name de l'arbre tree, avec ses arguments déjà encodés."
+
+    return frame(treePaths(tree)[name] + args)
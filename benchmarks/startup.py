@@ -0,0 +1,72 @@
+"""Mesure le temps écoulé jusqu'à la première frame affichée par le client (time-to-first-frame).
+
+Chaque mesure est faite dans un nouveau processus, en chargeant les règles .kv à la demande (par défaut du client)
+puis en chargeant toutes les règles avant la première frame (comme le faisait le client auparavant) pour comparaison.\n
+À lancer depuis la racine du dépôt : python -m benchmarks.startup [nombre de lancements]
+"""
+
+from time import perf_counter
+
+begin = perf_counter()
+
+import os  # noqa E402
+import subprocess  # noqa E402
+import sys  # noqa E402
+from statistics import median  # noqa E402
+
+
+def child(eager: bool) -> None:
+    import kivy.resources
+    from kivy.config import Config, ConfigParser
+
+    Config.set("graphics", "borderless", 1)
+    Config.set("kivy", "exit_on_escape", 0)
+
+    kivy.resources.resource_add_path("rboclient/kv")
+
+    from kivy.core.window import Window
+    from rboclient.gui import rules
+    from rboclient.gui.app import ClientApp
+
+    class FirstFrameApp(ClientApp):
+        def build(self):
+            if eager:
+                rules.require(*rules.files)
+
+            return super().build()
+
+        def on_start(self):
+            super().on_start()
+            Window.bind(on_flip=self.firstFrame)
+
+        def firstFrame(self, *_):
+            print(perf_counter() - begin)
+            self.stop()
+
+    cfg = ConfigParser(name="benchmark")
+    cfg.read_string("[fields]\naddress=\nport=\nplayerID=\nname=\nlocalhost=False\nmaster=False\n"
+                    "[graphics]\nwidth=900\nheight=650\nfullscreen=\nwarmup=False\n")
+
+    FirstFrameApp(cfg, (900, 650)).run()
+
+
+def measure(eager: bool) -> float:
+    process = subprocess.run([sys.executable, "-m", "benchmarks.startup", "--child", "eager" if eager else "lazy"],
+                             env=dict(os.environ, KIVY_NO_ARGS="1"), capture_output=True, text=True, check=True)
+
+    return float(process.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--child":
+        child(sys.argv[2] == "eager")
+        sys.exit()
+
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    results = {}
+    for (mode, eager) in [("lazy", False), ("eager", True)]:
+        results[mode] = median(measure(eager) for i in range(runs))
+        print("{:>6} : {:.1f} ms (médiane sur {} lancements)".format(mode, results[mode] * 1e3, runs))
+
+    print("Gain : {:.1f} ms".format((results["eager"] - results["lazy"]) * 1e3))
@@ -0,0 +1,438 @@
+"""Génère un trafic Rbo synthétique et reproductible : inscription, lobby puis une session de la durée voulue.
+
+Le trafic est réglé par un Profile : nombre de joueurs, lignes de texte par minute, tailles des stats et des inventaires
+dans player_update, requêtes par minute et répartition de leurs types, intensité des combats et graine aléatoire.
+Chaque flux de la session (textes, mises à jour, requêtes, combats) a son propre générateur aléatoire, dérivé de la graine :
+un même profil produit toujours les mêmes octets, et modifier le réglage d'un flux ne change pas les autres.\n
+Un scénario est une liste de Record : instant d'envoi, trame complète et indicateur d'attente d'une réponse du client.
+Il peut être enregistré dans un fichier, écrit comme flux d'octets brut sur la sortie standard,
+ou rejoué en temps réel par un serveur TCP auquel le client se connecte (tests d'endurance).\n
+À lancer depuis la racine du dépôt : python -m benchmarks.workload [réglages] (--output fichier | --stdout | --serve port)
+"""
+
+import argparse
+import random
+import struct
+import sys
+from dataclasses import dataclass, field
+
+from benchmarks.payloads import boolean, byte, event, jsonString, numeric, string
+from rboclient.network import handlerstree
+from rboclient.network.handling import Data, InvalidFormat
+
+ALL_PLAYERS = 255
+MAX_PLAYERS = 254
+
+AWAIT_REPLY = 1  # Le serveur attend la réponse du client avant d'envoyer les trames suivantes
+
+requestKinds = ["confirm", "yes_no", "options", "number", "dice_roll"]
+textKinds = {"normal": 80, "important": 8, "title": 2, "note": 10}  # Répartition des types de texte, en pourcentages
+
+words = ("le la les un une des groupe crypte torche couloir porte coffre gobelin ombre vent pierre escalier sombre ancien "
+         "avance recule entend découvre ouvre murmure tombe brille silence prudemment lentement soudain nord sud").split()
+
+
+class InvalidProfile(ValueError):
+    def __init__(self, reason: str):
+        super().__init__("Invalid workload profile : " + reason)
+
+
+def requestMix(value: str) -> "dict[str, float]":
+    "Lit une répartition des requêtes de la forme confirm=2,dice_roll=1 (poids relatifs, les types absents valant 0)."
+
+    mix = dict((kind, 0.0) for kind in requestKinds)
+
+    for item in value.split(","):
+        (kind, _, weight) = item.partition("=")
+        if kind not in mix:
+            raise InvalidProfile("unknown request kind " + kind)
+
+        mix[kind] = float(weight)
+
+    return mix
+
+
+@dataclass
+class Profile:
+    "Réglages d'un scénario, les fréquences étant exprimées par minute de session."
+
+    players: int = 8  # Client compris
+    selfID: int = 0
+    minutes: float = 10
+    textPerMinute: float = 30
+    updatesPerMinute: float = 12
+    stats: int = 20
+    inventories: int = 3
+    items: int = 20
+    requestsPerMinute: float = 2
+    requests: "dict[str, float]" = field(default_factory=lambda: requestMix("confirm=2,yes_no=2,options=2,number=1,dice_roll=3"))
+    battleIntensity: float = 20  # Attaques par minute pendant un combat, 0 désactivant les combats
+    seed: int = 0
+
+    def validate(self) -> None:
+        if not 1 <= self.players <= MAX_PLAYERS:
+            raise InvalidProfile("players must be between 1 and {}".format(MAX_PLAYERS))
+        if not 0 <= self.selfID < MAX_PLAYERS:
+            raise InvalidProfile("selfID must be between 0 and {}".format(MAX_PLAYERS - 1))
+        if self.requestsPerMinute > 0 and sum(self.requests.values()) <= 0:
+            raise InvalidProfile("request mix is empty")
+
+    def ids(self) -> "list[int]":
+        "Identifiants des joueurs, le client compris."
+
+        others = [id for id in range(MAX_PLAYERS) if id != self.selfID][:self.players - 1]
+        return sorted([self.selfID] + others)
+
+
+@dataclass
+class Record:
+    time: float  # Secondes depuis le début du scénario
+    frame: bytes
+    flags: int = 0
+
+
+class Workload:
+    """Construit le scénario d'un Profile.
+
+    records() retourne l'inscription du client, l'arrivée des autres joueurs dans le lobby, le lancement de la session
+    puis les flux de la session, fusionnés par instant d'envoi.
+    """
+
+    def __init__(self, profile: Profile):
+        profile.validate()
+
+        self.profile = profile
+        self.ids = profile.ids()
+        self.others = [id for id in self.ids if id != profile.selfID]
+        self.duration = profile.minutes * 60
+
+    def stream(self, name: str) -> random.Random:
+        return random.Random("{}:{}".format(self.profile.seed, name))
+
+    def records(self) -> "list[Record]":
+        records = self.lobby()
+        start = records[-1].time
+
+        session = self.texts() + self.updates() + self.requests() + self.battles()
+        session.sort(key=lambda record: record.time)  # Tri stable : l'ordre de chaque flux est conservé
+
+        return records + [Record(start + record.time, record.frame, record.flags) for record in session]
+
+    def lobby(self) -> "list[Record]":
+        lobby = handlerstree.lobby
+        records = [Record(0, event(handlerstree.registering, "registered", byte(0))),
+                   Record(0, event(lobby, "master_switch_new", byte(self.profile.selfID)))]
+
+        rng = self.stream("lobby")
+        time = 0
+        for id in self.others:
+            time += rng.uniform(.1, 2)
+            records.append(Record(time, event(lobby, "member_registered", byte(id) + string("Joueur {}".format(id)))))
+
+        for id in self.others:
+            time += rng.uniform(.1, 1)
+            records.append(Record(time, event(lobby, "member_ready", byte(id))))
+
+        records.append(Record(time + 1, event(lobby, "session_prepared")))
+        records.append(Record(time + 1, event(handlerstree.session, "session_start", string("Scénario {}".format(self.profile.seed)))))
+
+        return records
+
+    def poisson(self, rng: random.Random, perMinute: float) -> "list[float]":
+        "Instants des évènements d'un processus de Poisson sur toute la session."
+
+        times = []
+        if perMinute <= 0:
+            return times
+
+        time = rng.expovariate(perMinute / 60)
+        while time < self.duration:
+            times.append(time)
+            time += rng.expovariate(perMinute / 60)
+
+        return times
+
+    def sentence(self, rng: random.Random) -> str:
+        text = " ".join(rng.choice(words) for i in range(rng.randint(4, 40)))
+        if rng.random() < .1:
+            text = "[b]{}[/b]".format(text)
+
+        return text[0].upper() + text[1:] + "."
+
+    def texts(self) -> "list[Record]":
+        rng = self.stream("texts")
+        kinds = list(textKinds.keys())
+        weights = list(textKinds.values())
+
+        return [Record(time, event(handlerstree.session, "text_" + rng.choices(kinds, weights)[0], string(self.sentence(rng))))
+                for time in self.poisson(rng, self.profile.textPerMinute)]
+
+    def updates(self) -> "list[Record]":
+        "Mises à jour complètes d'un joueur, accompagnées de temps en temps d'une stat globale."
+
+        rng = self.stream("updates")
+        profile = self.profile
+        records = []
+
+        for time in self.poisson(rng, profile.updatesPerMinute):
+            update = {
+                "death": None,
+                "stats": dict(("Stat {}".format(i), {"main": i < 4, "hidden": i % 10 == 9, "value": rng.randint(0, 100)}) for i in range(profile.stats)),
+                "inventories": dict(("Inventaire {}".format(i), dict(("Objet {}".format(j), rng.randint(0, 5)) for j in range(profile.items)))
+                                    for i in range(profile.inventories)),
+                "capacities": dict(("Inventaire {}".format(i), profile.items * 3) for i in range(profile.inventories))
+            }
+
+            records.append(Record(time, event(handlerstree.session, "player_update", byte(rng.choice(self.ids)) + jsonString(update))))
+
+            if rng.random() < .2:
+                hidden = rng.random() < .1
+                values = b"" if hidden else b"".join(numeric(value, 4, signed=True) for value in [0, 1000, rng.randint(0, 1000)])
+                records.append(Record(time, event(handlerstree.session, "global_stat_update",
+                                                  string("Global {}".format(rng.randint(0, 9))) + boolean(hidden) + boolean(rng.random() < .5) + values)))
+
+        return records
+
+    def request(self, rng: random.Random, kind: str) -> bytes:
+        args = byte(ALL_PLAYERS)
+
+        if kind == "yes_no":
+            args += string("Voulez-vous ouvrir le coffre ?")
+        elif kind == "options":
+            count = rng.randint(2, 8)
+            args += string("Où allez-vous ?") + byte(count) + b"".join(string("Salle {}".format(i)) for i in range(count))
+        elif kind == "number":
+            args += string("Combien de pièces donnez-vous ?") + byte(0) + byte(100)
+        elif kind == "dice_roll":
+            dices = rng.randint(1, 3)
+            args += (string("Lancez les dés !") + byte(dices) + numeric(rng.randint(-2, 2), 4, signed=True) + byte(len(self.ids))
+                     + b"".join(byte(id) + bytes(rng.randint(1, 6) for dice in range(dices)) for id in self.ids))
+
+        return event(handlerstree.session, "request_" + kind, args)
+
+    def requests(self) -> "list[Record]":
+        """Requêtes visant tous les joueurs, suivies des réponses des autres joueurs puis de leur fin.
+
+        Une requête ne commence qu'une fois la précédente terminée. Le serveur attend la réponse du client à chacune d'elles.
+        """
+
+        rng = self.stream("requests")
+        kinds = list(self.profile.requests.keys())
+        weights = list(self.profile.requests.values())
+        records = []
+
+        time = 0
+        for start in self.poisson(rng, self.profile.requestsPerMinute):
+            if start < time:
+                continue
+
+            records.append(Record(start, self.request(rng, rng.choices(kinds, weights)[0]), AWAIT_REPLY))
+
+            replies = sorted((start + rng.expovariate(1 / 5), id) for id in self.others)  # Environ 5 s pour répondre
+            for (time, id) in replies:
+                records.append(Record(time, event(handlerstree.session, "player_reply", byte(id) + byte(rng.randint(0, 1)))))
+
+            time = max([start] + [time for (time, _) in replies]) + .5
+            records.append(Record(time, event(handlerstree.session, "finish_request")))
+
+        return records
+
+    def battles(self) -> "list[Record]":
+        """Combats successifs, séparés par des phases d'exploration d'environ 3 minutes.
+
+        Chaque combat oppose au groupe de joueurs un groupe d'ennemis, qui se termine lorsqu'ils n'ont plus de PV.
+        """
+
+        rng = self.stream("battles")
+        intensity = self.profile.battleIntensity
+        records = []
+
+        if intensity <= 0:
+            return records
+
+        time = rng.expovariate(1 / 180)
+        while time < self.duration:
+            hp = dict(("Ennemi {}".format(i), rng.randint(20, 60)) for i in range(rng.randint(1, max(1, len(self.ids) // 2 + 1))))
+            records.append(Record(time, event(handlerstree.session, "battle_init", jsonString(dict((name, {"hp": value}) for (name, value) in hp.items())))))
+
+            while len(hp) != 0 and time < self.duration:
+                time += rng.expovariate(intensity / 60)
+
+                enemy = rng.choice(list(hp.keys()))
+                dmg = rng.randint(1, 15)
+                if rng.random() < .6:
+                    hp[enemy] -= dmg
+                    if hp[enemy] <= 0:
+                        del hp[enemy]
+                else:
+                    dmg = -dmg
+
+                records.append(Record(time, event(handlerstree.session, "battle_atk", byte(rng.choice(self.ids)) + string(enemy) + numeric(dmg, 4, signed=True))))
+
+            records.append(Record(time, event(handlerstree.session, "battle_end")))
+            time += rng.expovariate(1 / 180)
+
+        return records
+
+
+def verify(records: "list[Record]") -> "dict[str, int]":
+    """Décode chaque trame avec l'arbre du mode courant, qui change comme dans RboConnection.decode().
+
+    Retourne le nombre de trames de chaque feuille. Lève InvalidFormat si une trame n'est pas lue entièrement.
+    """
+
+    tree = handlerstree.registering
+    counts = {}
+
+    for record in records:
+        data = Data(record.frame[2:])
+        name = tree(data).name
+
+        if len(data.buffer) != 0:
+            raise InvalidFormat("{} bytes left after decoding {}".format(len(data.buffer), name))
+
+        counts[name] = counts.get(name, 0) + 1
+
+        if name == "registered" or name == "session_stop":
+            tree = handlerstree.lobby
+        elif name == "session_prepared":
+            tree = handlerstree.session
+
+    return counts
+
+
+header = struct.Struct("!IB")  # Instant d'envoi en millisecondes et indicateurs de chaque Record d'un fichier de scénario
+
+
+def save(path: str, records: "list[Record]") -> None:
+    with open(path, "wb") as file:
+        for record in records:
+            file.write(header.pack(round(record.time * 1000), record.flags) + record.frame)
+
+
+def load(path: str) -> "list[Record]":
+    with open(path, "rb") as file:
+        content = file.read()
+
+    records = []
+    while len(content) != 0:
+        if len(content) < header.size + 2:
+            raise InvalidFormat("Truncated scenario file")
+
+        (time, flags) = header.unpack_from(content)
+        size = struct.unpack_from("!H", content, header.size)[0]
+
+        records.append(Record(time / 1000, content[header.size:header.size + size], flags))
+        content = content[header.size + size:]
+
+    return records
+
+
+def serve(records: "list[Record]", port: int, speed: float) -> None:
+    """Rejoue le scénario en temps réel pour chaque client se connectant sur le port donné.
+
+    Les trames sont envoyées après l'inscription du client. Après une requête, l'envoi reprend à la réception de sa réponse,
+    les trames suivantes étant décalées du temps d'attente. La connexion est fermée à la fin du scénario.
+    """
+
+    from twisted.internet import protocol, reactor
+
+    class Replay(protocol.Protocol):
+        def connectionMade(self):
+            self.next = 0
+            self.offset = None
+            self.waiting = False
+            self.call = None
+
+        def dataReceived(self, data: bytes):
+            if self.offset is None:
+                print("Client {} registered as {} ({})".format(self.transport.getPeer(), data[1:].decode(errors="replace"), data[0]), file=sys.stderr)
+                self.offset = reactor.seconds()
+                self.schedule()
+            elif self.waiting:
+                self.waiting = False
+                self.offset = reactor.seconds() - records[self.next - 1].time / speed
+                self.schedule()
+
+        def connectionLost(self, reason):
+            if self.call is not None and self.call.active():
+                self.call.cancel()
+
+        def schedule(self):
+            if self.next == len(records):
+                self.transport.loseConnection()
+                return
+
+            delay = self.offset + records[self.next].time / speed - reactor.seconds()
+            self.call = reactor.callLater(max(0, delay), self.send)
+
+        def send(self):
+            record = records[self.next]
+            self.next += 1
+            self.transport.write(record.frame)
+
+            if record.flags & AWAIT_REPLY:
+                self.waiting = True
+            else:
+                self.schedule()
+
+    factory = protocol.Factory.forProtocol(Replay)
+    reactor.listenTCP(port, factory)
+
+    print("Serving {} frames on port {}".format(len(records), port), file=sys.stderr)
+    reactor.run()
+
+
+def main(args: "list[str]") -> int:
+    defaults = Profile()
+
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.workload", description="Générateur de trafic Rbo synthétique.")
+    parser.add_argument("--players", type=int, default=defaults.players, help="nombre de joueurs, client compris")
+    parser.add_argument("--self-id", type=int, default=defaults.selfID, help="identifiant du client")
+    parser.add_argument("--minutes", type=float, default=defaults.minutes, help="durée de la session")
+    parser.add_argument("--text", type=float, default=defaults.textPerMinute, help="lignes de texte par minute")
+    parser.add_argument("--updates", type=float, default=defaults.updatesPerMinute, help="mises à jour de joueurs par minute")
+    parser.add_argument("--stats", type=int, default=defaults.stats, help="stats de chaque mise à jour")
+    parser.add_argument("--inventories", type=int, default=defaults.inventories, help="inventaires de chaque mise à jour")
+    parser.add_argument("--items", type=int, default=defaults.items, help="objets de chaque inventaire")
+    parser.add_argument("--requests", type=float, default=defaults.requestsPerMinute, help="requêtes par minute")
+    parser.add_argument("--request-mix", type=requestMix, default=defaults.requests, help="poids de chaque type de requête, ex : confirm=2,dice_roll=1")
+    parser.add_argument("--battle-intensity", type=float, default=defaults.battleIntensity, help="attaques par minute pendant un combat, 0 sans combat")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+    outputs = parser.add_mutually_exclusive_group(required=True)
+    outputs.add_argument("--output", help="enregistre le scénario dans un fichier")
+    outputs.add_argument("--stdout", action="store_true", help="écrit les trames sur la sortie standard, sans leurs instants d'envoi")
+    outputs.add_argument("--serve", type=int, metavar="PORT", help="rejoue le scénario en temps réel à chaque client connecté")
+    parser.add_argument("--replay", help="utilise un fichier de scénario au lieu des réglages")
+    parser.add_argument("--speed", type=float, default=1, help="facteur d'accélération du rejeu en temps réel")
+    options = parser.parse_args(args)
+
+    if options.replay is not None:
+        records = load(options.replay)
+    else:
+        profile = Profile(options.players, options.self_id, options.minutes, options.text, options.updates, options.stats, options.inventories,
+                          options.items, options.requests, options.request_mix, options.battle_intensity, options.seed)
+        records = Workload(profile).records()
+
+    counts = verify(records)
+    size = sum(len(record.frame) for record in records)
+
+    summary = sys.stderr if options.stdout else sys.stdout
+    print("{} frames, {:,} bytes over {:.0f} s".format(len(records), size, records[-1].time), file=summary)
+    for (name, count) in sorted(counts.items(), key=lambda item: item[1], reverse=True):
+        print("    {:<28} {:>8}".format(name, count), file=summary)
+
+    if options.output is not None:
+        save(options.output, records)
+    elif options.stdout:
+        sys.stdout.buffer.write(b"".join(record.frame for record in records))
+        sys.stdout.buffer.flush()
+    else:
+        serve(records, options.serve, options.speed)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
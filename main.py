@@ -23,6 +23,27 @@ master=False
 width={}
 height={}
 fullscreen=
+idlefps=10
+activefps=60
+warmup=True
+framebudget=1
+
+[session]
+transcripts=transcripts
+
+[profiling]
+enabled=False
+directory=profiles
+top=20
+sampling=True
+samplingrate=100
+keepsamples=10
+tracing=False
+leaks=False
+
+[network]
+thread=False
+queue=4096
 
 """.format(*defaultWindowSize)
 
@@ -32,7 +53,7 @@ if not path.isfile(cfgFile):
 
 rboCfg = ConfigParser(name="rboclient")
 
-for section in ["fields", "graphics"]:
+for section in ["fields", "graphics", "session", "profiling", "network"]:
     rboCfg.add_section(section)
 
 rboCfg.read(cfgFile)
@@ -0,0 +1,77 @@
+from array import array
+
+from rboclient.network.handlerstree import Attacker
+
+
+def enemiesHP(group) -> "list[tuple[str, int]]":
+    """Retourne le nom et les PV de chaque ennemi d'un groupe reçu avec battle_init.
+
+    Le groupe est un objet associant à chaque nom d'ennemi ses PV, directement ou dans le champ "hp" de ses caractéristiques.
+    Une liste d'ennemis ayant chacun un champ "name" est également acceptée. Les PV manquants valent 0 (inconnus).
+    """
+
+    if isinstance(group, dict):
+        enemies = group.items()
+    else:
+        enemies = [(enemy.get("name", str(i)), enemy) for (i, enemy) in enumerate(group)]
+
+    return [(name, stats if isinstance(stats, int) else int(stats.get("hp", 0))) for (name, stats) in enemies]
+
+
+class Battle:
+    """État compact d'un combat : PV de chaque ennemi et dégâts infligés et subis par chaque joueur.
+
+    Les PV des ennemis sont stockés dans des tableaux indexés par la position de l'ennemi dans le groupe (index donne cette position).
+    Un ennemi inconnu du groupe est ajouté avec des PV maximums de 0, ses PV devenant alors négatifs avec les dégâts subis.\n
+    attack() applique une attaque reçue avec battle_atk et retient ce qu'elle a modifié.
+    changes() retourne les ennemis et les joueurs modifiés depuis son dernier appel, afin de regrouper l'affichage de plusieurs attaques.
+    """
+
+    def __init__(self, group):
+        self.names = []
+        self.index = {}
+        self.hp = array("l")
+        self.maxHP = array("l")
+
+        self.dealt = {}
+        self.taken = {}
+
+        self.changedEnemies = set()
+        self.changedPlayers = set()
+
+        for (name, hp) in enemiesHP(group):
+            self.addEnemy(name, hp)
+
+    def addEnemy(self, name: str, hp: int) -> int:
+        self.index[name] = len(self.names)
+        self.names.append(name)
+        self.hp.append(hp)
+        self.maxHP.append(hp)
+
+        self.changedEnemies.add(self.index[name])
+        return self.index[name]
+
+    def attack(self, playerID: int, enemyName: str, attacker: Attacker, dmg: int) -> None:
+        enemy = self.index.get(enemyName)
+        if enemy is None:
+            enemy = self.addEnemy(enemyName, 0)
+
+        if attacker == Attacker.Player:
+            self.hp[enemy] = self.hp[enemy] - dmg if self.maxHP[enemy] == 0 else max(0, self.hp[enemy] - dmg)
+            self.dealt[playerID] = self.dealt.get(playerID, 0) + dmg
+            self.changedEnemies.add(enemy)
+        else:
+            self.taken[playerID] = self.taken.get(playerID, 0) + dmg
+
+        self.changedPlayers.add(playerID)
+
+    def alive(self) -> int:
+        return sum(1 for (hp, maxHP) in zip(self.hp, self.maxHP) if maxHP == 0 or hp > 0)
+
+    def changes(self) -> "tuple[list[int], list[int]]":
+        changes = (sorted(self.changedEnemies), sorted(self.changedPlayers))
+
+        self.changedEnemies = set()
+        self.changedPlayers = set()
+
+        return changes
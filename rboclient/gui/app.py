@@ -1,4 +1,10 @@
+from __future__ import annotations  # Pour les type hints des modules importés à la demande
+
+import os
 from enum import Enum, auto
+from importlib import import_module
+from time import strftime
+from typing import TYPE_CHECKING
 
 import kivy.input
 import rboclient
@@ -13,18 +19,17 @@ from kivy.logger import Logger
 from kivy.properties import BooleanProperty, ObjectProperty, StringProperty
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.label import Label
-from rboclient.gui.game import Game
-from rboclient.gui.home import Home, HomeCtxActions
-from rboclient.gui.lobby import LobbyCtxActions
-from rboclient.gui.session import SessionCtxActions
+from rboclient.gui import rules
+from rboclient.gui.home import Home
+from rboclient.gui.power import PowerSaver
 from rboclient.gui.widgets import ErrorPopup
 from rboclient.misc import toBool
-from rboclient.network import handlerstree
-from rboclient.network.protocol import Mode
-from rboclient.network.protocol import RboConnectionInterface as RboCI
-from twisted.internet import endpoints, reactor
-from twisted.internet.error import ConnectionDone
-from twisted.python.failure import Failure
+from rboclient.network import worker
+from rboclient.sampling import StackSampler, prune
+
+# Twisted et les étapes d'une partie (lobby et session) ne sont importés qu'au moment de la connexion, afin d'accélérer le démarrage
+if TYPE_CHECKING:
+    from twisted.python.failure import Failure
 
 kivy.require("2.0.0")
 
@@ -92,10 +97,11 @@ class TitleBarCtx(Enum):
 class TitleBar(BoxLayout):
     "Barre de titre sur-mesure adaptant ses actions contextuelles au contexte (accueil, lobby ou session)."
 
+    # Module et nom de la classe d'actions contextuelles, importée au premier changement vers le contexte
     contexts = {
-        TitleBarCtx.HOME: HomeCtxActions,
-        TitleBarCtx.LOBBY: LobbyCtxActions,
-        TitleBarCtx.SESSION: SessionCtxActions
+        TitleBarCtx.HOME: ("rboclient.gui.home", "HomeCtxActions"),
+        TitleBarCtx.LOBBY: ("rboclient.gui.lobby", "LobbyCtxActions"),
+        TitleBarCtx.SESSION: ("rboclient.gui.session", "SessionCtxActions")
     }
 
     title = StringProperty()
@@ -110,7 +116,8 @@ class TitleBar(BoxLayout):
         if self.actionsCtx is not None:
             self.remove_widget(self.actionsCtx)
 
-        self.actionsCtx = TitleBar.contexts[context]()
+        (module, name) = TitleBar.contexts[context]
+        self.actionsCtx = getattr(import_module(module), name)()
         self.add_widget(self.actionsCtx, 2)
 
 
@@ -122,17 +129,13 @@ class Main(BoxLayout):
     """
 
     titleBar = ObjectProperty()
-    handlers = {
-        Mode.REGISTERING: handlerstree.registering,
-        Mode.LOBBY: handlerstree.lobby,
-        Mode.SESSION: handlerstree.session
-    }
 
     def __init__(self, **kwargs):
         self.register_event_type("on_move")
         super().__init__(**kwargs)
 
         self.content = None
+        self.moveTrigger = Clock.create_trigger(self.applyMove)
         Clock.schedule_once(self.home)
 
     def on_touch_down(self, touch: MotionEvent):
@@ -143,7 +146,7 @@ class Main(BoxLayout):
 
         self.moving = True
         self.initPos = touch.pos
-        self.lastDiff = [0] * 2
+        self.lastDiff = None
 
         return True
 
@@ -154,18 +157,27 @@ class Main(BoxLayout):
         if touch.grab_current is not self:
             return super().on_touch_move(touch)
 
-        for i in range(2):
-            self.lastDiff[i] = touch.pos[i] - (self.initPos[i] - self.lastDiff[i])
-
-        self.initPos = touch.pos
-        moveWindow(*self.lastDiff)
+        # La position du touch est relative à la fenêtre telle qu'elle est placée au moment de l'event :
+        # seul le dernier déplacement reçu pendant la frame compte, les précédents n'ayant pas encore été appliqués
+        self.lastDiff = [touch.pos[i] - self.initPos[i] for i in range(2)]
+        self.moveTrigger()
 
         return True
 
+    def applyMove(self, _: float = None) -> None:
+        "Applique le déplacement de la fenêtre en attente, au plus une fois par frame."
+
+        if self.lastDiff is not None:
+            moveWindow(*self.lastDiff)
+            self.lastDiff = None
+
     def on_touch_up(self, touch: MotionEvent):
         if touch.grab_current is not self:
             return super().on_touch_move(touch)
 
+        self.moveTrigger.cancel()
+        self.applyMove()
+
         self.moving = False
         self.initPos = None
         self.lastDiff = None
@@ -174,7 +186,10 @@ class Main(BoxLayout):
         return True
 
     def home(self, _: EventDispatcher = None, error: Failure = None) -> None:
-        if error is None or type(error.value) == ConnectionDone:
+        if error is not None:
+            from twisted.internet.error import ConnectionDone  # Un échec n'est reçu qu'après une connexion, Twisted est alors déjà chargé
+
+        if error is None or error.check(ConnectionDone):
             Logger.info("Main : Back to Home.")
         else:
             Logger.error("Main : Back to Home : " + error.getErrorMessage())
@@ -192,6 +207,10 @@ class Main(BoxLayout):
 
         self.add_widget(self.content)
 
+        leakDetector = App.get_running_app().leakDetector
+        if leakDetector is not None:
+            leakDetector.checkpoint("Home", titleBar=self.titleBar.actionsCtx, window=Window)
+
     def ioError(self, reason: Failure) -> None:
         Logger.error("Main : " + reason.getErrorMessage())
         ErrorPopup(type(reason.value).__name__, reason.getErrorMessage()).open()
@@ -199,11 +218,32 @@ class Main(BoxLayout):
         self.connection = None
 
     def login(self, _: EventDispatcher, host: "tuple[str, int]", player: "tuple[int, str]") -> None:
+        # Le thread réseau installe le reactor par défaut de Twisted, il doit donc être démarré avant l'import de protocol
+        network = App.get_running_app().networkThread()
+
+        # L'import de protocol installe le reactor Twisted, il doit donc précéder celui de twisted.internet.reactor
+        from rboclient.network import handlerstree
+        from rboclient.network.protocol import Mode
+        from rboclient.network.protocol import RboConnectionInterface as RboCI
+        from twisted.internet import endpoints, reactor
+
+        handlers = {
+            Mode.REGISTERING: handlerstree.registering,
+            Mode.LOBBY: handlerstree.lobby,
+            Mode.SESSION: handlerstree.session
+        }
+
         server = endpoints.TCP4ClientEndpoint(reactor, *host)
-        self.connection = RboCI(*player, Main.handlers)
+        self.connection = RboCI(*player, handlers, host)
+        self.connection.bind(on_received=lambda _: App.get_running_app().powerSaver.wake())
 
-        connecting = server.connect(self.connection)
-        connecting.addCallbacks(self.registering, self.ioError)
+        if network is None:
+            connecting = server.connect(self.connection)
+            connecting.addCallbacks(self.registering, self.ioError)
+        else:
+            # La connexion est établie sur le thread réseau, son résultat étant traité sur le thread principal
+            network.call(lambda: server.connect(self.connection).addCallbacks(lambda connection: network.post(self.registering, connection),
+                                                                             lambda reason: network.post(self.ioError, reason)))
 
     def registering(self, _: rboclient.network.protocol.RboConnection) -> None:
         class RegistrationError:
@@ -222,6 +262,8 @@ class Main(BoxLayout):
                              on_reserved_id=RegistrationError("L'identifiant \"{}\" est réservé pour un usage spécifique par le serveur.".format(self.connection.id)))
 
     def game(self, _: EventDispatcher, members: "dict[int, tuple[str, bool]]") -> None:
+        from rboclient.gui.game import Game
+
         game = Game(self.connection, members)
         game.bind(on_close=self.home)
         self.connection = None
@@ -270,19 +312,117 @@ class ClientApp(App):
 
         Window.bind(on_key_down=self.keyboardPressed)
 
+        try:
+            fps = [int(self.rbocfg.getdefault("graphics", option, default)) for (option, default) in [("idlefps", 10), ("activefps", 60)]]
+        except ValueError:
+            fps = [10, 60]
+            Logger.warn("ClientApp : Invalid FPS values, default idle and active FPS applied.")
+
+        self.powerSaver = PowerSaver(*fps)
         self.runningTasks = []
+        self.overlay = None
+        self.profiling = None
+        self.tracing = None
+
+        self.sampler = None
+        if toBool(self.rbocfg.getdefault("profiling", "sampling", "True")):
+            try:
+                rate = float(self.rbocfg.getdefault("profiling", "samplingrate", 100))
+            except ValueError:
+                rate = 100
+                Logger.warn("ClientApp : Invalid sampling rate, default rate applied.")
+
+            self.sampler = StackSampler(rate, threads=[worker.NetworkThread.name])
+
+            try:
+                self.keptSamples = int(self.rbocfg.getdefault("profiling", "keepsamples", 10))
+            except ValueError:
+                self.keptSamples = 10
+                Logger.warn("ClientApp : Invalid number of kept samples, default number applied.")
+
+        self.network = None
+
+        # tracemalloc doit être démarré au plus tôt pour suivre les allocations des premières étapes
+        # Le module, qui dépend d'une classe privée de Kivy, n'est chargé que si la détection est activée
+        self.leakDetector = None
+        if toBool(self.rbocfg.getdefault("profiling", "leaks", "False")):
+            leaks = import_module("rboclient.gui.leaks")
+            if leaks.supported:
+                self.leakDetector = leaks.LeakDetector()
 
     def keyboardPressed(self, _: EventDispatcher, key: str, *__) -> bool:
         if Keyboard.keycodes["f11"] == key:
             toggleFullscreen()
         elif Keyboard.keycodes["f1"] == key:
+            self.toggleOverlay()
+            return True
+        elif Keyboard.keycodes["f2"] == key:
+            self.profileCapture().toggle()
+            return True
+        elif Keyboard.keycodes["f3"] == key:
+            self.writeSamples()
+            return True
+        elif Keyboard.keycodes["f4"] == key:
+            self.frameTracing().toggle()
             return True
 
         return False
 
+    def toggleOverlay(self) -> None:
+        if self.overlay is None:
+            self.overlay = import_module("rboclient.gui.overlay").PerfOverlay()
+
+        self.overlay.toggle()
+
+    def profileCapture(self):
+        if self.profiling is None:
+            try:
+                top = int(self.rbocfg.getdefault("profiling", "top", 20))
+            except ValueError:
+                top = 20
+                Logger.warn("ClientApp : Invalid profiling summary size, default size applied.")
+
+            self.profiling = import_module("rboclient.gui.profiling").ProfileCapture(self.rbocfg.getdefault("profiling", "directory", "profiles"), top)
+
+        return self.profiling
+
+    def frameTracing(self):
+        if self.tracing is None:
+            self.tracing = import_module("rboclient.gui.profiling").FrameTracing(self.rbocfg.getdefault("profiling", "directory", "profiles"))
+
+        return self.tracing
+
+    def networkThread(self) -> worker.NetworkThread:
+        "Démarre le thread réseau à la première connexion si [network] thread est activé, retourne None sinon."
+
+        if self.network is None and toBool(self.rbocfg.getdefault("network", "thread", "False")):
+            try:
+                capacity = int(self.rbocfg.getdefault("network", "queue", 4096))
+            except ValueError:
+                capacity = 4096
+                Logger.warn("ClientApp : Invalid network queue capacity, default capacity applied.")
+
+            self.network = worker.start(capacity)
+
+        return self.network
+
+    def writeSamples(self) -> None:
+        if self.sampler is None:
+            Logger.warn("ClientApp : Stack sampling is disabled")
+            return
+
+        directory = self.rbocfg.getdefault("profiling", "directory", "profiles")
+        path = os.path.join(directory, strftime("%Y%m%d-%H%M%S") + "-samples.folded")
+        self.sampler.write(path)
+        Logger.info("ClientApp : {} stack samples written to {}".format(self.sampler.samples, path))
+
+        # Chaque fermeture du client écrit ses échantillons : seuls les keepsamples derniers fichiers sont gardés
+        for removed in prune(directory, "-samples.folded", self.keptSamples):
+            Logger.debug("ClientApp : Old stack samples {} removed".format(removed))
+
     def build(self):
-        for kv in ["home", "lobby", "session", "config", "cfgsections", "widgets"]:
-            Builder.load_file(kv + ".kv")
+        # Les autres règles sont chargées à la construction du premier Lobby, de la première Session ou de la première ConfigPopup
+        rules.require("widgets", "home")
 
         return Builder.load_file("app.kv")
 
@@ -290,12 +430,43 @@ class ClientApp(App):
         super().on_start()
 
         self.titleBar = self.root.titleBar
+        self.powerSaver.start()
+
+        if toBool(self.rbocfg.getdefault("graphics", "warmup", "True")):
+            Clock.schedule_once(rules.warmUp, 1)  # Laisse l'écran d'accueil s'afficher avant
+
+        if toBool(self.rbocfg.getdefault("profiling", "enabled", "False")):
+            self.profileCapture().start()
+
+        if toBool(self.rbocfg.getdefault("profiling", "tracing", "False")):
+            self.frameTracing().start()
+
+        if self.sampler is not None:
+            self.sampler.start()
+
+    def on_stop(self):
+        super().on_stop()
+
+        self.powerSaver.stop()
+        if self.profiling is not None:
+            self.profiling.stop()
+
+        if self.tracing is not None:
+            self.tracing.stop()
+
+        if self.sampler is not None:
+            self.sampler.stop()
+            self.writeSamples()
+
+        if self.network is not None:
+            self.network.stop()
 
     def runTask(self, name: str) -> None:
         if name in self.runningTasks:
             raise TaskAlreadyRunning(name)
 
         self.runningTasks.append(name)
+        self.powerSaver.wake()  # Une tâche (animation...) a besoin de la fréquence normale tant qu'elle tourne
 
     def isRunning(self, name: str) -> bool:
         return name in self.runningTasks
@@ -1,8 +1,11 @@
 from kivy.app import App
+from kivy.core.window import Window
 from kivy.event import EventDispatcher
 from kivy.logger import Logger
 from kivy.uix.floatlayout import FloatLayout
 from rboclient.gui import app
+from rboclient.gui.scheduler import FrameScheduler, Priority, Scheduled
+from rboclient.gui.widgets import renderCache
 from rboclient.network.protocol import RboConnectionInterface as RboCI
 from twisted.python.failure import Failure
 
@@ -12,23 +15,48 @@ class Step:
 
     La méthode init() permet d'initialiser l'interface RboCI et le contexte TitleBar sans forcer une signature pour l'héritage multiple.\n
     Elle permet également de donner un nouveau titre à l'application.\n
-    listen() est appelée par la classe fille pour stocker et binder tous les handlers fournis.\n
-    stopListen() est appelée au niveau de l'interface afin d'unbinder tous les handlers gardés en mémoire avec listen().
+    listen() est appelée par la classe fille pour stocker et binder tous les handlers fournis.
+    Ceux-ci ne sont pas exécutés directement mais passent par le FrameScheduler de l'étape (scheduler),
+    avec la priorité associée à leur event dans priorities (Priority.STATS par défaut)
+    et l'ordre entre priorités donné par dependencies (FrameScheduler.ordered par défaut).\n
+    stopListen() est appelée au niveau de l'interface afin d'unbinder tous les handlers gardés en mémoire avec listen().\n
+    resume() permet à une étape réutilisée de reprendre son titre et de binder à nouveau ses handlers.
     """
 
+    priorities = {}
+    dependencies = FrameScheduler.ordered
+
     def init(self, title: str, rboCI: RboCI, titleBarCtx: "app.TitleBarCtx") -> None:
         self.rboCI = rboCI
         self.titleBarCtx = titleBarCtx
+        self.stepTitle = title
         app.setTitle(title)
 
+        try:
+            budget = float(App.get_running_app().rbocfg.getdefault("graphics", "framebudget", 1))
+        except ValueError:
+            budget = 1
+            Logger.warn("Step : Invalid frame budget value, default budget applied.")
+
+        self.scheduler = FrameScheduler(budget, self.dependencies)
         self.handlers = {}
+        self.listening = False
 
     def listen(self, **kwargs):
-        self.rboCI.bind(**kwargs)
-        self.handlers = kwargs
+        self.handlers = dict((event, Scheduled(self.scheduler, self.priorities.get(event, Priority.STATS), handler)) for (event, handler) in kwargs.items())
+        self.rboCI.bind(**self.handlers)
+        self.listening = True
 
     def stopListen(self):
         self.rboCI.unbind(**self.handlers)
+        self.listening = False
+
+    def resume(self) -> None:
+        app.setTitle(self.stepTitle)
+
+        if not self.listening:
+            self.rboCI.bind(**self.handlers)
+            self.listening = True
 
 
 # Pour éviter les problèmes de partals imports
@@ -39,7 +67,8 @@ from rboclient.gui.session import Session  # noqa E402
 class Game(FloatLayout):
     """Partie (session et lobby) de Rbo.
 
-    Ce widget contient une étape (Step) qui peut changer de la phase lobby à la phase session.\n
+    Ce widget contient une étape (Step) qui peut changer de la phase lobby à la phase session.
+    Le Lobby et la Session ne sont construits qu'une fois, puis restaurés sur place à chaque changement d'étape.\n
     Il émet on_close avec une possible erreur à la fermeture d'une connexion, propre ou non.
     """
 
@@ -56,7 +85,10 @@ class Game(FloatLayout):
 
         self.errorMessage = None
         self.step = None
-        self.switch(Lobby(self.rboCI, members))
+        self.sessionStep = None
+
+        self.lobbyStep = Lobby(self.rboCI, members)
+        self.switch(self.lobbyStep)
 
     def listenStepSwitch(self) -> None:
         class PreparationErrorHandler:
@@ -77,12 +109,28 @@ class Game(FloatLayout):
                         on_result_no_player_alive=PreparationErrorHandler("Aucun des joueurs présents n'est encore en vie dans le checkpoint chargé"))
 
     def session(self, name: str) -> None:
+        self.step.scheduler.flush()  # L'état du lobby doit être à jour avant d'être lu
+
         # step.members est le widget Members possédant le membre dict members
         players = dict((id, member.name) for (id, member) in self.step.members.members.items())
-        self.switch(Session(self.rboCI.id, self.step.master, name, self.rboCI, players))
+
+        if self.sessionStep is None:
+            self.sessionStep = Session(self.rboCI.id, self.step.master, name, self.rboCI, players)
+        else:
+            self.sessionStep.restore(self.rboCI.id, self.step.master, name, players)
+
+        self.switch(self.sessionStep)
 
     def lobby(self, preparing: bool = False, error: str = None) -> None:
-        self.switch(Lobby(self.rboCI, dict((id, (name, False)) for (id, name) in self.step.members.items()), selfIncluded=True, preparing=preparing, errorMessage=error))
+        self.step.scheduler.flush()
+
+        # Si la partie est déjà dans le lobby (erreur de préparation), ses membres sont conservés
+        members = None
+        if self.step is self.sessionStep:
+            members = dict((id, (name, False)) for (id, name) in self.step.members.items())
+
+        self.lobbyStep.restore(members, selfIncluded=True, preparing=preparing, errorMessage=error)
+        self.switch(self.lobbyStep)
 
     def sessionCrash(self, _: EventDispatcher):
         self.lobby(error="La session a crashé")
@@ -104,6 +152,10 @@ class Game(FloatLayout):
         self.step.logs.log(logMessage)
 
     def close(self, _: EventDispatcher, error: Failure):
+        self.step.scheduler.stop()
+        if self.sessionStep is not None:
+            self.sessionStep.close()
+
         self.dispatch("on_close", error=error)
 
         client = App.get_running_app()
@@ -111,9 +163,11 @@ class Game(FloatLayout):
 
     def on_close(self, error: Failure):
         Logger.info("Game : Closed : " + error.getErrorMessage())
+        Logger.debug("Game : Render cache hit rate : {:.1%} ({} hits, {} misses)".format(renderCache.hitRate(), renderCache.hits, renderCache.misses))
 
     def switch(self, step: Step):
-        App.get_running_app().titleBar.switch(step.titleBarCtx)
+        client = App.get_running_app()
+        client.titleBar.switch(step.titleBarCtx)
 
         if type(self.step) == Session and self.step.hasOpenRequestPopup():
             self.step.closeRequestPopup()
@@ -123,4 +177,8 @@ class Game(FloatLayout):
             self.step.stopListen()
 
         self.step = step
+        self.step.resume()
         self.add_widget(self.step)
+
+        if client.leakDetector is not None:
+            client.leakDetector.checkpoint(type(step).__name__, rboCI=self.rboCI, titleBar=client.titleBar.actionsCtx, window=Window)
@@ -4,7 +4,7 @@ from kivy.event import EventDispatcher
 from kivy.logger import Logger
 from kivy.properties import ObjectProperty
 from kivy.uix.anchorlayout import AnchorLayout
-from rboclient.gui import config
+from rboclient.gui import config, rules
 from rboclient.gui.cfgsections import Fields, Graphics
 from rboclient.gui.config import ConfigPopup
 from rboclient.misc import toBool
@@ -16,6 +16,8 @@ cfgSections = [
 
 
 def showConfig(_: EventDispatcher):
+    rules.require("config", "cfgsections")
+
     sections = [config.Section(name, title, input(), input.paths) for (name, title, input) in cfgSections]
     ConfigPopup(sections).open()
 
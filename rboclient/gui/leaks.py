@@ -0,0 +1,108 @@
+import gc
+import tracemalloc
+from collections import Counter
+
+from kivy.event import EventDispatcher
+from kivy.logger import Logger
+from kivy.uix.widget import Widget
+
+# Classe privée de Kivy, seul moyen de reconnaître ses listes d'observers d'events : sans elle, la détection des fuites est désactivée
+try:
+    from kivy._event import EventObservers
+except ImportError:
+    EventObservers = None
+    Logger.warn("LeakDetector : kivy._event.EventObservers not found, leak detection disabled.")
+
+supported = EventObservers is not None
+
+
+def widgetsByType() -> Counter:
+    "Compte les widgets encore en vie par type, après un passage du ramasse-miettes."
+
+    gc.collect()
+
+    # isinstance() est évité car il considère aussi les weakproxy vers des widgets comme des widgets
+    return Counter(type(obj).__qualname__ for obj in gc.get_objects() if issubclass(type(obj), Widget))
+
+
+def observers(dispatcher: EventDispatcher) -> Counter:
+    """Compte les callbacks bindés sur chaque event et chaque propriété d'un EventDispatcher.
+
+    Kivy ne donnant pas accès à ses listes d'observers d'events, elles sont retrouvées parmi les objets référencés par le dispatcher.
+    """
+
+    counts = Counter()
+    for referent in gc.get_referents(dispatcher):
+        if isinstance(referent, dict) and any(isinstance(value, EventObservers) for value in referent.values()):
+            counts.update(dict((event, len(list(callbacks))) for (event, callbacks) in referent.items()))
+
+    for name in dispatcher.properties():
+        counts[name] = len(dispatcher.get_property_observers(name))
+
+    return counts
+
+
+def growth(before: Counter, after: Counter) -> "list[tuple[str, int, int]]":
+    "Retourne les clés dont le compte a augmenté, avec leurs comptes avant et après, de la plus forte hausse à la plus faible."
+
+    grown = [(key, before[key], after[key]) for key in after if after[key] > before[key]]
+    return sorted(grown, key=lambda item: item[2] - item[1], reverse=True)
+
+
+class Snapshot:
+    "Relevé des widgets en vie, des observers de chaque dispatcher suivi et des allocations à un point de contrôle."
+
+    def __init__(self, dispatchers: "dict[str, EventDispatcher]"):
+        self.widgets = widgetsByType()
+        self.observers = Counter()
+        for (name, dispatcher) in dispatchers.items():
+            if dispatcher is not None:
+                self.observers.update(dict((name + "." + key, count) for (key, count) in observers(dispatcher).items()))
+
+        self.allocations = tracemalloc.take_snapshot().filter_traces([tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)])
+
+
+class LeakDetector:
+    """Mode de diagnostic des fuites de widgets et de handlers au fil des parties.
+
+    À chaque point de contrôle (changement d'étape dans Game.switch, retour à l'accueil dans Main.home), les widgets en vie par type,
+    le nombre de callbacks bindés sur chaque event des dispatchers donnés (RboCI, contexte de la barre de titre...) et les allocations
+    suivies par tracemalloc sont relevés.\n
+    Les relevés sont comparés au précédent relevé du même point de contrôle : l'interface devant y être revenue dans le même état,
+    toute hausse est loggée comme une fuite possible, avec les top lignes dont les allocations ont le plus augmenté.
+    """
+
+    def __init__(self, top: int = 10, frames: int = 5):
+        self.top = top
+        self.snapshots = {}
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+
+    def checkpoint(self, name: str, **dispatchers: EventDispatcher) -> None:
+        snapshot = Snapshot(dispatchers)
+        previous = self.snapshots.get(name)
+        self.snapshots[name] = snapshot
+
+        if previous is None:
+            Logger.info("LeakDetector : {} : first snapshot, {} widgets alive".format(name, sum(snapshot.widgets.values())))
+            return
+
+        self.report(name, previous, snapshot)
+
+    def report(self, name: str, previous: Snapshot, current: Snapshot) -> None:
+        widgets = growth(previous.widgets, current.widgets)
+        listeners = growth(previous.observers, current.observers)
+
+        if len(widgets) == 0 and len(listeners) == 0:
+            Logger.info("LeakDetector : {} : no widget or observer growth since last snapshot".format(name))
+
+        for (kind, before, after) in widgets:
+            Logger.warn("LeakDetector : {} : {} widgets {} -> {}".format(name, kind, before, after))
+
+        for (event, before, after) in listeners:
+            Logger.warn("LeakDetector : {} : {} observers {} -> {}".format(name, event, before, after))
+
+        allocations = [stat for stat in current.allocations.compare_to(previous.allocations, "lineno") if stat.size_diff > 0]
+        for stat in allocations[:self.top]:
+            Logger.info("LeakDetector : {} : {}".format(name, stat))
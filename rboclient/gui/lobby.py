@@ -7,11 +7,11 @@ from kivy.event import EventDispatcher
 from kivy.properties import BooleanProperty, ColorProperty, NumericProperty, ObjectProperty, StringProperty
 from kivy.uix.anchorlayout import AnchorLayout
 from kivy.uix.boxlayout import BoxLayout
-from kivy.uix.label import Label
 from kivy.uix.popup import Popup
-from rboclient.gui import app
+from rboclient.gui import app, rules
 from rboclient.gui.game import Step
-from rboclient.gui.widgets import ErrorPopup, GameCtxActions, ScrollableStack, TextInputPopup, YesNoPopup
+from rboclient.gui.scheduler import Priority
+from rboclient.gui.widgets import CachedLabel, ErrorPopup, GameCtxActions, ScrollableStack, TextInputPopup, YesNoPopup
 from rboclient.network.protocol import RboConnectionInterface as RboCI
 
 
@@ -40,7 +40,7 @@ class LobbyCtxActions(GameCtxActions):
     open = BooleanProperty(True)
 
 
-class LogMessage(Label):
+class LogMessage(CachedLabel):
     "Message dans l'historique."
 
     background = ColorProperty([0, 0, 0])
@@ -63,6 +63,10 @@ class Logs(ScrollableStack):
         self.content.add_widget(LogMessage(msg, Logs.backgroundEven if self.count % 2 == 0 else Logs.backgroundOdd))
         self.count += 1
 
+    def clear(self) -> None:
+        self.content.clear_widgets()
+        self.count = 0
+
 
 class MemberStatus(Enum):
     WAITING = auto(),
@@ -145,6 +149,13 @@ class Members(ScrollableStack):
         self.members[id] = Member(id, name, me)
         self.content.add_widget(self.members[id])
 
+    def clear(self) -> None:
+        self.content.clear_widgets()
+        self.members = {}
+
+        self.master = nan
+        self.previousMaster = nan
+
     def unregistered(self, id: int) -> None:
         self.checkMember(id)
 
@@ -187,7 +198,8 @@ class Lobby(Step, BoxLayout):
     """Lobby d'une partie.
 
     Gère tous les évènements d'un lobby (liste de membres, lancement de session, logs...).\n
-    Actualise l'affichage et demande la saisie d'une configuration au membre maître si nécessaire.
+    Actualise l'affichage et demande la saisie d'une configuration au membre maître si nécessaire.\n
+    Un même Lobby peut être réutilisé entre deux sessions, restore() le remet alors dans l'état d'un Lobby nouvellement construit.
     """
 
     logs = ObjectProperty()
@@ -196,33 +208,19 @@ class Lobby(Step, BoxLayout):
 
     open = BooleanProperty(True)
 
+    priorities = {
+        "on_ask_checkpoint": Priority.INPUT,
+        "on_ask_yes_no": Priority.INPUT
+    }
+
     def __init__(self, rboCI: RboCI, members: "dict[int, tuple[str, bool]]", selfIncluded: bool = False, preparing: bool = False, errorMessage: str = None, **kwargs):
+        rules.require("lobby")
         super().__init__(**kwargs)
         self.init("Lobby", rboCI, app.TitleBarCtx.LOBBY)
 
         # Doit être bind avant d'ajouter les joueurs sinon le nouveau membre master ne sera pas pris en compte
         self.members.bind(master=self.setter("master"))
 
-        # Si le joueur ne vient pas de s'inscrire, alors il sera déjà parmis les membres du serveur
-        if not selfIncluded:
-            self.members.registered(self.rboCI.id, self.rboCI.name, me=True)
-
-        for (id, member) in members.items():
-            self.members.registered(id, member[0], me=(id == self.rboCI.id))
-            if member[1]:
-                self.members.toggleReady()
-
-        if preparing:
-            self.members.prepareSession()
-
-        if errorMessage is None:
-            self.errorMessage = None
-        else:
-            self.errorMessage = ErrorPopup("Erreur lors de la session", errorMessage)
-
-            self.errorMessage.bind(on_dismiss=self.errorMessageDismissed)
-            self.errorMessage.open()
-
         self.listen(on_member_registered=self.memberRegistered,
                     on_member_ready=self.readyMember,
                     on_member_disconnected=self.memberUnregistered,
@@ -240,6 +238,35 @@ class Lobby(Step, BoxLayout):
                     on_master_disconnected=self.masterDisconnected,
                     on_lobby_open=self.opened)
 
+        self.errorMessage = None
+        self.openSetter = None
+        self.restore(members, selfIncluded, preparing, errorMessage)
+
+    def restore(self, members: "dict[int, tuple[str, bool]]", selfIncluded: bool = False, preparing: bool = False, errorMessage: str = None) -> None:
+        "Réinitialise le Lobby avec de nouveaux membres, ou conserve les membres actuels si members vaut None."
+
+        if members is not None:
+            self.logs.clear()
+            self.members.clear()
+
+            # Si le joueur ne vient pas de s'inscrire, alors il sera déjà parmis les membres du serveur
+            if not selfIncluded:
+                self.members.registered(self.rboCI.id, self.rboCI.name, me=True)
+
+            for (id, member) in members.items():
+                self.members.registered(id, member[0], me=(id == self.rboCI.id))
+                if member[1]:
+                    self.members.toggleReady(id)
+
+        if preparing:
+            self.members.prepareSession()
+
+        if errorMessage is not None:
+            self.errorMessage = ErrorPopup("Erreur lors de la session", errorMessage)
+
+            self.errorMessage.bind(on_dismiss=self.errorMessageDismissed)
+            self.errorMessage.open()
+
         Clock.schedule_once(lambda _: self.bindTitleBar(preparing))
 
     def bindTitleBar(self, preparing: bool):
@@ -249,8 +276,15 @@ class Lobby(Step, BoxLayout):
         if type(actionsCtx) != LobbyCtxActions:
             return  # En cas d'erreur, il est possible que l'on ait déjà quitté le lobby
 
-        self.bind(open=actionsCtx.setter("open"))
+        # Le contexte de la barre de titre précédent ne doit plus suivre l'état du Lobby
+        if self.openSetter is not None:
+            self.unbind(open=self.openSetter)
+
+        self.openSetter = actionsCtx.setter("open")
+        self.bind(open=self.openSetter)
+
         self.open = not preparing
+        actionsCtx.open = self.open  # Si open n'a pas changé, le nouveau contexte n'en a pas été notifié
 
     def errorMessageDismissed(self, _: EventDispatcher):
         self.errorMessage = None
@@ -0,0 +1,142 @@
+import os
+import sys
+from time import perf_counter
+
+from kivy.app import App
+from kivy.clock import Clock
+from kivy.core.window import Window
+from kivy.uix.label import Label
+from rboclient.gui.scheduler import FrameScheduler, LatencyStats, handlerName
+
+
+def rss() -> int:
+    "Retourne la mémoire résidente (RSS) du processus en octets, ou None si elle ne peut pas être lue (hors Linux)."
+
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def widgetsCount(widget) -> int:
+    return 1 + sum(widgetsCount(child) for child in widget.children)
+
+
+class DecodingStats:
+    "Compteur des events décodés par RboConnection, installé dans RboConnection.stats tant que l'overlay est affiché."
+
+    def __init__(self):
+        self.decoded = 0
+
+
+class HandlerTimes:
+    "Relève du handler le plus lent exécuté par un FrameScheduler, installé dans FrameScheduler.profile tant que l'overlay est affiché."
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.slowest = (None, 0)
+
+    def record(self, handler, duration: float) -> None:
+        if duration > self.slowest[1]:
+            self.slowest = (handler, duration)
+
+
+class PerfOverlay(Label):
+    """Overlay de performances affiché dans un coin de la fenêtre, basculé avec F1.
+
+    Il affiche les FPS et les percentiles du temps de frame, le nombre d'events décodés par seconde par RboConnection,
+    le nombre d'unités en attente dans le FrameScheduler de l'étape en cours, le nombre de widgets, la RSS du processus
+    et le handler le plus lent de la dernière seconde.\n
+    Les relevés (temps de frame, compteur d'events et durée des handlers) ne sont installés qu'à l'affichage de l'overlay
+    et retirés lorsqu'il est masqué : ils ne coûtent rien tant qu'il ne l'est pas.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        self.shown = False
+        self.frames = LatencyStats(recent=240)
+        self.decoding = DecodingStats()
+        self.handlers = HandlerTimes()
+
+        self.frameEvent = None
+        self.sampleEvent = None
+
+    def toggle(self) -> None:
+        if self.shown:
+            self.hide()
+        else:
+            self.show()
+
+    def show(self) -> None:
+        self.shown = True
+
+        self.frames = LatencyStats(recent=240)
+        self.frameCount = 0
+        self.lastSample = perf_counter()
+        self.lastDecoded = self.decoding.decoded
+
+        self.handlers.reset()
+        FrameScheduler.profile = self.handlers
+        self.installDecodingStats()
+
+        self.frameEvent = Clock.schedule_interval(self.frame, 0)
+        self.sampleEvent = Clock.schedule_interval(self.sample, 1)
+
+        Window.add_widget(self)
+        self.sample()
+
+    def hide(self) -> None:
+        self.shown = False
+
+        self.frameEvent.cancel()
+        self.sampleEvent.cancel()
+
+        FrameScheduler.profile = None
+        protocol = sys.modules.get("rboclient.network.protocol")
+        if protocol is not None:
+            protocol.RboConnection.stats = None
+
+        Window.remove_widget(self)
+
+    def installDecodingStats(self) -> None:
+        # Le protocole n'est importé qu'à la connexion : le compteur est installé dès qu'il l'est
+        protocol = sys.modules.get("rboclient.network.protocol")
+        if protocol is not None:
+            protocol.RboConnection.stats = self.decoding
+
+    def frame(self, dt: float) -> None:
+        self.frames.record(dt)
+        self.frameCount += 1
+
+    def backlog(self) -> int:
+        step = getattr(App.get_running_app().root.content, "step", None)
+        return step.scheduler.pending() if step is not None else 0
+
+    def sample(self, _: float = None) -> None:
+        self.installDecodingStats()
+
+        now = perf_counter()
+        elapsed = max(now - self.lastSample, 1e-6)
+        (slowest, duration) = self.handlers.slowest
+        memory = rss()
+
+        lines = [
+            "FPS : {:.1f} (frame p50 {:.1f} ms, p95 {:.1f} ms, p99 {:.1f} ms)".format(
+                self.frameCount / elapsed, *(self.frames.percentile(p) * 1e3 for p in [50, 95, 99])),
+            "Events décodés : {:.0f}/s".format((self.decoding.decoded - self.lastDecoded) / elapsed),
+            "Mises à jour en attente : {}".format(self.backlog()),
+            "Widgets : {}".format(widgetsCount(Window)),
+            "RSS : {}".format("{:.1f} Mo".format(memory / 2 ** 20) if memory is not None else "inconnue"),
+            "Handler le plus lent : {}".format("{} ({:.2f} ms)".format(handlerName(slowest), duration * 1e3) if slowest is not None else "aucun")
+        ]
+
+        self.text = "\n".join(lines)
+
+        self.frameCount = 0
+        self.lastSample = now
+        self.lastDecoded = self.decoding.decoded
+        self.handlers.reset()
@@ -0,0 +1,72 @@
+from kivy.app import App
+from kivy.clock import Clock
+from kivy.core.window import Window
+from kivy.logger import Logger
+
+
+def setMaxFps(fps: int) -> None:
+    "Modifie la fréquence maximale de la boucle principale de Kivy, prise en compte dès la prochaine frame."
+
+    # Kivy n'offre aucun moyen public de changer la limite de FPS une fois la boucle lancée : elle n'est lue que dans Clock._max_fps
+    Clock._max_fps = float(fps)
+
+
+class PowerSaver:
+    """Régule la fréquence de la boucle principale selon l'activité de l'application.
+
+    Tant qu'aucune entrée utilisateur, aucune donnée réseau et aucune tâche de ClientApp (animation de dés...) n'est en cours,
+    la boucle tourne à idleFps.\n
+    wake() ramène immédiatement la boucle à activeFps, jusqu'à ce que idleDelay secondes se soient écoulées sans nouvelle activité.\n
+    Si la version de Kivy utilisée ne permet pas de changer la limite de FPS (voir setMaxFps()), start() désactive la régulation.
+    """
+
+    def __init__(self, idleFps: int, activeFps: int, idleDelay: float = 2):
+        self.idleFps = idleFps
+        self.activeFps = activeFps
+        self.idling = False
+        self.enabled = True
+
+        self.sleepTrigger = Clock.create_trigger(self.sleep, idleDelay)
+
+    def start(self) -> None:
+        if not hasattr(Clock, "_max_fps"):
+            Logger.warn("PowerSaver : Kivy's Clock has no _max_fps attribute, frame rate throttling disabled.")
+            self.enabled = False
+            return
+
+        Window.bind(on_motion=self.wake, on_key_down=self.wake, on_resize=self.wake, mouse_pos=self.wake)
+        self.wake()
+
+    def stop(self) -> None:
+        if not self.enabled:
+            return
+
+        Window.unbind(on_motion=self.wake, on_key_down=self.wake, on_resize=self.wake, mouse_pos=self.wake)
+
+        self.sleepTrigger.cancel()
+        self.idling = False
+        setMaxFps(self.activeFps)
+
+    def wake(self, *_) -> None:
+        if not self.enabled:
+            return
+
+        if self.idling:
+            Logger.debug("PowerSaver : Waking up at {} FPS".format(self.activeFps))
+
+            self.idling = False
+            setMaxFps(self.activeFps)
+
+        # Le délai avant la mise en veille repart de zéro à chaque activité
+        self.sleepTrigger.cancel()
+        self.sleepTrigger()
+
+    def sleep(self, _: float):
+        if len(App.get_running_app().runningTasks) != 0:
+            self.sleepTrigger()  # Une tâche est en cours, on réessaiera plus tard
+            return
+
+        Logger.debug("PowerSaver : Idle, going down to {} FPS".format(self.idleFps))
+
+        self.idling = True
+        setMaxFps(self.idleFps)
@@ -0,0 +1,134 @@
+import cProfile
+import io
+import os
+import pstats
+from time import perf_counter, strftime
+
+from kivy.app import App
+from kivy.core.window import Window
+from kivy.logger import Logger
+from rboclient import tracing
+
+
+def currentStep() -> str:
+    "Retourne le nom de l'étape en cours (Lobby ou Session, voir Game.step), ou Home hors d'une partie."
+
+    step = getattr(App.get_running_app().root.content, "step", None)
+    return type(step).__name__ if step is not None else "Home"
+
+
+class ProfileCapture:
+    """Capture cProfile de l'application, démarrée et arrêtée à la demande (F2) ou au lancement selon la configuration.
+
+    À l'arrêt, la capture est enregistrée dans directory sous le nom <date>-<étape>.pstats, l'étape étant celle en cours au démarrage
+    de la capture (suivie de celle en cours à l'arrêt si elle a changé). Les top fonctions les plus coûteuses (temps cumulé) sont loggées.
+    """
+
+    def __init__(self, directory: str, top: int = 20):
+        self.directory = directory
+        self.top = top
+
+        self.profile = None
+        self.tag = None
+
+    def running(self) -> bool:
+        return self.profile is not None
+
+    def toggle(self) -> None:
+        if self.running():
+            self.stop()
+        else:
+            self.start()
+
+    def start(self) -> None:
+        profile = cProfile.Profile()
+
+        try:
+            profile.enable()
+        except ValueError as error:  # Un autre profiler est déjà actif
+            Logger.warn("Profiling : Unable to start capture : " + str(error))
+            return
+
+        self.profile = profile
+        self.tag = currentStep()
+        self.begin = strftime("%Y%m%d-%H%M%S")
+
+        Logger.info("Profiling : Capture started during " + self.tag)
+
+    def stop(self) -> None:
+        if not self.running():
+            return
+
+        self.profile.disable()
+
+        step = currentStep()
+        tag = self.tag if step == self.tag else "{}-{}".format(self.tag, step)
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, "{}-{}.pstats".format(self.begin, tag))
+        self.profile.dump_stats(path)
+
+        summary = io.StringIO()
+        pstats.Stats(self.profile, stream=summary).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top)
+        Logger.info("Profiling : Capture saved to {}\n{}".format(path, summary.getvalue()))
+
+        self.profile = None
+
+
+class FrameTracing:
+    """Tracing du pipeline d'une frame au format Trace Event, démarré et arrêté à la demande (F4) ou au lancement selon la configuration.
+
+    En plus des points de trace du protocole (réception, découpage, décodage et dispatch) et du FrameScheduler (handlers),
+    le rendu de chaque frame (de on_draw à on_flip) et chaque frame complète (entre deux on_flip) sont tracés.\n
+    À l'arrêt, la trace est enregistrée dans directory sous le nom <date>-trace.json.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.drawBegin = None
+        self.lastFlip = None
+
+    def running(self) -> bool:
+        return tracing.tracer is not None
+
+    def toggle(self) -> None:
+        if self.running():
+            self.stop()
+        else:
+            self.start()
+
+    def start(self) -> None:
+        tracing.enable()
+        self.begin = strftime("%Y%m%d-%H%M%S")
+        self.drawBegin = None
+        self.lastFlip = None
+
+        Window.bind(on_draw=self.draw, on_flip=self.flip)
+        Logger.info("Profiling : Tracing started")
+
+    def stop(self) -> None:
+        if not self.running():
+            return
+
+        Window.unbind(on_draw=self.draw, on_flip=self.flip)
+        tracer = tracing.disable()
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, "{}-trace.json".format(self.begin))
+        tracer.write(path)
+
+        Logger.info("Profiling : {} trace events saved to {}".format(len(tracer.events), path))
+
+    def draw(self, _):
+        self.drawBegin = perf_counter()
+
+    def flip(self, _):
+        now = perf_counter()
+
+        if self.drawBegin is not None:
+            tracing.tracer.complete("render", "frame", self.drawBegin, now)
+        if self.lastFlip is not None:
+            tracing.tracer.complete("frame", "frame", self.lastFlip, now)
+
+        self.drawBegin = None
+        self.lastFlip = now
@@ -0,0 +1,32 @@
+from kivy.clock import Clock
+from kivy.lang.builder import Builder
+from kivy.logger import Logger
+
+files = ["widgets", "home", "lobby", "session", "config", "cfgsections"]
+loaded = set()
+
+
+def require(*names: str) -> None:
+    """Charge les fichiers .kv nommés qui ne l'ont pas encore été (app.kv est chargé à part par ClientApp.build()).
+
+    Doit être appelée avant la construction (super().__init__()) du premier widget ayant besoin de ces règles.
+    """
+
+    for name in names:
+        if name not in loaded:
+            Logger.debug("Rules : Loading {}.kv".format(name))
+
+            loaded.add(name)
+            Builder.load_file(name + ".kv")
+
+
+def warmUp(_: float = None) -> None:
+    "Charge un fichier .kv restant par frame, jusqu'à ce qu'ils le soient tous, pour ne pas bloquer l'affichage."
+
+    for name in files:
+        if name not in loaded:
+            require(name)
+            Clock.schedule_once(warmUp)
+            return
+
+    Logger.debug("Rules : All rules loaded")
@@ -0,0 +1,200 @@
+from collections import deque
+from enum import IntEnum
+from math import ceil
+from time import perf_counter
+
+from kivy.app import App
+from kivy.clock import Clock
+from rboclient import tracing
+
+
+def handlerName(handler) -> str:
+    return getattr(handler, "__qualname__", type(handler).__qualname__)
+
+
+class Priority(IntEnum):
+    "Priorités des mises à jour de l'interface, de la plus urgente à la moins urgente."
+
+    INPUT = 0,  # Requêtes et saisies attendues du joueur (popups, bouton Continuer)
+    STATE = 1,  # Mises à jour dont dépend le traitement des requêtes (mort ou déconnexion d'un joueur)
+    STATS = 2,  # Joueurs, stats et inventaires
+    TEXT = 3  # Messages de l'historique
+
+
+class LatencyStats:
+    "Relevé de latences (en secondes) : nombre, moyenne et maximum depuis la création, percentiles sur les dernières mesures."
+
+    def __init__(self, recent: int = 100):
+        self.count = 0
+        self.total = 0
+        self.max = 0
+        self.recent = deque(maxlen=recent)
+
+    def record(self, latency: float) -> None:
+        self.count += 1
+        self.total += latency
+        self.max = max(self.max, latency)
+        self.recent.append(latency)
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count != 0 else 0
+
+    def percentile(self, p: float) -> float:
+        if len(self.recent) == 0:
+            return 0
+
+        ordered = sorted(self.recent)
+        return ordered[max(0, ceil(p / 100 * len(ordered)) - 1)]
+
+    def __str__(self) -> str:
+        return "{:.1f} ms (mean {:.1f} ms, p95 {:.1f} ms, max {:.1f} ms, {} samples)".format(
+            self.recent[-1] * 1e3 if len(self.recent) != 0 else 0, self.mean() * 1e3, self.percentile(95) * 1e3, self.max * 1e3, self.count)
+
+
+class Unit:
+    "Unité de travail en attente : un handler et ses arguments, numérotée selon son ordre d'arrivée."
+
+    def __init__(self, seq: int, handler, args: tuple, kwargs: dict):
+        self.seq = seq
+        self.handler = handler
+        self.args = args
+        self.kwargs = kwargs
+        self.created = perf_counter()
+
+    def __call__(self):
+        self.handler(*self.args, **self.kwargs)
+
+
+class FrameScheduler:
+    """Découpe les mises à jour de l'interface en unités exécutées par priorité, dans un budget de temps par frame.
+
+    push() ajoute une unité dans la file de sa priorité. À chaque frame, les unités sont exécutées tant que le budget
+    (en millisecondes) n'est pas dépassé, en commençant par la file la plus prioritaire. Au moins une unité est exécutée par frame.\n
+    Une unité ne peut pas passer devant une unité arrivée plus tôt dans une des files dont sa priorité dépend (dependencies),
+    afin que les requêtes soient toujours traitées avec l'état des joueurs reçu avant elles.
+    Par défaut (ordered), une requête attend toutes les mises à jour arrivées avant elle.
+    Avec requestsFirst, les requêtes ne dépendent que des unités STATE : elles passent devant les mises à jour de stats et les messages sans effet sur elles.\n
+    flush() exécute immédiatement toutes les unités en attente, dans le même ordre.\n
+    Le temps passé par les unités dans chaque file est relevé dans waiting, current désigne l'unité en cours d'exécution.
+    """
+
+    ordered = {
+        Priority.INPUT: [Priority.STATE, Priority.STATS],
+        Priority.STATE: [Priority.STATS],  # Une mort arrivée après des stats ne doit pas les écraser avec un état plus ancien
+        Priority.STATS: [],
+        Priority.TEXT: []
+    }
+
+    requestsFirst = {
+        Priority.INPUT: [Priority.STATE],
+        Priority.STATE: [Priority.STATS],
+        Priority.STATS: [],
+        Priority.TEXT: []
+    }
+
+    task = "game_updates"
+    profile = None  # Relevé de la durée de chaque unité (voir overlay.HandlerTimes), None tant que l'overlay de performances est masqué
+
+    def __init__(self, budgetMs: float = 1, dependencies: "dict[Priority, list[Priority]]" = None):
+        self.budget = budgetMs / 1000
+        self.dependencies = dependencies if dependencies is not None else FrameScheduler.ordered
+        self.lanes = dict((priority, deque()) for priority in Priority)
+        self.seq = 0
+
+        self.processing = None
+        self.current = None
+        self.waiting = dict((priority, LatencyStats()) for priority in Priority)
+
+    def pending(self) -> int:
+        return sum(len(lane) for lane in self.lanes.values())
+
+    def push(self, priority: Priority, handler, *args, **kwargs) -> None:
+        self.lanes[priority].append(Unit(self.seq, handler, args, kwargs))
+        self.seq += 1
+
+        if self.processing is None:
+            self.processing = Clock.schedule_interval(self.process, 0)
+
+            # Tant que des unités sont en attente, l'application ne doit pas ralentir sa fréquence de rafraîchissement
+            client = App.get_running_app()
+            if not client.isRunning(FrameScheduler.task):
+                client.runTask(FrameScheduler.task)
+
+    def next(self) -> Unit:
+        for priority in Priority:
+            lane = self.lanes[priority]
+            if len(lane) == 0:
+                continue
+
+            head = lane[0]
+            if all(len(self.lanes[dependency]) == 0 or self.lanes[dependency][0].seq > head.seq for dependency in self.dependencies[priority]):
+                self.waiting[priority].record(perf_counter() - head.created)
+                return lane.popleft()
+
+        return None  # Le graphe des dépendances étant acyclique, cela n'arrive que si toutes les files sont vides
+
+    def process(self, _: float = None):
+        deadline = perf_counter() + self.budget
+
+        while True:
+            unit = self.next()
+            if unit is None:
+                self.stop()
+                return
+
+            self.run(unit)
+
+            if perf_counter() >= deadline:
+                return
+
+    def flush(self) -> None:
+        unit = self.next()
+        while unit is not None:
+            self.run(unit)
+            unit = self.next()
+
+        self.stop()
+
+    def run(self, unit: Unit) -> None:
+        self.current = unit
+
+        if FrameScheduler.profile is None and tracing.tracer is None:
+            unit()
+        else:
+            begin = perf_counter()
+            unit()
+            end = perf_counter()
+
+            if FrameScheduler.profile is not None:
+                FrameScheduler.profile.record(unit.handler, end - begin)
+            if tracing.tracer is not None:
+                tracing.tracer.complete(handlerName(unit.handler), "handler", begin, end, {"waited": (begin - unit.created) * 1e3})
+
+        self.current = None
+
+    def stop(self) -> None:
+        if self.processing is None:
+            return
+
+        self.processing.cancel()
+        self.processing = None
+
+        client = App.get_running_app()
+        if client.isRunning(FrameScheduler.task):
+            client.stopTask(FrameScheduler.task)
+
+
+class Scheduled:
+    """Handler d'event qui, au lieu d'être exécuté immédiatement, ajoute son exécution au FrameScheduler avec la priorité donnée.
+
+    La priorité peut aussi être une fonction recevant les arguments de l'event et retournant la priorité à utiliser.
+    """
+
+    def __init__(self, scheduler: FrameScheduler, priority, handler):
+        self.scheduler = scheduler
+        self.priority = priority
+        self.handler = handler
+
+    def __call__(self, *args, **kwargs):
+        priority = self.priority if type(self.priority) == Priority else self.priority(**kwargs)
+        self.scheduler.push(priority, self.handler, *args, **kwargs)
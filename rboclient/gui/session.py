@@ -1,8 +1,14 @@
+import hashlib
+import os
+import re
 from enum import Enum, auto
 from random import randrange
+from time import perf_counter
 
+from kivy.animation import Animation
 from kivy.app import App
 from kivy.clock import Clock
+from kivy.core.window import Window
 from kivy.event import EventDispatcher
 from kivy.input import MotionEvent
 from kivy.logger import Logger
@@ -10,11 +16,19 @@ from kivy.properties import BooleanProperty, ColorProperty, ListProperty, Numeri
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.floatlayout import FloatLayout
 from kivy.uix.label import Label
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
 from kivy.uix.stacklayout import StackLayout
-from rboclient.gui import app
+from kivy.uix.widget import Widget
+from rboclient.battle import Battle
+from rboclient.gui import app, rules
 from rboclient.gui.game import Step
-from rboclient.gui.widgets import DictionnaryView, ErrorPopup, InputPopup, GameCtxActions, NumericRboInput, RboOption, ScrollableStack, YesNoPopup
+from rboclient.gui.scheduler import FrameScheduler, LatencyStats, Priority
+from rboclient.gui.widgets import CachedLabel, DictionnaryView, ErrorPopup, InputPopup, GameCtxActions, NumericRboInput, PopupPool, RboInput, ScrollableStack, YesNoPopup
+from rboclient.inventory import ItemsIndex
+from rboclient.network.handlerstree import Attacker
 from rboclient.network.protocol import RboConnectionInterface as RboCI
+from rboclient.transcript import TranscriptFile, TranscriptIndex
 
 INTRODUCTION = 0
 ALL_PLAYERS = 255
@@ -27,7 +41,7 @@ class SessionCtxActions(GameCtxActions):
     actions = ["disconnect"]
 
 
-class GameLog(Label):
+class GameLog(CachedLabel):
     "Classe mère pour afficher un message de log."
 
     def __init__(self, msg: str, **kwargs):
@@ -50,36 +64,216 @@ class GameLogs(ScrollableStack):
     Ils peuvent être écrits en utilisant respectivement : print(), important(), title() et note().\n
     Les types de message côté client sont utilisables avec : playerDeath(), playerDisconnection().
     playerDeath() : les arguments sont l'ID, le nom du joueur et la raison de sa mort.
-    playerDisconnection() : les arguments sont l'ID et le nom du joueur.
+    playerDisconnection() : les arguments sont l'ID et le nom du joueur.\n
+    Les messages sont enregistrés dans le TranscriptFile de la partie ouvert avec open(), repris s'il existe déjà.
+    Seule une fenêtre d'au plus maxDisplayed messages est affichée : les pages précédentes ou suivantes sont lues sur le disque
+    lorsque le haut ou le bas de l'historique est atteint, et les messages à l'autre bout de la fenêtre sont retirés.\n
+    Chaque message est indexé à son ajout : search() retourne les numéros des messages contenant tous les mots d'une requête
+    et show() fait défiler l'historique jusqu'au message correspondant à un de ces numéros.
+    L'index est enregistré dans le fichier <path>.search à la fermeture : à la reprise, seuls les messages ajoutés depuis sont indexés.
     """
 
+    pageSize = 100
+    maxDisplayed = 300
+
+    styles = {
+        "print": (LogsMsg, {}),
+        "important": (LogsMsg, {"bold": True}),
+        "title": (LogsTitle, {}),
+        "note": (LogsMsg, {"italic": True}),
+        "alert": (LogsMsg, {"italic": True, "bold": True, "color": [1, .4, .4]})
+    }
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
+        self.transcript = None
+        self.index = TranscriptIndex()
+
+        self.first = 0  # Numéro du premier message affiché
+        self.entries = []
+
+        self.bind(scroll_y=self.paging)
         Clock.schedule_once(self.initContent)
 
     def initContent(self, _: int):
         self.content.spacing = 15
 
+    def open(self, path: str) -> None:
+        self.clear()
+
+        self.transcript = TranscriptFile(path)
+        self.index.load(path + ".search")
+
+        # Un index plus récent que l'historique (historique remplacé ou tronqué) est reconstruit
+        if self.index.count > len(self.transcript):
+            self.index.clear()
+
+        for (_, text) in self.transcript.entries(self.index.count):
+            self.index.add(text)
+
+        self.display(len(self.transcript) - GameLogs.pageSize)
+
+    def close(self) -> None:
+        if self.transcript is not None:
+            self.index.save(self.transcript.path + ".search")
+            self.transcript.close()
+            self.transcript = None
+
+    def clear(self) -> None:
+        self.close()
+
+        self.content.clear_widgets()
+        self.first = 0
+        self.entries = []
+        self.index.clear()
+
+    def log(self, kind: str, text: str) -> GameLog:
+        (cls, style) = GameLogs.styles[kind]
+        return cls(text, **style)
+
+    def displayed(self) -> int:
+        "Retourne le numéro suivant le dernier message affiché."
+
+        return self.first + len(self.entries)
+
+    def display(self, first: int) -> None:
+        "Remplace les messages affichés par la page commençant au numéro first."
+
+        self.content.clear_widgets()
+        self.first = max(0, first)
+        self.entries = [self.log(*entry) for entry in self.transcript.read(self.first, GameLogs.pageSize)]
+
+        for log in self.entries:
+            self.content.add_widget(log)
+
+    def previousPage(self) -> None:
+        first = max(0, self.first - GameLogs.pageSize)
+        logs = [self.log(*entry) for entry in self.transcript.read(first, self.first - first)]
+        top = self.entries[0] if len(self.entries) != 0 else None
+
+        for log in reversed(logs):
+            self.content.add_widget(log, index=len(self.content.children))
+
+        self.first = first
+        self.entries = logs + self.entries
+        self.trimBottom()
+
+        if top is not None:
+            self.scroll_to(top, padding=0, animate=False)
+
+    def nextPage(self) -> None:
+        logs = [self.log(*entry) for entry in self.transcript.read(self.displayed(), GameLogs.pageSize)]
+        bottom = self.entries[-1] if len(self.entries) != 0 else None
+
+        for log in logs:
+            self.content.add_widget(log)
+
+        self.entries += logs
+        self.trimTop()
+
+        if bottom is not None:
+            self.scroll_to(bottom, padding=0, animate=False)
+
+    def trimTop(self) -> None:
+        overflow = len(self.entries) - GameLogs.maxDisplayed
+        if overflow > 0:
+            self.content.clear_widgets(self.entries[:overflow])
+            self.entries = self.entries[overflow:]
+            self.first += overflow
+
+    def trimBottom(self) -> None:
+        overflow = len(self.entries) - GameLogs.maxDisplayed
+        if overflow > 0:
+            self.content.clear_widgets(self.entries[-overflow:])
+            self.entries = self.entries[:-overflow]
+
+    def paging(self, _: EventDispatcher, scrollY: float) -> None:
+        if self.transcript is None:
+            return
+
+        if scrollY >= 1 and self.first > 0:
+            self.previousPage()
+        elif scrollY <= 0 and self.displayed() < len(self.transcript):
+            self.nextPage()
+
+    def append(self, kind: str, text: str) -> None:
+        # Si le dernier message n'est pas affiché (recherche dans les anciens messages), il sera lu avec la page suivante
+        atEnd = self.displayed() == len(self.transcript)
+
+        self.index.add(text)
+        self.transcript.append([kind, text])
+
+        if atEnd:
+            log = self.log(kind, text)
+            self.content.add_widget(log)
+            self.entries.append(log)
+
+            # Les anciens messages ne sont retirés que si l'utilisateur n'est pas en train de les lire
+            if self.scroll_y <= 0 or not self.do_scroll_y:
+                self.trimTop()
+
+    def search(self, query: str) -> "list[int]":
+        return self.index.search(query)
+
+    def show(self, id: int) -> None:
+        if not self.first <= id < self.displayed():
+            self.display(id - GameLogs.pageSize // 2)
+
+        self.scroll_to(self.entries[id - self.first])
+
     def print(self, _: EventDispatcher, text: str):
-        self.content.add_widget(LogsMsg(text))
+        self.append("print", text)
 
     def important(self, _: EventDispatcher, text: str):
-        self.content.add_widget(LogsMsg(text, bold=True))
+        self.append("important", text)
 
     def title(self, _: EventDispatcher, text: str):
-        self.content.add_widget(LogsTitle(text))
+        self.append("title", text)
 
     def note(self, _: EventDispatcher, text: str):
-        self.content.add_widget(LogsMsg(text, italic=True))
+        self.append("note", text)
 
     def playerDeath(self, playerID: int, playerName: str, reason: str) -> None:
-        self.content.add_widget(LogsMsg("Le joueur [{}] {} est mort : {}".format(playerID, playerName, reason),
-                                        italic=True, bold=True, color=[1, .4, .4]))
+        self.append("alert", "Le joueur [{}] {} est mort : {}".format(playerID, playerName, reason))
 
     def playerDisconnection(self, playerID: int, playerName: str) -> None:
-        self.content.add_widget(LogsMsg("Le joueur [{}] {} a été déconnecté.".format(playerID, playerName),
-                                        italic=True, bold=True, color=[1, .4, .4]))
+        self.append("alert", "Le joueur [{}] {} a été déconnecté.".format(playerID, playerName))
+
+
+class LogsSearch(RboInput):
+    """Zone de recherche dans l'historique de la partie (logs).
+
+    Chaque appui sur Entrée fait défiler l'historique jusqu'au message suivant contenant tous les mots saisis,
+    en revenant au premier après le dernier. La recherche n'est relancée que si la saisie a changé.
+    """
+
+    logs = ObjectProperty()
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        self.query = None
+        self.matches = []
+        self.current = -1
+
+    def on_text_validate(self):
+        if self.text != self.query:
+            self.query = self.text
+            self.matches = self.logs.search(self.query)
+            self.current = -1
+
+        if len(self.matches) == 0:
+            return
+
+        self.current = (self.current + 1) % len(self.matches)
+        self.logs.show(self.matches[self.current])
+
+    def clear(self) -> None:
+        self.text = ""
+        self.query = None
+        self.matches = []
+        self.current = -1
 
 
 def diceFace(face: int) -> str:
@@ -187,11 +381,12 @@ class ActionInProgress(Exception):
 class Gameplay(FloatLayout):
     """Zone de jeu de la session.
 
-    Initialement, affiche les logs de la partie.\n
+    Initialement, affiche les logs de la partie, ainsi que le panneau de combat (battle) pendant un combat.\n
     rollDice() permet de déclencher l'écran de lancement de dés jusqu'à l'appel de back() qui retourne aux logs.
     """
 
     book = ObjectProperty()
+    battle = ObjectProperty()
 
     def __init__(self, **kwargs):
         self.register_event_type("on_action_finished")
@@ -211,6 +406,21 @@ class Gameplay(FloatLayout):
 
         self.dispatch("on_action_finished")
 
+    def clear(self) -> None:
+        "Retire l'action en cours sans émettre on_action_finished, arrête l'éventuelle animation de dés et masque le combat en cours."
+
+        self.battle.clear()
+
+        if self.currentAction is None:
+            return
+
+        self.remove_widget(self.currentAction)
+        self.currentAction = None
+
+        client = App.get_running_app()
+        if client.isRunning("game_dices_roll"):
+            client.stopTask("game_dices_roll")
+
     def action(self, action: EventDispatcher) -> None:
         if self.currentAction is not None:
             raise ActionInProgress()
@@ -226,6 +436,146 @@ class Gameplay(FloatLayout):
         self.action(DiceRoll(ctx, message=message, dices=dices, bonus=bonus, result=result))
 
 
+class BattleRow(RecycleDataViewBehavior, BoxLayout):
+    """Ligne d'un BattlePanel : un ennemi et sa barre de PV, ou un joueur et ses dégâts infligés et subis.
+
+    La barre de PV (shown) est animée lorsque la ligne est mise à jour, mais pas lorsque la vue est réutilisée pour une autre ligne.
+    """
+
+    name = StringProperty()
+    text = StringProperty()
+    bar = BooleanProperty(True)
+    ratio = NumericProperty(1)
+    shown = NumericProperty(1)
+
+    animationDuration = .25
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.index = None
+
+    def refresh_view_attrs(self, rv: RecycleView, index: int, data: dict):
+        updated = index == self.index
+        self.index = index
+
+        super().refresh_view_attrs(rv, index, data)
+
+        Animation.cancel_all(self, "shown")
+        if updated and self.shown != self.ratio:
+            Animation(shown=self.ratio, d=BattleRow.animationDuration).start(self)
+        else:
+            self.shown = self.ratio
+
+
+class BattlePanel(BoxLayout):
+    """Panneau de combat, affiché par-dessus les logs de la partie entre battle_init et battle_end.
+
+    start() affiche les ennemis du groupe reçu. attack() n'applique une attaque qu'au modèle Battle :
+    l'affichage est mis à jour au plus une fois par frame avec toutes les attaques reçues depuis, seules les lignes modifiées changeant.
+    Les lignes étant affichées par une RecycleView, seuls les ennemis visibles possèdent un widget.\n
+    end() masque le panneau après hideDelay secondes, afin de laisser voir le dernier coup.
+    """
+
+    active = BooleanProperty(False)
+    title = StringProperty()
+    rows = ObjectProperty()
+
+    hideDelay = 2
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+
+        self.battle = None
+        self.names = {}
+        self.playerRows = {}
+
+        self.refreshTrigger = Clock.create_trigger(self.refresh)
+        self.hideTrigger = Clock.create_trigger(self.hide, BattlePanel.hideDelay)
+
+    def start(self, group, names: "dict[int, str]") -> None:
+        self.hideTrigger.cancel()
+
+        self.battle = Battle(group)
+        self.names = names
+        self.playerRows = {}
+        self.active = True
+
+        self.refresh()
+
+    def attack(self, playerID: int, enemyName: str, attacker: Attacker, dmg: int) -> None:
+        if self.battle is None:
+            Logger.warn("BattlePanel : Attack received outside of a battle")
+            return
+
+        self.battle.attack(playerID, enemyName, attacker, dmg)
+        self.refreshTrigger()
+
+    def end(self) -> None:
+        self.refreshTrigger.cancel()
+        self.refresh()
+        self.hideTrigger()
+
+    def hide(self, _: float = None) -> None:
+        self.active = False
+
+    def on_touch_down(self, touch: MotionEvent):
+        # Masqué, le panneau laisse passer les touches vers les logs
+        return super().on_touch_down(touch) if self.active else False
+
+    def on_touch_move(self, touch: MotionEvent):
+        return super().on_touch_move(touch) if self.active else False
+
+    def on_touch_up(self, touch: MotionEvent):
+        return super().on_touch_up(touch) if self.active else False
+
+    def clear(self) -> None:
+        self.refreshTrigger.cancel()
+        self.hideTrigger.cancel()
+
+        self.battle = None
+        self.rows.data = []
+        self.active = False
+
+    def enemyRow(self, enemy: int) -> dict:
+        (name, hp, maxHP) = (self.battle.names[enemy], self.battle.hp[enemy], self.battle.maxHP[enemy])
+
+        if maxHP == 0:  # PV inconnus, seuls les dégâts subis sont connus
+            return {"name": name, "text": "{} PV".format(hp), "bar": False, "ratio": 0}
+
+        return {"name": name, "text": "{}/{} PV".format(hp, maxHP), "bar": True, "ratio": hp / maxHP}
+
+    def playerRow(self, id: int) -> dict:
+        name = self.names.get(id, "[{}]".format(id))
+        text = "+{} / -{} PV".format(self.battle.dealt.get(id, 0), self.battle.taken.get(id, 0))
+
+        return {"name": name, "text": text, "bar": False, "ratio": 0}
+
+    def refresh(self, _: float = None) -> None:
+        if self.battle is None:
+            return
+
+        (enemies, players) = self.battle.changes()
+        data = self.rows.data
+        enemiesCount = len(self.battle.names)
+
+        if len(data) != enemiesCount + len(self.playerRows) or any(id not in self.playerRows for id in players):
+            # Un ennemi ou un joueur est apparu : toutes les lignes sont reconstruites
+            for id in players:
+                self.playerRows.setdefault(id, len(self.playerRows))
+
+            ordered = sorted(self.playerRows, key=self.playerRows.get)
+            self.rows.data = [self.enemyRow(enemy) for enemy in range(enemiesCount)] + [self.playerRow(id) for id in ordered]
+        else:
+            for enemy in enemies:
+                data[enemy] = self.enemyRow(enemy)
+            for id in players:
+                data[enemiesCount + self.playerRows[id]] = self.playerRow(id)
+
+            self.rows.refresh_from_data()
+
+        self.title = "Combat : {} ennemi(s) restant(s)".format(self.battle.alive())
+
+
 class RequestReplied(Enum):
     WAITING = auto(),
     NO = auto(),
@@ -282,7 +632,8 @@ class Players(ScrollableStack):
     La liste écoute chaque widget enfant Player pour savoir s'il a été sélectionné et émettre on_enable(playerID) en conséquence.\n
     Il est possible de rafraîchir l'apperçu des stats principales d'un joueur avec refreshMainStats(playerID).\n
     Cette liste s'occupe également de gérer les statuts des joueurs pendant une requête (a répondu ou non).
-    Pour cela il faut utiliser beginRequest(), replied(playerID) et endRequest().\n
+    Pour cela il faut utiliser beginRequest(), replied(playerID) et endRequest().
+    Les ensembles alivePlayers, waitingPlayers et repliedPlayers permettent de ne modifier que les joueurs concernés par la requête.\n
     Enfin permet de désigner un leader parmis les joueurs avec leader(playerID).\n
     Un joueur mort peut être signalé avec la méthode dead() prenant aussi l'ID en argument.
     """
@@ -293,6 +644,9 @@ class Players(ScrollableStack):
         super().__init__(**kwargs)
 
         self.players = {}
+        self.alivePlayers = set()
+        self.waitingPlayers = set()  # Joueurs ciblés par la requête en cours n'ayant pas encore répondu
+        self.repliedPlayers = set()
         self.leader = None
         self.selected = None
         self.playerSwitch = False
@@ -327,6 +681,7 @@ class Players(ScrollableStack):
         player = Player(id, name, isSelf)
 
         self.players[id] = player
+        self.alivePlayers.add(id)
         self.content.add_widget(player)
         player.bind(selected=self.selection)
 
@@ -339,6 +694,20 @@ class Players(ScrollableStack):
         self.content.remove_widget(self.players[id])
         self.players.pop(id)
 
+        for players in [self.alivePlayers, self.waitingPlayers, self.repliedPlayers]:
+            players.discard(id)
+
+    def clear(self) -> None:
+        self.content.clear_widgets()
+        self.players = {}
+
+        for players in [self.alivePlayers, self.waitingPlayers, self.repliedPlayers]:
+            players.clear()
+
+        self.leader = None
+        self.selected = None
+        self.playerSwitch = False
+
     def refreshMainStats(self, id: int, stats: "dict[str, int]") -> None:
         self.checkPlayerID(id)
 
@@ -346,21 +715,29 @@ class Players(ScrollableStack):
 
     def beginRequest(self, target: int) -> None:
         if target == ALL_PLAYERS:
-            targets = self.players.values()
+            targets = self.players.keys()
         elif target == ACTIVE_PLAYERS:
-            targets = [p for p in self.players.values() if not p.dead]
+            targets = self.alivePlayers
         else:
-            targets = [self.players[target]]
+            targets = [target]
+
+        for id in targets:
+            self.players[id].hasReplied = RequestReplied.NO
 
-        for player in targets:
-            player.hasReplied = RequestReplied.NO
+        self.waitingPlayers.update(targets)
 
     def replied(self, id: int) -> None:
         self.players[id].hasReplied = RequestReplied.YES
 
+        self.waitingPlayers.discard(id)
+        self.repliedPlayers.add(id)
+
     def endRequest(self) -> None:
-        for player in self.players.values():
-            player.hasReplied = RequestReplied.WAITING
+        for players in [self.waitingPlayers, self.repliedPlayers]:
+            for id in players:
+                self.players[id].hasReplied = RequestReplied.WAITING
+
+            players.clear()
 
     def leaderSwitch(self, id: int) -> None:
         if self.leader in self.players:
@@ -375,12 +752,13 @@ class Players(ScrollableStack):
         return self.players[id].name
 
     def alive(self, id: int) -> bool:
-        return not self.players[id].dead
+        return id in self.alivePlayers
 
     def dead(self, id: int) -> None:
         self.checkPlayerID(id)
 
         self.players[id].dead = True
+        self.alivePlayers.discard(id)
 
 
 class Inventory(BoxLayout):
@@ -389,7 +767,8 @@ class Inventory(BoxLayout):
     Ce widget affiche le nom de l'inventaire en question.
     Ce nom est cliquable et permet de faire dérouler la DictionnaryView des objets contenus dans l'inventaire.\n
     La DictionnaryView contenant les objets ainsi que leur quantité respective est mise à jour via la méthode refresh() de Inventory.\n
-    En plus des objets contenus, à chaque mise à jour un recomptage du nombre d'objets total dans l'inventaire est effectué pour être affiché.
+    En plus des objets contenus, à chaque mise à jour le nombre d'objets total dans l'inventaire est ajusté à partir des seuls objets modifiés
+    pour être affiché, à l'aide d'un ItemsIndex (index) qui permet aussi de retrouver les objets les plus nombreux ou par préfixe.
     La capacité de l'inventaire (via capacity) est également affichée.
     """
 
@@ -404,6 +783,7 @@ class Inventory(BoxLayout):
     def __init__(self, name: str, **kwargs):
         super().__init__(name=name, **kwargs)
         self.itemsDict = DictionnaryView([.025, .025, .025])
+        self.index = ItemsIndex()
 
     def on_touch_down(self, touch: MotionEvent):
         if not self.title.collide_point(*touch.pos):
@@ -419,7 +799,17 @@ class Inventory(BoxLayout):
 
     def refresh(self, items: "dict[str, int]") -> None:
         self.itemsDict.refresh(items)
-        self.count = sum([pair.value for pair in self.itemsDict.pairs.values()])
+
+        for (name, quantity) in items.items():
+            self.index.update(name, quantity)
+
+        self.count = self.index.total
+
+    def top(self, n: int) -> "list[tuple[str, int]]":
+        return self.index.top(n)
+
+    def withPrefix(self, prefix: str) -> "list[str]":
+        return self.index.withPrefix(prefix)
 
 
 class UnknownInventory(KeyError):
@@ -482,7 +872,9 @@ class PlayerDetails(DetailsLayout):
     """2ème partie du panneau central : toutes les caractéristiques d'un joueur.
 
     Les propriétés id, name et leader permettent de mettre à jour les caractéristiques de base du joueur.\n
-    refreshStats() et refreshInventories() permettent de mettre à jour les autres caractéristiaues (stats et inventaires).\n
+    refreshStats() et refreshInventories() permettent de mettre à jour les autres caractéristiaues (stats et inventaires).
+    Tant que le joueur n'est pas affiché, ces mises à jour sont seulement fusionnées puis appliquées à son affichage :
+    les widgets de ses stats et de ses objets, coûteux en mémoire, ne sont créés que pour les joueurs consultés.\n
     Lorsque le bouton Fermer est utilisé, un event on_close est émis.
     """
 
@@ -498,14 +890,39 @@ class PlayerDetails(DetailsLayout):
         super().__init__(**kwargs)
 
         self.inventoriesInitialized = False
+        self.pendingStats = {}
+        self.pendingInventories = {}
 
     def on_close(self):
         Logger.debug("Detais : Player {} closed".format(self.id))
 
+    def on_parent(self, _: EventDispatcher, parent: Widget) -> None:
+        if parent is None:
+            return
+
+        (stats, inventories) = (self.pendingStats, self.pendingInventories)
+        self.pendingStats = {}
+        self.pendingInventories = {}
+
+        if len(stats) != 0:
+            self.refreshStats(stats)
+        if len(inventories) != 0:
+            self.refreshInventories(inventories)
+
     def refreshStats(self, stats: "dict[str, int]") -> None:
-        self.stats.refresh(stats)
+        if self.parent is None:
+            self.pendingStats.update(stats)
+        else:
+            self.stats.refresh(stats)
 
     def refreshInventories(self, inventories: "dict[str, tuple[int, dict[str, int]]]") -> None:
+        if self.parent is None:
+            for (name, (capacity, items)) in inventories.items():
+                (pendingCapacity, pendingItems) = self.pendingInventories.get(name, (None, {}))
+                self.pendingInventories[name] = (capacity if capacity is not None else pendingCapacity, {**pendingItems, **items})
+
+            return
+
         if not self.inventoriesInitialized:
             for name in inventories.keys():
                 self.inventories.addInventory(name)
@@ -541,7 +958,16 @@ class Details(StackLayout):
         self.specificDetails = self.details[Details.GLOBAL]
         self.add_widget(self.specificDetails)
 
-        self.gameDetails.gameName = ctx.name
+    def clear(self) -> None:
+        "Retire tous les joueurs et vide les stats affichées, pour une nouvelle session."
+
+        self.backToGlobal()
+        self.details = {Details.GLOBAL: self.details[Details.GLOBAL]}
+
+        self.details[Details.GLOBAL].stats.clear()
+        self.gameDetails.mainStats.clear()
+        self.gameDetails.leader = -1
+        self.gameDetails.gameName = self.context.name
 
     def checkPlayerID(self, id: int) -> None:
         if id == Details.GLOBAL or id not in self.details:
@@ -594,36 +1020,142 @@ class Details(StackLayout):
         self.details[self.gameDetails.leader].leader = True
 
 
-class OptionsInput(ScrollableStack):
-    "Groupe de radio buttons permettant de sélectionner une seule option. Possède une taille fixe et est scrollable s'il y a trop d'options"
+class OptionRow(RecycleDataViewBehavior, BoxLayout):
+    "Ligne d'une OptionsList affichant une option et sa case à cocher, réutilisée pour afficher les autres options lors du défilement."
+
+    id = NumericProperty()
+    label = StringProperty()
+    enabled = BooleanProperty(False)
+    owner = ObjectProperty()
+
+    def on_touch_down(self, touch: MotionEvent):
+        if not self.collide_point(*touch.pos):
+            return False
+
+        self.owner.select(self.id)
+        return True
+
+
+class OptionsFilter(RboInput):
+    "Zone de saisie filtrant les options d'un OptionsInput, les flèches haut et bas déplaçant la sélection parmi les options affichées."
+
+    def __init__(self, **kwargs):
+        self.register_event_type("on_move")
+        super().__init__(**kwargs)
+
+    def keyboard_on_key_down(self, window, keycode: "tuple[int, str]", text: str, modifiers: "list[str]"):
+        if keycode[1] == "up":
+            self.dispatch("on_move", -1)
+        elif keycode[1] == "down":
+            self.dispatch("on_move", 1)
+        else:
+            return super().keyboard_on_key_down(window, keycode, text, modifiers)
+
+        return True
+
+    def on_move(self, offset: int):
+        pass
+
+
+class OptionsInput(BoxLayout):
+    """Liste d'options à choix unique de taille fixe, dont seules les options visibles possèdent un widget (RecycleView).
+
+    La saisie d'un texte dans filter n'affiche que les options le contenant, sans tenir compte de la casse.
+    Les flèches haut et bas déplacent la sélection parmi les options affichées, Entrée émet on_submit si au moins une option est affichée.\n
+    selected est le numéro (à partir de 1) de l'option sélectionnée dans la liste complète, 0 lorsque le filtre masque toutes les options.
+    """
+
+    selected = NumericProperty(1)
+    background = ColorProperty(ScrollableStack.background.defaultvalue)
 
-    selected = NumericProperty()
+    filter = ObjectProperty()
+    optionsList = ObjectProperty()
 
     def __init__(self, options: "list[str]", bg: "list[float]" = ScrollableStack.background.defaultvalue, **kwargs):
-        super().__init__(bg, **kwargs)
+        self.register_event_type("on_submit")
+        super().__init__(background=bg, **kwargs)
 
-        self.optionsID = {}
+        self.filter.bind(text=lambda _, __: self.refresh(),
+                         on_text_validate=lambda _: self.submit(),
+                         on_move=lambda _, offset: self.move(offset))
 
-        id = 1
-        for option in options:
-            btn = RboOption(label=option, group=self)
-            btn.bind(enabled=self.select)
+        self.setOptions(options)
 
-            self.content.add_widget(btn)
-            self.optionsID[btn] = id
-            id += 1
+    def setOptions(self, options: "list[str]") -> None:
+        "Affiche les options données, la première option étant sélectionnée."
 
-        self.content.children[-1].toggle()
+        self.options = options
+        self.keys = [option.casefold() for option in options]
+        self.selected = 1
+
+        if self.filter.text != "":
+            self.filter.text = ""  # refresh() est appelée par le changement de texte
+        else:
+            self.refresh()
+
+    def refresh(self) -> None:
+        query = self.filter.text.casefold()
+        self.shown = [i + 1 for (i, key) in enumerate(self.keys) if query in key]
+
+        # Valider doit retourner une option affichée : la sélection suit le filtre si l'option sélectionnée est masquée
+        if len(self.shown) == 0:
+            self.selected = 0
+        elif self.selected not in self.shown:
+            self.selected = self.shown[0]
+
+        self.optionsList.data = [{"id": id, "label": self.options[id - 1], "enabled": id == self.selected, "owner": self} for id in self.shown]
+        self.optionsList.scroll_y = 1
+
+    def select(self, id: int) -> None:
+        for row in self.optionsList.data:
+            row["enabled"] = row["id"] == id
+
+        self.selected = id
+        self.optionsList.refresh_from_data()
+
+    def move(self, offset: int) -> None:
+        if len(self.shown) == 0:
+            return
+
+        index = self.shown.index(self.selected) if self.selected in self.shown else 0
+        index = max(0, min(len(self.shown) - 1, index + offset))
+
+        self.select(self.shown[index])
+        self.optionsList.showIndex(index)
+
+    def submit(self) -> None:
+        if self.selected in self.shown:
+            self.dispatch("on_submit")
+
+    def on_submit(self):
+        pass
 
-    def select(self, btn: RboOption, selected: bool):
-        if selected:
-            self.selected = self.optionsID[btn]
-        elif all(not option.enabled for option in self.content.children):
-            btn.toggle()
+
+class OptionsList(RecycleView):
+    "RecycleView des options d'un OptionsInput, dont les lignes ont toutes la même hauteur (rowHeight)."
+
+    rowHeight = NumericProperty(30)
+
+    def showIndex(self, index: int) -> None:
+        "Fait défiler la liste le moins possible pour que la ligne index soit entièrement visible."
+
+        total = len(self.data) * self.rowHeight
+        if total <= self.height:
+            return
+
+        top = index * self.rowHeight
+        offset = (1 - self.scroll_y) * (total - self.height)
+
+        if top < offset:
+            offset = top
+        elif top + self.rowHeight > offset + self.height:
+            offset = top + self.rowHeight - self.height
+
+        self.scroll_y = 1 - offset / (total - self.height)
 
 
 class OptionsPopup(InputPopup):
-    "Cette popup affiche une liste de cases à cocher à choix unique."
+    "Cette popup affiche une liste filtrable d'options à choix unique."
 
     title = StringProperty("Demande")
     value = ObjectProperty(1)
@@ -631,7 +1163,21 @@ class OptionsPopup(InputPopup):
 
     def __init__(self, options: "list[str]", bg: "list[float]" = ScrollableStack.background.defaultvalue, **kwargs):
         super().__init__(options, bg, **kwargs)
-        self.content.input.bind(selected=self.setter("value"))
+
+        self.content.input.bind(selected=self.selectionChanged,
+                                on_submit=lambda _: self.content.dispatch("on_submit"))
+        self.selectionChanged(self.content.input, self.content.input.selected)
+
+    def selectionChanged(self, _: EventDispatcher, selected: int) -> None:
+        self.value = selected
+        self.content.validate.disabled = selected == 0  # Aucune option affichée, il n'y a rien à valider
+
+    def reset(self, message: str, options: "list[str]") -> None:
+        self.title = message
+        self.content.input.setOptions(options)
+
+    def on_open(self):
+        self.content.input.filter.focus = True
 
 
 class NumberInput(NumericRboInput):
@@ -666,6 +1212,13 @@ class NumberInputPopup(InputPopup):
         super().__init__(min, max, **kwargs)
         self.content.input.bind(value=self.setter("value"))
 
+    def reset(self, question: str, min: int, max: int) -> None:
+        self.title = question
+
+        self.content.input.min = min
+        self.content.input.max = max
+        self.content.input.text = "0"
+
 
 class Request(Enum):
     CONFIRM = auto(),
@@ -684,7 +1237,8 @@ class Session(Step, BoxLayout):
     """Session d'une partie.
 
     Gère tous les évènements qui peuvent avoir lieu au cours d'une partie (session).\n
-    Actualise l'affichage en conséquence et propose un bouton "Confirmer" ainsi qu'une popup afin de répondre aux requêtes reçues.
+    Actualise l'affichage en conséquence et propose un bouton "Confirmer" ainsi qu'une popup afin de répondre aux requêtes reçues.\n
+    Une même Session peut être réutilisée pour les sessions suivantes de la partie, restore() la remet alors dans son état initial.
     """
 
     requests = {
@@ -695,10 +1249,35 @@ class Session(Step, BoxLayout):
         Request.NUMBER: "askNumber"
     }
 
+    # Les events absents sont traités avec la priorité Priority.STATS
+    priorities = {
+        "on_request_confirm": Priority.INPUT,
+        "on_request_dice_roll": Priority.INPUT,
+        "on_request_yes_no": Priority.INPUT,
+        "on_request_options": Priority.INPUT,
+        "on_request_number": Priority.INPUT,
+        "on_reply_out_of_range": Priority.INPUT,
+        "on_reply_invalid_length": Priority.INPUT,
+        "on_reply_confirm_expected": Priority.INPUT,
+        "on_reply_too_late": Priority.INPUT,
+        "on_finish_request": Priority.INPUT,
+        "on_player_reply": Priority.INPUT,
+        "on_player_crash": Priority.STATE,
+        "on_player_update": lambda **args: Priority.STATS if args["update"]["death"] is None else Priority.STATE,
+        "on_text_normal": Priority.TEXT,
+        "on_text_important": Priority.TEXT,
+        "on_text_title": Priority.TEXT,
+        "on_text_note": Priority.TEXT
+    }
+
+    # Les requêtes ne dépendent que des morts et des déconnexions des joueurs : elles passent devant les stats et les messages
+    dependencies = FrameScheduler.requestsFirst
+
     name = StringProperty()
 
     gameplay = ObjectProperty()
     logs = ObjectProperty()
+    logsSearch = ObjectProperty()
 
     confirm = ObjectProperty()
 
@@ -706,22 +1285,13 @@ class Session(Step, BoxLayout):
     players = ObjectProperty()
 
     def __init__(self, selfID: int, initialLeader: int, gameName: str, rboCI: RboCI, members: "dict[int, str]", **kwargs):
+        rules.require("session")
         super().__init__(**kwargs)
         self.init("Session sur \"{}\"".format(gameName), rboCI, app.TitleBarCtx.SESSION)
 
-        self.name = gameName
-        self.members = members
-
         self.details = Details(self)
         self.detailsScreen.add_widget(self.details)
 
-        for (id, name) in self.members.items():
-            self.details.addPlayer(id, name)
-            self.players.addPlayer(id, name, id == selfID)
-
-        self.players.leaderSwitch(initialLeader)
-        self.details.leaderSwitch(initialLeader)
-
         class RequestHandler:
             context = self
 
@@ -738,6 +1308,10 @@ class Session(Step, BoxLayout):
                 if session.isTargetted(args["target"]):
                     self.context.enableReplyInput()
 
+                    # Temps écoulé entre la réception de la requête et l'activation de la saisie
+                    session.requestLatency.record(perf_counter() - session.scheduler.current.created)
+                    Logger.debug("Session : Reply input enabled after {}".format(session.requestLatency))
+
         class InvalidReplyHandler:
             context = self
 
@@ -770,12 +1344,64 @@ class Session(Step, BoxLayout):
                     on_player_reply=self.playerReplied,
                     on_player_update=self.updatePlayer,
                     on_global_stat_update=self.updateGlobalStat,
+                    on_battle_init=lambda _, group: self.gameplay.battle.start(group, self.members),
+                    on_battle_atk=lambda _, **args: self.gameplay.battle.attack(args["playersId"], args["enemiesName"], args["attacker"], args["dmg"]),
+                    on_battle_end=lambda _: self.gameplay.battle.end(),
                     on_player_crash=self.playerCrash)
 
-        self.currentRequest = (None, None)  # Le premier élément contient le type de la requête, le second les arguments associés à cette requête
         self.requestPopup = None
-
+        self.requestLatency = LatencyStats()
+        self.popupLatency = LatencyStats()
+
+        # Les popups de requête sont construites pendant le chargement de la session plutôt qu'à la réception des requêtes
+        self.popups = {
+            Request.YES_NO: PopupPool(lambda: YesNoPopup("")),
+            Request.OPTIONS: PopupPool(lambda: OptionsPopup([], [.1, .1, .1])),
+            Request.NUMBER: PopupPool(Session.numberPopup)
+        }
+        for pool in self.popups.values():
+            Clock.schedule_once(pool.warm)
         Clock.schedule_once(lambda _: self.confirm.bind(on_release=self.confirmBtnReleased))
+
+        self.restore(selfID, initialLeader, gameName, members)
+
+    def transcriptPath(self, gameName: str) -> str:
+        """Chemin de l'historique enregistré de la partie, commun à toutes les sessions d'une même partie.
+
+        Les historiques sont rangés par serveur (hôte et port).
+        Le nom de la partie, dont les caractères spéciaux sont remplacés, est suivi d'une empreinte du nom exact :
+        deux parties dont les noms ne diffèrent que par ces caractères ("a b" et "a_b") n'ont pas le même historique.
+        """
+
+        directory = App.get_running_app().rbocfg.getdefault("session", "transcripts", "transcripts")
+        (host, port) = self.rboCI.server if self.rboCI.server is not None else ("unknown", 0)
+
+        server = re.sub(r"[^\w\-.]", "_", "{}_{}".format(host, port))
+        name = "{}-{}".format(re.sub(r"[^\w\-]", "_", gameName), hashlib.sha1(gameName.encode("utf-8")).hexdigest()[:8])
+
+        return os.path.join(directory, server, name)
+
+    def restore(self, selfID: int, initialLeader: int, gameName: str, members: "dict[int, str]") -> None:
+        self.stepTitle = "Session sur \"{}\"".format(gameName)
+        self.name = gameName
+        self.members = members
+
+        self.logs.open(self.transcriptPath(gameName))
+        self.logsSearch.clear()
+        self.gameplay.clear()
+        self.players.clear()
+        self.details.clear()
+
+        for (id, name) in self.members.items():
+            self.details.addPlayer(id, name)
+            self.players.addPlayer(id, name, id == selfID)
+
+        self.players.leaderSwitch(initialLeader)
+        self.details.leaderSwitch(initialLeader)
+
+        self.currentRequest = (None, None)  # Le premier élément contient le type de la requête, le second les arguments associés à cette requête
+        self.confirm.disabled = True
+
         Clock.schedule_once(self.bindTitleBar)
 
     def hasOpenRequestPopup(self) -> bool:
@@ -785,6 +1411,9 @@ class Session(Step, BoxLayout):
         self.requestPopup.dismiss()
         self.requestPopup = None
 
+    def close(self) -> None:
+        self.logs.close()
+
     def confirmBtnReleased(self, _: EventDispatcher):
         self.rboCI.confirm()
         self.confirm.disabled = True
@@ -793,7 +1422,8 @@ class Session(Step, BoxLayout):
         App.get_running_app().titleBar.actionsCtx.bind(on_disconnect=lambda _: self.rboCI.close())
 
     def replyIgnored(self, _: EventDispatcher):
-        self.logs.important(None, "Vous avez répondu trop tard, votre réponse a été ignorée.")  # "None" car n'est pas le handler direct d'un event
+        # Les messages écrits par les autres handlers passent aussi par la file des messages, pour conserver l'ordre de l'historique
+        self.scheduler.push(Priority.TEXT, self.logs.important, None, "Vous avez répondu trop tard, votre réponse a été ignorée.")  # "None" car n'est pas le handler direct d'un event
 
     def enableReplyInput(self, _: EventDispatcher = None):
         getattr(self, self.requests[self.currentRequest[0]])(**self.currentRequest[1])
@@ -815,22 +1445,39 @@ class Session(Step, BoxLayout):
         self.gameplay.rollDice(self, message, dices, bonus, results[self.rboCI.id])
 
     def askYesNo(self, target: int, question: str) -> None:
-        self.requestPopup = YesNoPopup(question)
-        self.requestPopup.open()
-        self.requestPopup.bind(on_reply=lambda _, reply: self.rboCI.replyYesNo(reply))
+        self.requestPopup = self.popups[Request.YES_NO].acquire(question, on_reply=lambda _, reply: self.rboCI.replyYesNo(reply))
+        self.openRequestPopup()
 
     def ask(self, target: int, message: str, options: "list[str]") -> None:
-        self.requestPopup = OptionsPopup(options, [.1, .1, .1], title=message)
-        self.requestPopup.open()
-        self.requestPopup.bind(on_validate=lambda _, reply: self.rboCI.reply(reply))
+        self.requestPopup = self.popups[Request.OPTIONS].acquire(message, options, on_validate=lambda _, reply: self.rboCI.reply(reply))
+        self.openRequestPopup()
 
     def askNumber(self, target: int, question: str, min: int, max: int) -> None:
-        self.requestPopup = NumberInputPopup(min, max, title=question)
-        self.requestPopup.content.input.size_hint = (.6, None)
-        self.requestPopup.content.input.height = 40
+        self.requestPopup = self.popups[Request.NUMBER].acquire(question, min, max, on_validate=lambda _, reply: self.rboCI.reply(reply))
+        self.openRequestPopup()
+
+    @staticmethod
+    def numberPopup() -> NumberInputPopup:
+        popup = NumberInputPopup(0, 0)
+        popup.content.input.size_hint = (.6, None)
+        popup.content.input.height = 40
 
+        return popup
+
+    def openRequestPopup(self) -> None:
         self.requestPopup.open()
-        self.requestPopup.bind(on_validate=lambda _, reply: self.rboCI.reply(reply))
+
+        # Temps écoulé entre la réception de la requête et la première frame affichant sa popup
+        if self.scheduler.current is not None:
+            created = self.scheduler.current.created
+
+            def shown(*_):
+                Window.unbind(on_flip=shown)
+
+                self.popupLatency.record(perf_counter() - created)
+                Logger.debug("Session : Request popup visible after {}".format(self.popupLatency))
+
+            Window.bind(on_flip=shown)
 
     def playerReplied(self, _: EventDispatcher, **args):
         if self.currentRequest is None:
@@ -859,11 +1506,11 @@ class Session(Step, BoxLayout):
         self.details.removePlayer(id)
         self.members.pop(id)
 
-        self.logs.playerDisconnection(id, name)
+        self.scheduler.push(Priority.TEXT, self.logs.playerDisconnection, id, name)
 
     def playerDie(self, _: EventDispatcher, id: int, reason: str):
         self.players.dead(id)
-        self.logs.playerDeath(id, self.players.getName(id), reason)
+        self.scheduler.push(Priority.TEXT, self.logs.playerDeath, id, self.players.getName(id), reason)
 
     def updateGlobalStat(self, _: EventDispatcher, **args):
         name = args["name"]
@@ -891,7 +1538,7 @@ class Session(Step, BoxLayout):
         death = update["death"]
         if death is not None:
             self.players.dead(id)
-            self.logs.playerDeath(id, self.players.getName(id), death)
+            self.scheduler.push(Priority.TEXT, self.logs.playerDeath, id, self.players.getName(id), death)
 
         statsUpdate = update["stats"]
 
@@ -1,3 +1,4 @@
+from bisect import bisect, bisect_left
 from math import inf
 
 from kivy.clock import Clock
@@ -7,10 +8,12 @@ from kivy.properties import BooleanProperty, ColorProperty, ListProperty, Numeri
 from kivy.logger import Logger
 from kivy.uix.anchorlayout import AnchorLayout
 from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.label import Label
 from kivy.uix.popup import Popup
 from kivy.uix.scrollview import ScrollView
 from kivy.uix.stacklayout import StackLayout
 from kivy.uix.textinput import TextInput
+from rboclient.misc import LRUCache
 from rboclient.network.handlerstree import YesNoQuestion
 
 
@@ -188,6 +191,55 @@ class NumericRboInput(RboInput):
         return True
 
 
+def renderKeyPart(value):
+    "Convertit une valeur de propriété en valeur hashable pour former une clé de renderCache."
+
+    if isinstance(value, list):
+        return tuple(renderKeyPart(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, renderKeyPart(item)) for (key, item) in value.items()))
+
+    return value
+
+
+# Rendus (labels de kivy.core.text) partagés par les CachedLabel
+renderCache = LRUCache(256)
+
+
+class CachedLabel(Label):
+    """Label dont le rendu est partagé avec les autres CachedLabel ayant le même texte, le même style et la même largeur.
+
+    Les lignes répétées (messages de combat, notes, titres...) ne sont alors analysées et rastérisées qu'une fois.
+    Un rendu mis en cache n'est plus modifié : le label en crée un nouveau pour son prochain rendu.
+    """
+
+    def renderKey(self) -> tuple:
+        return tuple(renderKeyPart(getattr(self, name)) for name in Label._font_properties) + (self.disabled,)
+
+    def texture_update(self, *largs):
+        key = self.renderKey()
+        render = renderCache.get(key)
+
+        if render is None:
+            super().texture_update(*largs)
+
+            if self.texture is not None and min(self.texture.size) > 1:
+                renderCache.put(key, self._label)
+
+                self._label = None
+                self._create_label()
+
+            return
+
+        self.texture = render.texture
+        self.texture_size = list(render.texture.size)
+        self.is_shortened = render.is_shortened
+
+        if self.markup:
+            self.refs = render.refs
+            self.anchors = render.anchors
+
+
 class ScrollableStack(ScrollView):
     "Classe mère pour créer un StackLayout (pile d'éléments) qui soit scrollable verticalement."
 
@@ -218,35 +270,82 @@ class DictionnaryView(ScrollableStack):
     La méthode refresh() permet de mettre à jour les données affichées.\n
     Si une paire clé/valeur est présente, alors la valeur sera mise à jour en fonction de dict passé en argument,
     sinon une nouvelle paire clé/valeur sera ajoutée dans la tableau.\n
-    Pour supprimer une paire du tableau, il faut passer la valeur None dans la paire clé/valeur correspondante en argument.
+    Pour supprimer une paire du tableau, il faut passer la valeur None dans la paire clé/valeur correspondante en argument.\n
+    Si sortKeys est activée, les paires sont affichées dans l'ordre des clés à l'aide d'un index trié (sortedKeys).
     """
 
     foreground = ColorProperty([1, 1, 1])
+    sortKeys = BooleanProperty(False)
 
     def __init__(self, bg: "list[float]" = ScrollableStack.background.defaultvalue, **kwargs):
+        # Les propriétés passées en arguments (sortKeys) sont appliquées par super().__init__(), qui émet alors on_sortKeys
+        self.pairs = {}
+        self.sortedKeys = []
+
         super().__init__(bg, **kwargs)
 
-        self.pairs = {}
         Clock.schedule_once(self.initContent)
 
     def initContent(self, _: int):
         self.content.padding = 15
         self.content.spacing = 5
 
+    def on_foreground(self, _: EventDispatcher, foreground: "list[float]"):
+        for pair in self.pairs.values():
+            pair.color = foreground
+
+    def on_sortKeys(self, _: EventDispatcher, sortKeys: bool):
+        pairs = list(self.pairs.values())
+        self.sortedKeys = []
+
+        if len(pairs) == 0:  # Notamment pendant la construction, le contenu n'étant pas encore créé par les règles kv
+            return
+
+        self.content.clear_widgets(pairs)
+
+        for pair in (sorted(pairs, key=lambda pair: pair.key) if sortKeys else pairs):
+            self.insertPair(pair)
+
+    def insertPair(self, pair: Pair) -> None:
+        if not self.sortKeys:
+            self.content.add_widget(pair)
+            return
+
+        position = bisect(self.sortedKeys, pair.key)
+        self.sortedKeys.insert(position, pair.key)
+
+        # Les enfants d'un StackLayout sont affichés dans l'ordre inverse de la liste children
+        self.content.add_widget(pair, len(self.content.children) - position)
+
+    def clear(self) -> None:
+        self.content.clear_widgets()
+        self.pairs = {}
+        self.sortedKeys = []
+
     def refresh(self, pairs: "dict[str, int]") -> None:
-        for (key, value) in pairs.items():
-            hidePair = value is None
+        # Toutes les différences sont calculées avant d'être appliquées en une seule fois au contenu
+        removed = []
+        added = []
 
+        for (key, value) in pairs.items():
             if key in self.pairs:
-                if hidePair:
-                    self.content.remove_widget(self.pairs[key])
-                    self.pairs.pop(key)
+                if value is None:
+                    removed.append(self.pairs.pop(key))
                 else:
                     self.pairs[key].value = value
-            elif not hidePair:
-                self.pairs[key] = Pair(key, value)
-                self.bind(foreground=self.pairs[key].setter("color"))
-                self.content.add_widget(self.pairs[key])
+            elif value is not None:
+                self.pairs[key] = Pair(key, value, color=self.foreground)
+                added.append(self.pairs[key])
+
+        if len(removed) != 0:
+            self.content.clear_widgets(removed)
+
+            if self.sortKeys:
+                for pair in removed:
+                    del self.sortedKeys[bisect_left(self.sortedKeys, pair.key)]
+
+        for pair in added:
+            self.insertPair(pair)
 
 
 class ErrorMessage(AnchorLayout):
@@ -267,6 +366,7 @@ class ErrorPopup(Popup):
 class InputContent(BoxLayout):
     input = ObjectProperty()
     form = ObjectProperty()
+    validate = ObjectProperty()
 
     def __init__(self, **kwargs):
         self.register_event_type("on_submit")
@@ -348,6 +448,9 @@ class YesNoContent(BoxLayout):
         self.yes.bind(on_click=lambda _: self.dispatch("on_choose", True))
         self.no.bind(on_click=lambda _: self.dispatch("on_choose", False))
 
+        self.setQuestion(question)
+
+    def setQuestion(self, question) -> None:
         self.question = YesNoContent.questions[question] if type(question) == YesNoQuestion else question
 
     def on_choose(self, chosen: bool):
@@ -370,16 +473,69 @@ class YesNoPopup(Popup):
 
     def __init__(self, question, **kwargs):
         self.register_event_type("on_reply")
-        super().__init__(title=YesNoPopup.questions[question] if type(question) == YesNoQuestion else "Demande", **kwargs)
+        super().__init__(title=YesNoPopup.titleOf(question), **kwargs)
 
         self.content = YesNoContent(question)
         self.content.bind(on_choose=lambda _, chosen: self.dispatch("on_reply", chosen))
 
+    @staticmethod
+    def titleOf(question) -> str:
+        return YesNoPopup.questions[question] if type(question) == YesNoQuestion else "Demande"
+
+    def reset(self, question) -> None:
+        self.title = YesNoPopup.titleOf(question)
+        self.content.setQuestion(question)
+
     def on_reply(self, reply: bool):
         Logger.debug("YesNoPopup : Chosen reply {}".format(reply))
         self.dismiss()
 
 
+class PopupPool:
+    """Réserve de popups d'un même type construites à l'avance, afin de ne pas construire une popup au moment de l'afficher.
+
+    warm() construit les popups manquantes pour atteindre la taille de la réserve (size), une par frame.\n
+    acquire() retourne une popup de la réserve (ou une nouvelle si elle est vide) remise à zéro par sa méthode reset(),
+    appelée avec les arguments positionnels, et bindée aux handlers passés en arguments nommés.
+    La popup est rendue à la réserve, sans ses handlers, une fois fermée.
+    """
+
+    def __init__(self, factory, size: int = 1):
+        self.factory = factory
+        self.size = size
+
+        self.available = []
+        self.handlers = {}
+
+    def warm(self, _: float = None) -> None:
+        if len(self.available) < self.size:
+            self.available.append(self.create())
+            Clock.schedule_once(self.warm)
+
+    def create(self) -> Popup:
+        popup = self.factory()
+        # _is_open ne redevient faux qu'à la fin de l'animation de fermeture, la popup peut alors être réouverte
+        popup.bind(_is_open=self.closed)
+
+        return popup
+
+    def acquire(self, *args, **handlers) -> Popup:
+        popup = self.available.pop() if len(self.available) != 0 else self.create()
+
+        popup.reset(*args)
+        popup.bind(**handlers)
+        self.handlers[popup] = handlers
+
+        return popup
+
+    def closed(self, popup: Popup, isOpen: bool) -> None:
+        if isOpen or popup not in self.handlers:
+            return
+
+        popup.unbind(**self.handlers.pop(popup))
+        self.available.append(popup)
+
+
 class GameCtxAction(AnchorLayout):
     """Widget composant une GameCtxActions.
 
@@ -0,0 +1,51 @@
+from bisect import bisect_left, insort
+
+
+class ItemsIndex:
+    """Index des objets d'un inventaire.
+
+    update() met à jour la quantité d'un objet (None pour le retirer) et maintient en conséquence le total des objets,
+    ainsi que deux listes triées : l'une par nom, l'autre par quantité décroissante.\n
+    top() retourne les n objets les plus nombreux et withPrefix() les noms commençant par un préfixe donné,
+    sans parcourir tout l'inventaire.
+    """
+
+    def __init__(self):
+        self.quantities = {}
+        self.total = 0
+
+        self.byName = []
+        self.byQuantity = []  # Paires (-quantité, nom) pour que la quantité la plus grande soit en tête
+
+    def update(self, name: str, quantity: int) -> None:
+        previous = self.quantities.get(name)
+        if previous == quantity:
+            return
+
+        if previous is not None:
+            del self.byQuantity[bisect_left(self.byQuantity, (-previous, name))]
+            self.total -= previous
+
+        if quantity is None:
+            del self.byName[bisect_left(self.byName, name)]
+            self.quantities.pop(name)
+            return
+
+        if previous is None:
+            insort(self.byName, name)
+
+        insort(self.byQuantity, (-quantity, name))
+        self.quantities[name] = quantity
+        self.total += quantity
+
+    def top(self, n: int) -> "list[tuple[str, int]]":
+        return [(name, -quantity) for (quantity, name) in self.byQuantity[:n]]
+
+    def withPrefix(self, prefix: str) -> "list[str]":
+        begin = bisect_left(self.byName, prefix)
+        end = begin
+
+        while end < len(self.byName) and self.byName[end].startswith(prefix):
+            end += 1
+
+        return self.byName[begin:end]
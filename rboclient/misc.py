@@ -1,2 +1,45 @@
+from collections import OrderedDict
+
+
 def toBool(str: str) -> bool:
     return str == "True" or str == "1"
+
+
+class LRUCache:
+    """Cache d'au plus maxSize valeurs, retirant en premier la moins récemment utilisée.
+
+    get() relève ses succès (hits) et ses échecs (misses), hitRate() retourne la proportion de succès.
+    """
+
+    def __init__(self, maxSize: int):
+        self.maxSize = maxSize
+        self.entries = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key, default=None):
+        if key not in self.entries:
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    def put(self, key, value) -> None:
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+
+        if len(self.entries) > self.maxSize:
+            self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self.entries.clear()
+
+    def hitRate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups != 0 else 0
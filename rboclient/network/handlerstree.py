@@ -1,8 +1,7 @@
 import json
 from enum import Enum, IntEnum, auto
 
-from rboclient.network.handling import Data, HandlerNode
-from rboclient.network.protocol import HandlerLeaf
+from rboclient.network.handling import Data, HandlerLeaf, HandlerNode
 
 
 class YesNoQuestion(IntEnum):
@@ -16,7 +15,7 @@ class Attacker(Enum):
     Enemy = auto()
 
 
-def nothing() -> dict:
+def nothing(_: Data) -> dict:
     return {}
 
 
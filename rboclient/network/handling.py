@@ -122,3 +122,52 @@ class HandlerNode(object):
             raise UnknownBranch(id)
 
         return self.children[id](data, tags)
+
+
+def leavesFullNames(tree: HandlerNode, tags: "list[str]" = None) -> "list[str]":
+    "Liste les feuilles d'un arbre de HanlderNodes."
+
+    if tags is None:
+        tags = []
+
+    leaves = []
+
+    for branch in tree.children.values():
+        if type(branch) == HandlerNode:
+            leaves += leavesFullNames(branch, tags + [branch.tag])
+        else:
+            leaves.append("_".join(tags + [branch.name]))
+
+    return leaves
+
+
+class Event(object):
+    "Évènement à déclencher, avec ses paramètres."
+
+    def __init__(self, tag: str, **args):
+        self.name = tag
+        self.args = args
+
+
+def ignore(_: Data) -> dict:
+    return {}
+
+
+class IllegalArgName(ValueError):
+    def __init__(self, args: dict):
+        super().__init__("An argument has inappropriate name \"tag\" : " + str(args))
+
+
+class HandlerLeaf(object):
+    "Feuille de l'arbre pouvant être appelée pour retourner les données à utiliser lors du dispatch de l'event."
+
+    def __init__(self, name: str, handler=ignore):
+        self.name = name
+        self.handler = handler
+
+    def __call__(self, data: Data, tags: "list[str]") -> Event:
+        args = self.handler(data)
+        if "tag" in args:
+            raise IllegalArgName(args)
+
+        return Event("_".join(tags + [self.name]), **args)
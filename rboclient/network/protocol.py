@@ -1,12 +1,16 @@
+from collections import deque
 from enum import Enum, auto
 
 import kivy
 import kivy.support
 from kivy.event import EventDispatcher
 from kivy.logger import Logger
-from rboclient.network import handling
+from rboclient import tracing
+from rboclient.network import handling, worker
 
-kivy.support.install_twisted_reactor()
+# Avec un thread réseau (voir worker), le reactor par défaut de Twisted est déjà installé et tourne sur ce thread
+if worker.thread is None:
+    kivy.support.install_twisted_reactor()
 
 import twisted  # noqa E402
 from twisted.internet import protocol  # noqa E402
@@ -29,20 +33,26 @@ class RboConnection(protocol.Protocol):
     Cette connexion encapsule un protocole utilisant un arbre pour déterminer quel évènement l'interface doit émettre à chaque trame Rbo reçue.\n
     L'arbre d'évènements utilisé dépend du mode actuel de la partie (logging, registering, lobby, session...).\n
     Ce mode est automatiquement géré par le protocole.\n
-    Il est également possible d'envoyer des trames d'octets.
+    Il est également possible d'envoyer des trames d'octets.\n
+    Avec un thread réseau, les trames sont décodées sur celui-ci et les events émis sur le thread principal, les envois passant par le thread réseau.
+    Tant que la file d'events du thread réseau est pleine, les trames reçues sont gardées sans être décodées (voir NetworkThread.throttle()).
     """
 
+    stats = None  # Compteur des events décodés (voir overlay.DecodingStats), None tant que l'overlay de performances est masqué
+
     def __init__(self, interface: "RboConnectionInterface"):
         super().__init__()
 
         self.interface = interface
         self.mode = Mode.LOGGING
+        self.network = worker.thread
+        self.frames = deque()  # Trames reçues restant à décoder
 
     def connectionMade(self):
         Logger.debug("Connection : Connection establish with " + str(self.transport.getPeer()))
 
         self.mode = Mode.REGISTERING
-        self.interface.dispatch("on_connected")
+        self.dispatch("on_connected")
 
         self.transport.write(self.interface.id.to_bytes(1, "big") + self.interface.name.encode())
 
@@ -50,73 +60,92 @@ class RboConnection(protocol.Protocol):
         Logger.debug("Connection : Disconnecting : " + reason.getErrorMessage())
 
         self.mode = Mode.DISCONNECTED
-        self.interface.dispatch("on_disconnected", reason)
+        self.dispatch("on_disconnected", reason)
 
     def dataReceived(self, data: bytes):
-        for frame in handling.decompose(data):
-            event = self.interface.handlers[self.mode](frame)
+        if tracing.tracer is not None:
+            return self.tracedDataReceived(data, tracing.tracer)
 
-            if event.name == "registered" or event.name == "session_stop":
-                self.mode = Mode.LOBBY
-            elif event.name == "session_prepared":
-                self.mode = Mode.SESSION
+        self.dispatch("on_received")
 
-            self.interface.dispatch("on_" + event.name, **event.args)
+        frames = handling.decompose(data)
+        if RboConnection.stats is not None:
+            RboConnection.stats.decoded += len(frames)
 
-    def send(self, data: bytes) -> None:
-        self.transport.write(data)
+        self.frames.extend(frames)
+        self.decodeFrames()
 
-    def shutdown(self) -> None:
-        self.transport.loseConnection()
+    def tracedDataReceived(self, data: bytes, tracer: tracing.Tracer) -> None:
+        "Identique à dataReceived(), en traçant la réception, le découpage en trames, le décodage et le dispatch de chaque event."
 
+        with tracer.span("dataReceived", "network", size=len(data)):
+            self.dispatch("on_received")
 
-def leavesFullNames(tree: handling.HandlerNode, tags: "list[str]" = None) -> "list[str]":
-    "Liste les feuilles d'un arbre de HanlderNodes."
+            with tracer.span("decompose", "network") as span:
+                frames = handling.decompose(data)
+                span.args["frames"] = len(frames)
 
-    if tags is None:
-        tags = []
+            if RboConnection.stats is not None:
+                RboConnection.stats.decoded += len(frames)
 
-    leaves = []
+            self.frames.extend(frames)
+            self.tracedDecodeFrames(tracer)
 
-    for branch in tree.children.values():
-        if type(branch) == handling.HandlerNode:
-            leaves += leavesFullNames(branch, tags + [branch.tag])
-        else:
-            leaves.append("_".join(tags + [branch.name]))
+    def throttled(self) -> bool:
+        "Indique si la file d'events du thread réseau est pleine, decodeFrames() étant alors rappelé à la reprise de la lecture."
 
-    return leaves
+        return self.network is not None and self.network.throttle(self.transport, self.decodeFrames)
 
+    def decodeFrames(self) -> None:
+        "Décode les trames gardées et émet leurs events, jusqu'à ce que la file d'events du thread réseau soit pleine."
 
-class Event(object):
-    "Évènement à déclencher, avec ses paramètres."
+        if tracing.tracer is not None:
+            return self.tracedDecodeFrames(tracing.tracer)
 
-    def __init__(self, tag: str, **args):
-        self.name = tag
-        self.args = args
+        while len(self.frames) != 0 and not self.throttled():
+            event = self.decode(self.frames.popleft())
+            self.dispatch("on_" + event.name, **event.args)
 
+    def tracedDecodeFrames(self, tracer: tracing.Tracer) -> None:
+        while len(self.frames) != 0 and not self.throttled():
+            with tracer.span("decode", "network") as span:
+                event = self.decode(self.frames.popleft())
+                span.args["event"] = event.name
 
-def ignore(_: handling.Data) -> dict:
-    return {}
+            with tracer.span("on_" + event.name, "dispatch"):
+                self.dispatch("on_" + event.name, **event.args)
 
+    def decode(self, frame: handling.Data) -> handling.Event:
+        "Décode une trame avec l'arbre du mode actuel, puis change de mode si l'event décodé le demande."
 
-class IllegalArgName(ValueError):
-    def __init__(self, args: dict):
-        super().__init__("An argument has inappropriate name \"tag\" : " + str(args))
+        event = self.interface.handlers[self.mode](frame)
 
+        if event.name == "registered" or event.name == "session_stop":
+            self.mode = Mode.LOBBY
+        elif event.name == "session_prepared":
+            self.mode = Mode.SESSION
 
-class HandlerLeaf(object):
-    "Feuille de l'arbre pouvant être appelée pour retourner les données à utiliser lors du dispatch de l'event."
+        return event
 
-    def __init__(self, name: str, handler=ignore):
-        self.name = name
-        self.handler = handler
+    def dispatch(self, event: str, *args, **kwargs) -> None:
+        "Émet un event de l'interface sur le thread principal."
+
+        if self.network is None:
+            self.interface.dispatch(event, *args, **kwargs)
+        else:
+            self.network.post(self.interface.dispatch, event, *args, **kwargs)
 
-    def __call__(self, data: handling.Data, tags: "list[str]") -> Event:
-        args = self.handler(data)
-        if "tag" in args:
-            raise IllegalArgName(args)
+    def send(self, data: bytes) -> None:
+        if self.network is None:
+            self.transport.write(data)
+        else:
+            self.network.call(self.transport.write, data)
 
-        return Event("_".join(tags + [self.name]), **args)
+    def shutdown(self) -> None:
+        if self.network is None:
+            self.transport.loseConnection()
+        else:
+            self.network.call(self.transport.loseConnection)
 
 
 class DefaultHandler:
@@ -131,18 +160,19 @@ class RboConnectionInterface(protocol.Factory, EventDispatcher):
     """Interface du protocole Rbo.
 
     Elle se charge d'émettre les évènements déterminés par celui-ci, en plus de créer le protocole.\n
-    Elle permet aussi d'effectuer des envois de données sur la connexion.
+    Elle permet aussi d'effectuer des envois de données sur la connexion.\n
+    server est l'hôte et le port du serveur saisis à la connexion, None s'ils ne sont pas connus.
     """
 
-    def __init__(self, id: int, name: str, handlers: "dict[Mode, handling.HandlerNode]"):
+    def __init__(self, id: int, name: str, handlers: "dict[Mode, handling.HandlerNode]", server: "tuple[str, int]" = None):
         for tree in handlers.values():
-            for eventName in leavesFullNames(tree):
+            for eventName in handling.leavesFullNames(tree):
                 realName = "on_" + eventName
 
                 setattr(self, realName, DefaultHandler(realName))
                 self.register_event_type(realName)
 
-        for event in ["connected", "disconnected"]:
+        for event in ["connected", "disconnected", "received"]:
             self.register_event_type("on_" + event)
 
         super().__init__()
@@ -150,6 +180,7 @@ class RboConnectionInterface(protocol.Factory, EventDispatcher):
         self.id = id
         self.name = name
         self.handlers = handlers
+        self.server = server
 
     def buildProtocol(self, host: twisted.internet.address.IAddress):
         Logger.debug("RboCI : Building protocol for connection to " + str(host))
@@ -163,6 +194,9 @@ class RboConnectionInterface(protocol.Factory, EventDispatcher):
     def on_disconnected(self, reason: twisted.python.failure.Failure):
         Logger.info("RboCI : Disconnected : " + reason.getErrorMessage())
 
+    def on_received(self):
+        pass
+
     def confirm(self) -> None:
         self.connection.send(b"\x00")
 
@@ -0,0 +1,106 @@
+import threading
+from collections import deque
+
+from kivy.clock import Clock
+from kivy.logger import Logger
+
+# Thread réseau actif, None tant que le reactor Twisted est pompé par la boucle principale de Kivy (voir protocol)
+thread = None
+
+
+class NetworkThread:
+    """Fait tourner le reactor Twisted sur un thread dédié : la lecture des trames, leur décodage et les envois ne dépendent plus des frames.
+
+    post() dépose depuis ce thread un appel (le dispatch d'un event décodé) dans une file, drainée par drain() à chaque frame sur le thread principal.
+    La file est une deque, dont append() et popleft() sont atomiques : le passage d'un thread à l'autre ne prend aucun verrou.
+    Lorsqu'elle atteint capacity appels, throttle() suspend la lecture de la connexion (pauseProducing), le serveur étant alors ralenti par TCP,
+    jusqu'à ce que drain() l'ait vidée de moitié.
+    throttle() étant appelé avant chaque trame, les trames restantes d'une même lecture sont gardées par la connexion
+    et décodées à la reprise (resumed) : la file ne dépasse pas capacity appels, à l'event on_received de chaque lecture près.\n
+    call() exécute un appel sur le thread réseau depuis le thread principal (connexion, envoi d'une réponse, fermeture).
+    """
+
+    name = "rbo-network"
+
+    def __init__(self, capacity: int = 4096):
+        self.capacity = capacity
+        self.pending = deque()
+        self.paused = []  # Transports dont la lecture est suspendue, uniquement modifiés sur le thread réseau
+        self.resumed = []  # Appels à exécuter sur le thread réseau à la reprise de la lecture
+
+        self.reactor = None
+        self.thread = None
+        self.draining = None
+
+    def start(self) -> None:
+        # Le reactor par défaut de Twisted est installé à l'import de twisted.internet.reactor, protocol n'installe alors pas celui de Kivy
+        from twisted.internet import reactor
+
+        self.reactor = reactor
+        self.thread = threading.Thread(target=reactor.run, kwargs={"installSignalHandlers": False}, name=NetworkThread.name, daemon=True)
+        self.thread.start()
+
+        self.draining = Clock.schedule_interval(self.drain, 0)
+        Logger.info("NetworkThread : Twisted reactor running in " + NetworkThread.name)
+
+    def stop(self) -> None:
+        if self.thread is None:
+            return
+
+        self.draining.cancel()
+        self.reactor.callFromThread(self.reactor.stop)
+        self.thread.join(timeout=1)
+        self.thread = None
+
+    def call(self, function, *args, **kwargs) -> None:
+        self.reactor.callFromThread(function, *args, **kwargs)
+
+    def post(self, function, *args, **kwargs) -> None:
+        self.pending.append((function, args, kwargs))
+
+    def throttle(self, transport, resumed=None) -> bool:
+        """Suspend la lecture de transport si la file est pleine, à appeler sur le thread réseau avant de poster l'event d'une trame.
+
+        Retourne True si la file est pleine, la trame devant alors attendre l'appel de resumed à la reprise de la lecture.
+        """
+
+        if len(self.pending) < self.capacity:
+            return False
+
+        if transport not in self.paused:
+            transport.pauseProducing()
+            self.paused.append(transport)
+
+        if resumed is not None and resumed not in self.resumed:
+            self.resumed.append(resumed)
+
+        return True
+
+    def resume(self) -> None:
+        for transport in self.paused:
+            transport.resumeProducing()
+
+        (resumed, self.resumed) = (self.resumed, [])
+        self.paused = []
+
+        for function in resumed:
+            function()
+
+    def drain(self, _: float = None) -> None:
+        "Exécute les appels postés avant le début du drain, ceux postés pendant celui-ci attendant la frame suivante."
+
+        for i in range(len(self.pending)):
+            (function, args, kwargs) = self.pending.popleft()
+            function(*args, **kwargs)
+
+        if len(self.paused) != 0 and len(self.pending) <= self.capacity // 2:
+            self.call(self.resume)
+
+
+def start(capacity: int = 4096) -> NetworkThread:
+    global thread
+
+    thread = NetworkThread(capacity)
+    thread.start()
+
+    return thread
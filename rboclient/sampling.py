@@ -0,0 +1,111 @@
+import os
+import sys
+import threading
+from collections import Counter
+
+
+def frameName(code) -> str:
+    "Nom d'une frame dans un stack replié : fonction (fichier:ligne), sans les ';' servant de séparateurs."
+
+    name = getattr(code, "co_qualname", code.co_name)
+    return "{} ({}:{})".format(name, os.path.basename(code.co_filename), code.co_firstlineno).replace(";", ":")
+
+
+def prune(directory: str, suffix: str, keep: int) -> "list[str]":
+    """Supprime les fichiers de directory dont le nom se termine par suffix, sauf les keep derniers, et retourne leurs chemins.
+
+    Les noms commençant par la date et l'heure de leur écriture, les derniers sont ceux qui viennent en dernier dans l'ordre alphabétique.
+    """
+
+    try:
+        names = sorted(name for name in os.listdir(directory) if name.endswith(suffix))
+    except FileNotFoundError:
+        return []
+
+    removed = [os.path.join(directory, name) for name in names[:max(0, len(names) - keep)]]
+    for path in removed:
+        os.remove(path)
+
+    return removed
+
+
+class StackSampler:
+    """Profiler par échantillonnage des stacks du thread principal (Kivy et le reactor Twisted) et des threads nommés dans threads.
+
+    Un thread d'arrière-plan relève rate fois par seconde, avec sys._current_frames(), la stack de chacun de ces threads.
+    Les stacks identiques sont agrégées : seuls des compteurs sont incrémentés, le coût restant faible pour être laissé actif.\n
+    folded() et write() retournent ou écrivent les stacks au format replié ("thread;appelant;...;appelé nombre")
+    attendu par flamegraph.pl, speedscope ou inferno.
+    """
+
+    def __init__(self, rate: float = 100, threads: "list[str]" = None, maxDepth: int = 128):
+        self.interval = 1 / rate
+        self.threads = threads if threads is not None else []
+        self.maxDepth = maxDepth
+
+        self.stacks = Counter()
+        self.samples = 0
+        self.lock = threading.Lock()
+
+        self.thread = None
+        self.stopping = threading.Event()
+
+    def start(self) -> None:
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self.run, name="rbo-sampler", daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        if self.thread is None:
+            return
+
+        self.stopping.set()
+        self.thread.join()
+        self.thread = None
+
+    def run(self) -> None:
+        while not self.stopping.wait(self.interval):
+            self.sample()
+
+    def sampled(self) -> "dict[int, str]":
+        "Retourne le nom de chaque thread échantillonné, par identifiant."
+
+        sampled = {threading.main_thread().ident: "MainThread"}
+        for thread in threading.enumerate():
+            if thread.name in self.threads:
+                sampled[thread.ident] = thread.name
+
+        return sampled
+
+    def sample(self) -> None:
+        sampled = self.sampled()
+        stacks = []
+
+        for (ident, frame) in sys._current_frames().items():
+            if ident not in sampled:
+                continue
+
+            stack = []
+            while frame is not None and len(stack) < self.maxDepth:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+
+            stacks.append((sampled[ident], tuple(stack)))
+
+        with self.lock:
+            self.stacks.update(stacks)
+            self.samples += 1
+
+    def folded(self) -> "list[str]":
+        with self.lock:
+            stacks = list(self.stacks.items())
+
+        return ["{};{} {}".format(thread, ";".join(frameName(code) for code in reversed(stack)), count) for ((thread, stack), count) in stacks]
+
+    def write(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory != "":
+            os.makedirs(directory, exist_ok=True)
+
+        with open(path, "w", encoding="utf-8") as output:
+            output.writelines(line + "\n" for line in self.folded())
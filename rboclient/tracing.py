@@ -0,0 +1,84 @@
+import json
+import os
+import threading
+from collections import deque
+from time import perf_counter
+
+# Tracer actif, None tant que le tracing est désactivé : les points de trace ne coûtent alors qu'une comparaison
+tracer = None
+
+
+class Span:
+    "Intervalle de temps tracé, enregistré par son Tracer à la sortie du bloc with. Ses arguments (args) peuvent être complétés pendant le bloc."
+
+    def __init__(self, tracer: "Tracer", name: str, category: str, args: dict):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self) -> "Span":
+        self.begin = perf_counter()
+        return self
+
+    def __exit__(self, *_):
+        self.tracer.complete(self.name, self.category, self.begin, perf_counter(), self.args)
+
+
+class Tracer:
+    """Enregistre des évènements au format Trace Event (JSON), lisible par chrome://tracing, Perfetto ou speedscope.
+
+    span() retourne un Span à utiliser avec with, complete() enregistre directement un intervalle dont le début et la fin sont connus.
+    Seuls les maxEvents derniers évènements sont gardés, le tracing pouvant ainsi rester actif jusqu'à ce qu'un ralentissement survienne.
+    """
+
+    def __init__(self, maxEvents: int = 500000):
+        self.events = deque(maxlen=maxEvents)
+        self.origin = perf_counter()
+        self.pid = os.getpid()
+
+    def span(self, name: str, category: str, **args) -> Span:
+        return Span(self, name, category, args)
+
+    def complete(self, name: str, category: str, begin: float, end: float, args: dict = None) -> None:
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": (begin - self.origin) * 1e6,
+            "dur": (end - begin) * 1e6,
+            "pid": self.pid,
+            "tid": threading.get_ident()
+        }
+
+        if args:
+            event["args"] = args
+
+        self.events.append(event)
+
+    def write(self, path: str) -> None:
+        directory = os.path.dirname(path)
+        if directory != "":
+            os.makedirs(directory, exist_ok=True)
+
+        threadNames = [{"name": "thread_name", "ph": "M", "pid": self.pid, "tid": thread.ident, "args": {"name": thread.name}}
+                       for thread in threading.enumerate()]
+
+        with open(path, "w", encoding="utf-8") as output:
+            json.dump({"traceEvents": threadNames + list(self.events), "displayTimeUnit": "ms"}, output)
+
+
+def enable(maxEvents: int = 500000) -> Tracer:
+    global tracer
+
+    tracer = Tracer(maxEvents)
+    return tracer
+
+
+def disable() -> Tracer:
+    "Désactive le tracing et retourne le Tracer qui était actif."
+
+    global tracer
+
+    (previous, tracer) = (tracer, None)
+    return previous
@@ -0,0 +1,250 @@
+import json
+import os
+import re
+import struct
+import unicodedata
+import zlib
+from bisect import bisect, bisect_left
+
+# Balises de markup Kivy ([b], [color=#ff0000], [/ref]...) et entités échappées
+markupTag = re.compile(r"\[/?(?:b|i|u|s|sub|sup|font|font_context|font_family|font_features|text_language|size|color|ref|anchor)(?:=[^\]]*)?\]")
+markupEntities = [("&bl;", "["), ("&br;", "]"), ("&amp;", "&")]
+
+word = re.compile(r"\w+")
+
+
+def stripMarkup(text: str) -> str:
+    "Retire les balises de markup Kivy d'un texte et remplace ses entités échappées par les caractères correspondants."
+
+    text = markupTag.sub("", text)
+    for (entity, char) in markupEntities:
+        text = text.replace(entity, char)
+
+    return text
+
+
+def contains(ids: "list[int]", id: int) -> bool:
+    "Recherche dichotomique d'un numéro dans une liste triée."
+
+    i = bisect_left(ids, id)
+    return i < len(ids) and ids[i] == id
+
+
+def tokenize(text: str) -> "list[str]":
+    "Découpe un texte en mots normalisés : sans markup, en minuscules et sans accents."
+
+    normalized = unicodedata.normalize("NFKD", stripMarkup(text).casefold())
+    normalized = "".join(c for c in normalized if not unicodedata.combining(c))
+
+    return word.findall(normalized)
+
+
+class TranscriptIndex:
+    """Index inversé des entrées de l'historique d'une session.
+
+    add() indexe une nouvelle entrée et retourne son numéro, les entrées étant numérotées dans leur ordre d'ajout à partir de 0.\n
+    search() retourne, dans l'ordre, les numéros des entrées contenant tous les mots de la requête,
+    sans parcourir l'historique : seules les listes d'entrées associées aux mots de la requête sont consultées.\n
+    save() enregistre l'index avec le nombre d'entrées indexées et load() le reprend,
+    afin de n'indexer à la réouverture de l'historique que les entrées ajoutées depuis.
+    """
+
+    def __init__(self):
+        self.postings = {}
+        self.count = 0
+
+    def add(self, text: str) -> int:
+        id = self.count
+        self.count += 1
+
+        for token in set(tokenize(text)):
+            self.postings.setdefault(token, []).append(id)
+
+        return id
+
+    def clear(self) -> None:
+        self.postings = {}
+        self.count = 0
+
+    def load(self, path: str) -> None:
+        "Reprend l'index enregistré avec save(), ou le vide si le fichier n'existe pas ou est illisible."
+
+        self.clear()
+
+        try:
+            with open(path, encoding="utf-8") as file:
+                saved = json.load(file)
+        except (FileNotFoundError, ValueError):
+            return
+
+        self.postings = saved["postings"]
+        self.count = saved["count"]
+
+    def save(self, path: str) -> None:
+        # Écrit dans un fichier temporaire remplaçant l'ancien index, qui reste lisible en cas d'interruption
+        with open(path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump({"count": self.count, "postings": self.postings}, file)
+
+        os.replace(path + ".tmp", path)
+
+    def search(self, query: str) -> "list[int]":
+        tokens = set(tokenize(query))
+        if len(tokens) == 0:
+            return []
+
+        postings = sorted((self.postings.get(token, []) for token in tokens), key=len)
+
+        # Les listes sont déjà triées, l'intersection part de la plus courte et cherche ses numéros dans les autres par dichotomie
+        matches = postings[0]
+        for other in postings[1:]:
+            matches = [id for id in matches if contains(other, id)]
+
+        return matches
+
+
+class TranscriptFile:
+    """Historique d'une partie enregistré sur le disque, en ajout seulement, dont les entrées sont lues par pages.
+
+    Les entrées (toute valeur sérialisable en JSON) sont regroupées en blocs de blockSize entrées.
+    Le bloc en cours est écrit au fil de l'eau dans le fichier <path>.tail, une entrée JSON par ligne après le numéro de sa première entrée.
+    Une fois complet, il est compressé avec zlib et ajouté à la fin du fichier <path>.log,
+    sa position, sa taille et son nombre d'entrées étant ajoutés au fichier <path>.idx (enregistrements de taille fixe).\n
+    read() ne décompresse que les blocs contenant les entrées demandées, le dernier bloc décompressé étant gardé en mémoire.
+    La mémoire utilisée ne dépend donc que de la taille des blocs et du nombre de blocs fermés, pas du nombre d'entrées.\n
+    Un fichier existant est repris là où il s'était arrêté, y compris après une interruption pendant la fermeture d'un bloc.
+    """
+
+    record = struct.Struct("<QII")
+
+    def __init__(self, path: str, blockSize: int = 256):
+        self.path = path
+        self.blockSize = blockSize
+
+        self.blocks = []  # Position et taille de chaque bloc fermé dans le fichier .log
+        self.starts = []  # Numéro de la première entrée de chaque bloc fermé
+        self.closed = 0  # Nombre d'entrées dans les blocs fermés
+        self.tail = []
+        self.cached = (None, None)
+
+        directory = os.path.dirname(path)
+        if directory != "":
+            os.makedirs(directory, exist_ok=True)
+
+        self.loadIndex()
+        self.loadTail()
+
+        self.data = open(path + ".log", "ab")
+        self.reader = open(path + ".log", "rb")
+        self.index = open(path + ".idx", "ab")
+        self.tailFile = open(path + ".tail", "a", encoding="utf-8")
+        self.rewriteTail()
+
+    def loadIndex(self) -> None:
+        try:
+            with open(self.path + ".idx", "rb") as index:
+                content = index.read()
+        except FileNotFoundError:
+            return
+
+        # Un enregistrement incomplet (interruption pendant son écriture) est ignoré
+        complete = len(content) - len(content) % TranscriptFile.record.size
+        for (offset, size, count) in TranscriptFile.record.iter_unpack(content[:complete]):
+            self.blocks.append((offset, size))
+            self.starts.append(self.closed)
+            self.closed += count
+
+    def loadTail(self) -> None:
+        try:
+            with open(self.path + ".tail", encoding="utf-8") as tail:
+                lines = tail.read().splitlines()
+        except FileNotFoundError:
+            return
+
+        if len(lines) == 0:
+            return
+
+        start = int(lines[0])
+        entries = [json.loads(line) for line in lines[1:]]
+
+        # Si le bloc a été fermé sans que le fichier .tail n'ait été vidé, ses entrées déjà fermées ne sont pas reprises
+        self.tail = entries[max(0, self.closed - start):]
+
+    def rewriteTail(self) -> None:
+        self.tailFile.seek(0)
+        self.tailFile.truncate()
+        self.tailFile.write("{}\n".format(self.closed))
+        self.tailFile.writelines(json.dumps(entry) + "\n" for entry in self.tail)
+        self.tailFile.flush()
+
+    def __len__(self) -> int:
+        return self.closed + len(self.tail)
+
+    def append(self, entry) -> int:
+        id = len(self)
+
+        self.tail.append(entry)
+        self.tailFile.write(json.dumps(entry) + "\n")
+        self.tailFile.flush()
+
+        if len(self.tail) >= self.blockSize:
+            self.closeBlock()
+
+        return id
+
+    def closeBlock(self) -> None:
+        block = zlib.compress(json.dumps(self.tail).encode("utf-8"))
+
+        offset = self.data.seek(0, os.SEEK_END)
+        self.data.write(block)
+        self.data.flush()
+
+        self.index.write(TranscriptFile.record.pack(offset, len(block), len(self.tail)))
+        self.index.flush()
+
+        self.blocks.append((offset, len(block)))
+        self.starts.append(self.closed)
+        self.closed += len(self.tail)
+        self.tail = []
+
+        self.rewriteTail()
+
+    def block(self, n: int) -> list:
+        if self.cached[0] != n:
+            (offset, size) = self.blocks[n]
+            self.reader.seek(offset)
+            self.cached = (n, json.loads(zlib.decompress(self.reader.read(size)).decode("utf-8")))
+
+        return self.cached[1]
+
+    def read(self, first: int, count: int) -> list:
+        "Retourne les entrées à partir du numéro first, au plus count entrées."
+
+        end = min(first + count, len(self))
+        first = max(0, first)
+        entries = []
+
+        while first < end and first < self.closed:
+            n = bisect(self.starts, first) - 1
+            begin = first - self.starts[n]
+            block = self.block(n)
+
+            entries += block[begin:begin + end - first]
+            first = self.starts[n] + len(block)
+
+        if first < end:
+            entries += self.tail[first - self.closed:end - self.closed]
+
+        return entries
+
+    def entries(self, first: int = 0):
+        "Parcourt les entrées à partir du numéro first, un bloc à la fois, sans décompresser les blocs précédents."
+
+        start = bisect(self.starts, first) - 1 if first < self.closed else len(self.blocks)
+        for n in range(max(0, start), len(self.blocks)):
+            yield from self.block(n)[max(0, first - self.starts[n]):]
+
+        yield from self.tail[max(0, first - self.closed):]
+
+    def close(self) -> None:
+        for file in [self.data, self.reader, self.index, self.tailFile]:
+            file.close()
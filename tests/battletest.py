@@ -0,0 +1,59 @@
+import unittest
+
+from rboclient.battle import Battle, enemiesHP
+from rboclient.network.handlerstree import Attacker
+
+
+class EnemiesHP(unittest.TestCase):
+    def test_Values(self):
+        self.assertEqual(enemiesHP({"Gobelin": 10, "Orc": 25}), [("Gobelin", 10), ("Orc", 25)])
+
+    def test_Stats(self):
+        self.assertEqual(enemiesHP({"Gobelin": {"hp": 10, "atk": 2}, "Orc": {}}), [("Gobelin", 10), ("Orc", 0)])
+
+    def test_List(self):
+        self.assertEqual(enemiesHP([{"name": "Gobelin", "hp": 10}]), [("Gobelin", 10)])
+
+
+class BattleAttack(unittest.TestCase):
+    def setUp(self):
+        self.battle = Battle({"Gobelin": 10, "Orc": 25})
+        self.battle.changes()
+
+    def test_PlayerAttack(self):
+        self.battle.attack(1, "Orc", Attacker.Player, 7)
+
+        self.assertEqual(self.battle.hp[self.battle.index["Orc"]], 18)
+        self.assertEqual(self.battle.dealt, {1: 7})
+        self.assertEqual(self.battle.changes(), ([1], [1]))
+
+    def test_EnemyAttack(self):
+        self.battle.attack(2, "Gobelin", Attacker.Enemy, 4)
+        self.battle.attack(2, "Gobelin", Attacker.Enemy, 3)
+
+        self.assertEqual(list(self.battle.hp), [10, 25])
+        self.assertEqual(self.battle.taken, {2: 7})
+        self.assertEqual(self.battle.changes(), ([], [2]))
+
+    def test_HPFloor(self):
+        self.battle.attack(1, "Gobelin", Attacker.Player, 15)
+
+        self.assertEqual(self.battle.hp[0], 0)
+        self.assertEqual(self.battle.alive(), 1)
+
+    def test_UnknownEnemy(self):
+        self.battle.attack(1, "Dragon", Attacker.Player, 5)
+
+        self.assertEqual(self.battle.names, ["Gobelin", "Orc", "Dragon"])
+        self.assertEqual(self.battle.hp[2], -5)
+        self.assertEqual(self.battle.alive(), 3)
+
+    def test_ChangesCleared(self):
+        self.battle.attack(1, "Orc", Attacker.Player, 1)
+        self.battle.changes()
+
+        self.assertEqual(self.battle.changes(), ([], []))
+
+
+if __name__ == "__main__":
+    unittest.main()
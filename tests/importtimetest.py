@@ -0,0 +1,68 @@
+import os
+import subprocess
+import sys
+import unittest
+from importlib.util import find_spec
+
+# Le temps d'import de rboclient.gui.app est comparé à celui de kivy.app, mesuré sur la même machine pendant le même test,
+# plutôt qu'à une durée absolue qui dépendrait de la machine.
+# Relevé avec python -X importtime (meilleur de 3) : 1,8 à 2,1 fois kivy.app, contre 2,6 fois en important tout au démarrage
+REFERENCE = "kivy.app"
+BUDGET_RATIO = 2.3
+RUNS = 3
+
+# Modules lourds qui ne doivent être importés qu'une fois la connexion au serveur demandée
+DEFERRED = [
+    "rboclient.gui.game",
+    "rboclient.gui.lobby",
+    "rboclient.gui.session",
+    "rboclient.network.protocol",
+    "twisted.internet.endpoints",
+    "twisted.internet.reactor"
+]
+
+
+def importTimes(module: str) -> "dict[str, int]":
+    "Importe module dans un nouvel interpréteur et retourne le temps d'import cumulé (en µs) de chaque module importé."
+
+    env = dict(os.environ, KIVY_NO_ARGS="1", KIVY_NO_CONSOLELOG="1", KIVY_NO_FILELOG="1")
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", "import " + module],
+                             env=env, capture_output=True, text=True, check=True)
+
+    times = {}
+    for line in process.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+
+        (_, cumulative, name) = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+
+    return times
+
+
+@unittest.skipIf(find_spec("kivy") is None, "Kivy isn't installed")
+class StartupImport(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.runs = []
+        cls.references = []
+
+        # Les mesures sont alternées pour qu'une variation de charge de la machine touche les deux de la même façon
+        for i in range(RUNS):
+            cls.runs.append(importTimes("rboclient.gui.app"))
+            cls.references.append(importTimes(REFERENCE)[REFERENCE])
+
+    def test_DeferredModules(self):
+        for module in DEFERRED:
+            self.assertNotIn(module, self.runs[0])
+
+    def test_Budget(self):
+        best = min(run["rboclient.gui.app"] for run in self.runs)
+        reference = min(self.references)
+
+        self.assertLessEqual(best, reference * BUDGET_RATIO,
+                             "Import of startup path took {} µs, {:.2f} times {} ({} µs)".format(best, best / reference, REFERENCE, reference))
+
+
+if __name__ == "__main__":
+    unittest.main()
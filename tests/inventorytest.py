@@ -0,0 +1,97 @@
+import unittest
+
+from rboclient.inventory import ItemsIndex
+
+
+class ItemsIndexUpdate(unittest.TestCase):
+    def setUp(self):
+        self.index = ItemsIndex()
+
+        for (name, quantity) in [("Épée", 1), ("Flèche", 20), ("Fiole", 3), ("Pain", 5)]:
+            self.index.update(name, quantity)
+
+    def test_Insert(self):
+        self.assertEqual(self.index.total, 29)
+        self.assertEqual(self.index.byName, ["Fiole", "Flèche", "Pain", "Épée"])
+        self.assertEqual(self.index.top(4), [("Flèche", 20), ("Pain", 5), ("Fiole", 3), ("Épée", 1)])
+
+    def test_MoveUp(self):
+        self.index.update("Épée", 10)
+
+        self.assertEqual(self.index.total, 38)
+        self.assertEqual(self.index.top(2), [("Flèche", 20), ("Épée", 10)])
+        self.assertEqual(len(self.index.byQuantity), 4)
+
+    def test_MoveDown(self):
+        self.index.update("Flèche", 2)
+
+        self.assertEqual(self.index.total, 11)
+        self.assertEqual(self.index.top(4), [("Pain", 5), ("Fiole", 3), ("Flèche", 2), ("Épée", 1)])
+        self.assertEqual(self.index.byName, ["Fiole", "Flèche", "Pain", "Épée"])
+
+    def test_Unchanged(self):
+        self.index.update("Pain", 5)
+
+        self.assertEqual(self.index.total, 29)
+        self.assertEqual(len(self.index.byQuantity), 4)
+
+    def test_Remove(self):
+        self.index.update("Fiole", None)
+
+        self.assertEqual(self.index.total, 26)
+        self.assertNotIn("Fiole", self.index.quantities)
+        self.assertEqual(self.index.byName, ["Flèche", "Pain", "Épée"])
+        self.assertEqual(self.index.top(4), [("Flèche", 20), ("Pain", 5), ("Épée", 1)])
+
+    def test_RemoveUnknown(self):
+        self.index.update("Bouclier", None)
+
+        self.assertEqual(self.index.total, 29)
+        self.assertEqual(self.index.byName, ["Fiole", "Flèche", "Pain", "Épée"])
+
+    def test_ReAdd(self):
+        self.index.update("Pain", None)
+        self.index.update("Pain", 7)
+
+        self.assertEqual(self.index.total, 31)
+        self.assertEqual(self.index.byName, ["Fiole", "Flèche", "Pain", "Épée"])
+        self.assertEqual(self.index.top(2), [("Flèche", 20), ("Pain", 7)])
+
+
+class ItemsIndexQueries(unittest.TestCase):
+    def setUp(self):
+        self.index = ItemsIndex()
+
+        for (name, quantity) in [("Potion", 4), ("Corde", 4), ("Pomme", 9), ("Pioche", 1), ("Arc", 4)]:
+            self.index.update(name, quantity)
+
+    def test_TopTies(self):
+        "À quantité égale, les objets sont classés par nom."
+
+        self.assertEqual(self.index.top(4), [("Pomme", 9), ("Arc", 4), ("Corde", 4), ("Potion", 4)])
+
+    def test_TopAfterUpdate(self):
+        self.index.update("Arc", 3)
+        self.index.update("Pioche", 4)
+
+        self.assertEqual(self.index.top(4), [("Pomme", 9), ("Corde", 4), ("Pioche", 4), ("Potion", 4)])
+        self.assertEqual(self.index.total, 24)
+
+    def test_TopLarger(self):
+        self.assertEqual(len(self.index.top(10)), 5)
+
+    def test_Prefix(self):
+        self.assertEqual(self.index.withPrefix("Po"), ["Pomme", "Potion"])
+        self.assertEqual(self.index.withPrefix("P"), ["Pioche", "Pomme", "Potion"])
+        self.assertEqual(self.index.withPrefix("Z"), [])
+        self.assertEqual(self.index.withPrefix(""), ["Arc", "Corde", "Pioche", "Pomme", "Potion"])
+
+    def test_PrefixAfterRemove(self):
+        self.index.update("Pomme", None)
+
+        self.assertEqual(self.index.withPrefix("Po"), ["Potion"])
+        self.assertEqual(self.index.total, 13)
+
+
+if __name__ == "__main__":
+    unittest.main()
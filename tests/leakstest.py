@@ -0,0 +1,75 @@
+import os
+import unittest
+from collections import Counter
+from importlib.util import find_spec
+
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+
+
+@unittest.skipIf(find_spec("kivy") is None, "Kivy isn't installed")
+class Observers(unittest.TestCase):
+    def setUp(self):
+        from kivy.event import EventDispatcher
+        from kivy.properties import NumericProperty
+
+        class Dispatcher(EventDispatcher):
+            __events__ = ("on_a", "on_b")
+            value = NumericProperty(0)
+
+            def on_a(self):
+                pass
+
+            def on_b(self):
+                pass
+
+        self.dispatcher = Dispatcher()
+
+    def test_Events(self):
+        from rboclient.gui.leaks import observers
+
+        self.dispatcher.bind(on_a=lambda _: None)
+        self.dispatcher.bind(on_a=lambda _: None, on_b=lambda _: None)
+
+        counts = observers(self.dispatcher)
+        self.assertEqual(counts["on_a"], 2)
+        self.assertEqual(counts["on_b"], 1)
+
+    def test_Unbound(self):
+        from rboclient.gui.leaks import observers
+
+        def handler(_):
+            pass
+
+        self.dispatcher.bind(on_a=handler)
+        self.dispatcher.unbind(on_a=handler)
+
+        self.assertEqual(observers(self.dispatcher)["on_a"], 0)
+
+    def test_Properties(self):
+        from rboclient.gui.leaks import observers
+
+        before = observers(self.dispatcher)["value"]
+        self.dispatcher.bind(value=lambda *_: None)
+
+        self.assertEqual(observers(self.dispatcher)["value"], before + 1)
+
+
+@unittest.skipIf(find_spec("kivy") is None, "Kivy isn't installed")
+class Growth(unittest.TestCase):
+    def test_Growth(self):
+        from rboclient.gui.leaks import growth
+
+        before = Counter({"Label": 10, "Button": 4, "Popup": 2})
+        after = Counter({"Label": 12, "Button": 4, "Popup": 1, "GameLog": 5})
+
+        self.assertEqual(growth(before, after), [("GameLog", 0, 5), ("Label", 10, 12)])
+
+    def test_Stable(self):
+        from rboclient.gui.leaks import growth
+
+        counts = Counter({"Label": 10})
+        self.assertEqual(growth(counts, Counter(counts)), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+
+from rboclient.misc import LRUCache
+
+
+class LRUCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.cache = LRUCache(2)
+
+    def test_Miss(self):
+        self.assertIsNone(self.cache.get("a"))
+        self.assertEqual(self.cache.misses, 1)
+        self.assertEqual(self.cache.hitRate(), 0)
+
+    def test_Hit(self):
+        self.cache.put("a", 1)
+
+        self.assertEqual(self.cache.get("a"), 1)
+        self.assertEqual(self.cache.get("b", 2), 2)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+        self.assertEqual(self.cache.hitRate(), .5)
+
+    def test_EvictLeastRecentlyUsed(self):
+        self.cache.put("a", 1)
+        self.cache.put("b", 2)
+        self.cache.get("a")
+        self.cache.put("c", 3)
+
+        self.assertEqual(len(self.cache), 2)
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.get("a"), 1)
+        self.assertEqual(self.cache.get("c"), 3)
+
+    def test_Replace(self):
+        self.cache.put("a", 1)
+        self.cache.put("a", 2)
+
+        self.assertEqual(len(self.cache), 1)
+        self.assertEqual(self.cache.get("a"), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from rboclient.sampling import StackSampler, prune
+
+
+def busy(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+class StackSamplerTest(unittest.TestCase):
+    def setUp(self):
+        self.stop = threading.Event()
+        self.worker = threading.Thread(target=busy, args=(self.stop,), name="worker")
+        self.worker.start()
+
+    def tearDown(self):
+        self.stop.set()
+        self.worker.join()
+
+    def test_SampledThreads(self):
+        sampler = StackSampler(threads=["worker"])
+        sampler.sample()
+
+        threads = set(line.split(";")[0] for line in sampler.folded())
+        self.assertEqual(threads, {"MainThread", "worker"})
+
+    def test_UnnamedThreadIgnored(self):
+        sampler = StackSampler()
+        sampler.sample()
+
+        self.assertTrue(all(line.startswith("MainThread;") for line in sampler.folded()))
+
+    def test_Aggregated(self):
+        sampler = StackSampler(threads=["worker"])
+        for i in range(5):
+            sampler.sample()
+
+        counts = [int(line.rsplit(" ", 1)[1]) for line in sampler.folded()]
+        self.assertEqual(sampler.samples, 5)
+        self.assertEqual(sum(counts), 10)  # Deux threads échantillonnés à chaque fois
+
+    def test_Folded(self):
+        sampler = StackSampler(threads=["worker"])
+        sampler.sample()
+
+        worker = [line for line in sampler.folded() if line.startswith("worker;")][0]
+        self.assertIn("busy (samplingtest.py:", worker)
+        self.assertLess(worker.index("run (threading.py:"), worker.index("busy (samplingtest.py:"))
+
+    def test_Background(self):
+        sampler = StackSampler(rate=200)
+        sampler.start()
+        time.sleep(.2)
+        sampler.stop()
+
+        self.assertGreater(sampler.samples, 0)
+
+    def test_Write(self):
+        sampler = StackSampler()
+        sampler.sample()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "profiles", "samples.folded")
+            sampler.write(path)
+
+            with open(path, encoding="utf-8") as output:
+                self.assertEqual(output.read().splitlines(), sampler.folded())
+
+
+class Prune(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+        for name in ["20260101-120000-samples.folded", "20260102-090000-samples.folded", "20260101-180000-samples.folded",
+                     "20260101-100000-profile.prof"]:
+            open(os.path.join(self.directory.name, name), "w").close()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_KeepLast(self):
+        removed = prune(self.directory.name, "-samples.folded", 2)
+
+        self.assertEqual(removed, [os.path.join(self.directory.name, "20260101-120000-samples.folded")])
+        self.assertEqual(sorted(os.listdir(self.directory.name)),
+                         ["20260101-100000-profile.prof", "20260101-180000-samples.folded", "20260102-090000-samples.folded"])
+
+    def test_FewerFiles(self):
+        self.assertEqual(prune(self.directory.name, "-samples.folded", 5), [])
+        self.assertEqual(len(os.listdir(self.directory.name)), 4)
+
+    def test_MissingDirectory(self):
+        self.assertEqual(prune(os.path.join(self.directory.name, "missing"), "-samples.folded", 2), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
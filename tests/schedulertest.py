@@ -0,0 +1,141 @@
+import os
+import unittest
+from importlib.util import find_spec
+from time import perf_counter
+
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+
+STATS_UNITS = 200
+UNIT_COST = .0002  # Durée d'une mise à jour de stats, en secondes, soit 5 unités par frame avec le budget par défaut
+
+
+class RunningApp:
+    "Tâches de l'application, les seules utilisées par le FrameScheduler."
+
+    def __init__(self):
+        self.runningTasks = []
+
+    def isRunning(self, name: str) -> bool:
+        return name in self.runningTasks
+
+    def runTask(self, name: str) -> None:
+        self.runningTasks.append(name)
+
+    def stopTask(self, name: str) -> None:
+        self.runningTasks.remove(name)
+
+
+def busy(_=None) -> None:
+    end = perf_counter() + UNIT_COST
+    while perf_counter() < end:
+        pass
+
+
+@unittest.skipIf(find_spec("kivy") is None, "Kivy isn't installed")
+class Dependencies(unittest.TestCase):
+    def setUp(self):
+        from kivy.app import App
+
+        App._running_app = RunningApp()
+        self.order = []
+
+    def tearDown(self):
+        from kivy.app import App
+
+        App._running_app = None
+
+    def scheduler(self, dependencies):
+        from rboclient.gui.scheduler import FrameScheduler
+
+        return FrameScheduler(dependencies=dependencies)
+
+    def push(self, scheduler, priority, name: str) -> None:
+        scheduler.push(priority, self.order.append, name)
+
+    def test_Ordered(self):
+        from rboclient.gui.scheduler import FrameScheduler, Priority
+
+        scheduler = self.scheduler(FrameScheduler.ordered)
+        self.push(scheduler, Priority.TEXT, "text")
+        self.push(scheduler, Priority.STATS, "stats")
+        self.push(scheduler, Priority.STATE, "death")
+        self.push(scheduler, Priority.INPUT, "request")
+        scheduler.flush()
+
+        self.assertEqual(self.order, ["stats", "death", "request", "text"])
+
+    def test_RequestsFirst(self):
+        from rboclient.gui.scheduler import FrameScheduler, Priority
+
+        scheduler = self.scheduler(FrameScheduler.requestsFirst)
+        self.push(scheduler, Priority.TEXT, "text")
+        self.push(scheduler, Priority.STATS, "stats")
+        self.push(scheduler, Priority.INPUT, "request")
+        scheduler.flush()
+
+        self.assertEqual(self.order, ["request", "stats", "text"])
+
+    def test_RequestsFirstAfterState(self):
+        "Une requête attend toujours les morts et déconnexions reçues avant elle, et donc les stats les précédant."
+
+        from rboclient.gui.scheduler import FrameScheduler, Priority
+
+        scheduler = self.scheduler(FrameScheduler.requestsFirst)
+        self.push(scheduler, Priority.STATS, "stats")
+        self.push(scheduler, Priority.STATE, "death")
+        self.push(scheduler, Priority.INPUT, "request")
+        scheduler.flush()
+
+        self.assertEqual(self.order, ["stats", "death", "request"])
+
+
+@unittest.skipIf(find_spec("kivy") is None, "Kivy isn't installed")
+class RequestLatency(unittest.TestCase):
+    "Latence entre l'arrivée d'une requête et son traitement, derrière une salve de mises à jour de stats."
+
+    def setUp(self):
+        from kivy.app import App
+
+        App._running_app = RunningApp()
+
+    def tearDown(self):
+        from kivy.app import App
+
+        App._running_app = None
+
+    def latency(self, dependencies) -> "tuple[int, float]":
+        "Retourne le nombre de frames jusqu'au traitement de la requête (comprise) et le temps qu'elle a attendu, en secondes."
+
+        from rboclient.gui.scheduler import FrameScheduler, Priority
+
+        scheduler = FrameScheduler(dependencies=dependencies)
+        handled = []
+
+        for i in range(STATS_UNITS):
+            scheduler.push(Priority.STATS, busy)
+        scheduler.push(Priority.INPUT, handled.append, True)
+
+        frames = 0
+        while len(handled) == 0:
+            scheduler.process()
+            frames += 1
+
+        scheduler.flush()
+        return (frames, scheduler.waiting[Priority.INPUT].max)
+
+    def test_Latency(self):
+        from rboclient.gui.scheduler import FrameScheduler
+
+        (orderedFrames, orderedWait) = self.latency(FrameScheduler.ordered)
+        (firstFrames, firstWait) = self.latency(FrameScheduler.requestsFirst)
+
+        summary = "request handled after {} frames ({:.1f} ms) in order, {} frames ({:.1f} ms) first".format(
+            orderedFrames, orderedWait * 1e3, firstFrames, firstWait * 1e3)
+
+        self.assertEqual(firstFrames, 1, summary)
+        self.assertGreaterEqual(orderedFrames, STATS_UNITS * UNIT_COST / .001 / 2, summary)
+        self.assertLess(firstWait, orderedWait, summary)
+
+
+if __name__ == "__main__":
+    unittest.main()
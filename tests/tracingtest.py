@@ -0,0 +1,68 @@
+import json
+import os
+import tempfile
+import unittest
+
+from rboclient import tracing
+
+
+class TracerTest(unittest.TestCase):
+    def setUp(self):
+        self.tracer = tracing.Tracer()
+
+    def test_Span(self):
+        with self.tracer.span("decode", "network", size=3) as span:
+            span.args["event"] = "text_normal"
+
+        (event,) = self.tracer.events
+        self.assertEqual((event["name"], event["cat"], event["ph"]), ("decode", "network", "X"))
+        self.assertEqual(event["args"], {"size": 3, "event": "text_normal"})
+        self.assertGreaterEqual(event["dur"], 0)
+
+    def test_NestedSpans(self):
+        with self.tracer.span("dataReceived", "network"):
+            with self.tracer.span("decompose", "network"):
+                pass
+
+        (inner, outer) = self.tracer.events
+        self.assertLessEqual(outer["ts"], inner["ts"])
+        self.assertGreaterEqual(outer["ts"] + outer["dur"], inner["ts"] + inner["dur"])
+
+    def test_NoArgs(self):
+        self.tracer.complete("render", "frame", self.tracer.origin, self.tracer.origin + .001)
+
+        self.assertNotIn("args", self.tracer.events[0])
+        self.assertAlmostEqual(self.tracer.events[0]["dur"], 1000, places=3)
+
+    def test_MaxEvents(self):
+        tracer = tracing.Tracer(maxEvents=2)
+        for name in ["a", "b", "c"]:
+            tracer.complete(name, "test", 0, 0)
+
+        self.assertEqual([event["name"] for event in tracer.events], ["b", "c"])
+
+    def test_Write(self):
+        with self.tracer.span("decode", "network"):
+            pass
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "traces", "trace.json")
+            self.tracer.write(path)
+
+            with open(path, encoding="utf-8") as output:
+                trace = json.load(output)
+
+        phases = [event["ph"] for event in trace["traceEvents"]]
+        self.assertIn("M", phases)
+        self.assertEqual(phases[-1], "X")
+
+    def test_EnableDisable(self):
+        tracer = tracing.enable()
+        self.assertIs(tracing.tracer, tracer)
+
+        self.assertIs(tracing.disable(), tracer)
+        self.assertIsNone(tracing.tracer)
+
+
+if __name__ == "__main__":
+    unittest.main()
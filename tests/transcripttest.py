@@ -0,0 +1,176 @@
+import os
+import tempfile
+import unittest
+
+from rboclient import transcript
+
+
+class StripMarkup(unittest.TestCase):
+    def test_NoMarkup(self):
+        self.assertEqual(transcript.stripMarkup("Hello world!"), "Hello world!")
+
+    def test_Tags(self):
+        self.assertEqual(transcript.stripMarkup("[b]Hello[/b] [color=#ff0000]world[/color]!"), "Hello world!")
+
+    def test_Entities(self):
+        self.assertEqual(transcript.stripMarkup("&bl;b&br; &amp; [i]i[/i]"), "[b] & i")
+
+    def test_UnknownTag(self):
+        self.assertEqual(transcript.stripMarkup("[42] Hello"), "[42] Hello")
+
+
+class Tokenize(unittest.TestCase):
+    def test_Normalized(self):
+        self.assertEqual(transcript.tokenize("[b]L'Épée[/b] du Roi"), ["l", "epee", "du", "roi"])
+
+
+class TranscriptIndexSearch(unittest.TestCase):
+    def setUp(self):
+        self.index = transcript.TranscriptIndex()
+
+        for line in ["Le joueur [b]Alice[/b] attaque le gobelin.",
+                     "Le gobelin est mort.",
+                     "[i]Alice trouve une épée.[/i]",
+                     "Bob attaque le gobelin avec une épée."]:
+            self.index.add(line)
+
+    def test_EmptyQuery(self):
+        self.assertEqual(self.index.search(" [b] "), [])
+
+    def test_UnknownWord(self):
+        self.assertEqual(self.index.search("dragon"), [])
+
+    def test_SingleWord(self):
+        self.assertEqual(self.index.search("gobelin"), [0, 1, 3])
+
+    def test_AllWords(self):
+        self.assertEqual(self.index.search("Épée attaque"), [3])
+
+    def test_MarkupIgnored(self):
+        self.assertEqual(self.index.search("alice"), [0, 2])
+
+    def test_Clear(self):
+        self.index.clear()
+
+        self.assertEqual(self.index.search("gobelin"), [])
+        self.assertEqual(self.index.add("gobelin"), 0)
+
+
+class TranscriptIndexSave(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "game.search")
+        self.index = transcript.TranscriptIndex()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_Missing(self):
+        self.index.add("gobelin")
+        self.index.load(self.path)
+
+        self.assertEqual(self.index.count, 0)
+        self.assertEqual(self.index.search("gobelin"), [])
+
+    def test_Reload(self):
+        self.index.add("Le gobelin attaque.")
+        self.index.add("Alice trouve une épée.")
+        self.index.save(self.path)
+
+        restored = transcript.TranscriptIndex()
+        restored.load(self.path)
+
+        self.assertEqual(restored.count, 2)
+        self.assertEqual(restored.search("epee"), [1])
+        self.assertEqual(restored.add("Le gobelin est mort."), 2)
+        self.assertEqual(restored.search("gobelin"), [0, 2])
+
+    def test_Unreadable(self):
+        with open(self.path, "w", encoding="utf-8") as file:
+            file.write('{"count": 3, "post')
+
+        self.index.load(self.path)
+        self.assertEqual(self.index.count, 0)
+
+
+class TranscriptFileTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "campaign", "game")
+        self.transcript = transcript.TranscriptFile(self.path, blockSize=4)
+
+    def tearDown(self):
+        self.transcript.close()
+        self.directory.cleanup()
+
+    def fill(self, count: int) -> None:
+        for i in range(count):
+            self.assertEqual(self.transcript.append(["print", "Message {}".format(i)]), i)
+
+    def reopen(self) -> None:
+        self.transcript.close()
+        self.transcript = transcript.TranscriptFile(self.path, blockSize=4)
+
+    def test_Empty(self):
+        self.assertEqual(len(self.transcript), 0)
+        self.assertEqual(self.transcript.read(0, 10), [])
+
+    def test_ReadAcrossBlocks(self):
+        self.fill(10)
+
+        self.assertEqual(len(self.transcript.blocks), 2)
+        self.assertEqual(self.transcript.read(3, 6), [["print", "Message {}".format(i)] for i in range(3, 9)])
+
+    def test_ReadBounds(self):
+        self.fill(10)
+
+        self.assertEqual(self.transcript.read(8, 10), [["print", "Message 8"], ["print", "Message 9"]])
+        self.assertEqual(self.transcript.read(12, 5), [])
+
+    def test_Entries(self):
+        self.fill(10)
+
+        self.assertEqual([text for (_, text) in self.transcript.entries()], ["Message {}".format(i) for i in range(10)])
+
+    def test_EntriesFrom(self):
+        self.fill(10)
+
+        for first in [0, 3, 4, 8, 10, 12]:
+            self.assertEqual([text for (_, text) in self.transcript.entries(first)],
+                             ["Message {}".format(i) for i in range(first, 10)])
+
+    def test_EntriesFromSkipsBlocks(self):
+        "Seuls les blocs contenant des entrées à partir de first sont décompressés."
+
+        self.fill(10)
+        self.transcript.cached = (None, None)
+
+        self.assertEqual(len(list(self.transcript.entries(9))), 1)
+        self.assertEqual(self.transcript.cached, (None, None))
+
+        self.assertEqual(len(list(self.transcript.entries(5))), 5)
+        self.assertEqual(self.transcript.cached[0], 1)
+
+    def test_Reopen(self):
+        self.fill(10)
+        self.reopen()
+
+        self.assertEqual(len(self.transcript), 10)
+        self.assertEqual(self.transcript.append(["note", "Suite"]), 10)
+        self.assertEqual(self.transcript.read(9, 2), [["print", "Message 9"], ["note", "Suite"]])
+
+    def test_InterruptedBlockClosing(self):
+        self.fill(6)
+
+        # Simule une interruption après l'écriture de l'index d'un bloc mais avant le vidage du fichier .tail
+        with open(self.path + ".tail", "w", encoding="utf-8") as tail:
+            tail.write("0\n" + "".join('["print", "Message {}"]\n'.format(i) for i in range(6)))
+
+        self.reopen()
+
+        self.assertEqual(len(self.transcript), 6)
+        self.assertEqual([text for (_, text) in self.transcript.entries()], ["Message {}".format(i) for i in range(6)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import os
+import unittest
+from importlib.util import find_spec
+
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+
+
+@unittest.skipIf(find_spec("kivy") is None, "Kivy isn't installed")
+class SortedDictionnaryView(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        import kivy.resources
+        from rboclient.gui import rules
+
+        kivy.resources.resource_add_path("rboclient/kv")
+        rules.require("widgets")
+
+    def setUp(self):
+        from rboclient.gui.widgets import DictionnaryView
+
+        self.view = DictionnaryView(sortKeys=True)
+
+    def displayed(self) -> "list[tuple[str, int]]":
+        # Les enfants d'un StackLayout sont affichés dans l'ordre inverse de la liste children
+        return [(pair.key, pair.value) for pair in reversed(self.view.content.children)]
+
+    def test_Insert(self):
+        self.view.refresh({"Force": 3, "Agilité": 5})
+        self.view.refresh({"Chance": 1, "Vie": 10})
+
+        self.assertEqual(self.displayed(), [("Agilité", 5), ("Chance", 1), ("Force", 3), ("Vie", 10)])
+        self.assertEqual(self.view.sortedKeys, ["Agilité", "Chance", "Force", "Vie"])
+
+    def test_Update(self):
+        self.view.refresh({"Force": 3, "Agilité": 5})
+        self.view.refresh({"Force": 8})
+
+        self.assertEqual(self.displayed(), [("Agilité", 5), ("Force", 8)])
+
+    def test_Remove(self):
+        self.view.refresh({"Force": 3, "Agilité": 5, "Chance": 1})
+        self.view.refresh({"Agilité": None, "Vie": 10})
+
+        self.assertEqual(self.displayed(), [("Chance", 1), ("Force", 3), ("Vie", 10)])
+        self.assertEqual(self.view.sortedKeys, ["Chance", "Force", "Vie"])
+
+    def test_Toggle(self):
+        self.view.sortKeys = False
+        self.view.refresh({"Force": 3, "Agilité": 5})
+        self.view.sortKeys = True
+
+        self.assertEqual(self.displayed(), [("Agilité", 5), ("Force", 3)])
+
+
+if __name__ == "__main__":
+    unittest.main()
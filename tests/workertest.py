@@ -0,0 +1,145 @@
+import os
+import unittest
+from importlib.util import find_spec
+
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+
+
+class Reactor:
+    "Exécute directement les appels destinés au thread réseau."
+
+    def callFromThread(self, function, *args, **kwargs):
+        function(*args, **kwargs)
+
+
+class Transport:
+    def __init__(self):
+        self.reading = True
+        self.paused = 0
+
+    def pauseProducing(self):
+        self.reading = False
+        self.paused += 1
+
+    def resumeProducing(self):
+        self.reading = True
+
+
+@unittest.skipIf(find_spec("kivy") is None, "Kivy isn't installed")
+class Handoff(unittest.TestCase):
+    def setUp(self):
+        from rboclient.network.worker import NetworkThread
+
+        self.network = NetworkThread(capacity=4)
+        self.network.reactor = Reactor()
+        self.calls = []
+
+    def test_Order(self):
+        for i in range(3):
+            self.network.post(self.calls.append, i)
+
+        self.assertEqual(self.calls, [])
+        self.network.drain()
+        self.assertEqual(self.calls, [0, 1, 2])
+
+    def test_PostedWhileDraining(self):
+        "Un appel posté pendant le drain attend le drain suivant."
+
+        self.network.post(lambda: self.network.post(self.calls.append, "next"))
+
+        self.network.drain()
+        self.assertEqual(self.calls, [])
+
+        self.network.drain()
+        self.assertEqual(self.calls, ["next"])
+
+    def test_Throttle(self):
+        transport = Transport()
+
+        for i in range(3):
+            self.network.post(self.calls.append, i)
+
+        self.network.throttle(transport)
+        self.assertTrue(transport.reading)
+
+        self.network.post(self.calls.append, 3)
+        self.network.throttle(transport)
+        self.network.throttle(transport)
+        self.assertFalse(transport.reading)
+        self.assertEqual(self.network.paused, [transport])
+
+        self.network.drain()
+        self.assertTrue(transport.reading)
+        self.assertEqual(self.network.paused, [])
+
+    def test_Resumed(self):
+        transport = Transport()
+
+        for i in range(4):
+            self.network.post(self.calls.append, i)
+
+        self.assertTrue(self.network.throttle(transport, lambda: self.calls.append("resumed")))
+        self.network.drain()
+
+        self.assertEqual(self.calls, [0, 1, 2, 3, "resumed"])
+        self.assertEqual(self.network.resumed, [])
+
+
+class Interface:
+    "Décode chaque trame en un event portant son premier octet."
+
+    def __init__(self):
+        from rboclient.network import handling
+        from rboclient.network.protocol import Mode
+
+        self.handlers = {Mode.LOGGING: lambda frame: handling.Event("frame", n=frame.take())}
+        self.received = []
+
+    def dispatch(self, event: str, *args, **kwargs) -> None:
+        if event == "on_frame":
+            self.received.append(kwargs["n"])
+
+
+@unittest.skipIf(find_spec("kivy") is None or find_spec("twisted") is None, "Kivy or Twisted isn't installed")
+class Backpressure(unittest.TestCase):
+    "Une seule lecture contenant plus de trames que la capacité de la file."
+
+    FRAMES = 10
+
+    def setUp(self):
+        from rboclient.network.protocol import RboConnection
+        from rboclient.network.worker import NetworkThread
+
+        self.network = NetworkThread(capacity=4)
+        self.network.reactor = Reactor()
+
+        self.interface = Interface()
+        self.connection = RboConnection(self.interface)
+        self.connection.network = self.network
+        self.connection.transport = Transport()
+
+    def read(self) -> bytes:
+        return b"".join(bytes([0, 3, i]) for i in range(Backpressure.FRAMES))
+
+    def test_Bounded(self):
+        self.connection.dataReceived(self.read())
+
+        self.assertEqual(len(self.network.pending), self.network.capacity)
+        self.assertEqual(len(self.connection.frames), Backpressure.FRAMES - self.network.capacity + 1)
+        self.assertFalse(self.connection.transport.reading)
+
+    def test_AllDispatched(self):
+        self.connection.dataReceived(self.read())
+
+        for i in range(Backpressure.FRAMES):
+            self.assertLessEqual(len(self.network.pending), self.network.capacity)
+            self.network.drain()
+
+        self.assertEqual(self.interface.received, list(range(Backpressure.FRAMES)))
+        self.assertEqual(len(self.connection.frames), 0)
+        self.assertTrue(self.connection.transport.reading)
+        self.assertEqual(self.connection.transport.paused, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+
+from benchmarks.workload import AWAIT_REPLY, InvalidProfile, Profile, Workload, load, requestMix, save, verify
+
+
+class Generation(unittest.TestCase):
+    def test_Reproducible(self):
+        first = Workload(Profile(players=12, minutes=2, seed=7)).records()
+        second = Workload(Profile(players=12, minutes=2, seed=7)).records()
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, Workload(Profile(players=12, minutes=2, seed=8)).records())
+
+    def test_IndependentStreams(self):
+        "Modifier le réglage d'un flux ne doit pas changer les trames des autres flux."
+
+        def texts(profile: Profile) -> "list[bytes]":
+            return [record.frame for record in Workload(profile).records() if record.frame[2:4] == b"\x01\x00"]
+
+        self.assertEqual(texts(Profile(minutes=2)), texts(Profile(minutes=2, requestsPerMinute=10, battleIntensity=0)))
+
+    def test_Formats(self):
+        records = Workload(Profile(players=254, selfID=3, minutes=2, textPerMinute=100, requestsPerMinute=6, battleIntensity=120)).records()
+        counts = verify(records)
+
+        self.assertEqual(counts["member_registered"], 253)
+        self.assertGreater(counts["battle_atk"], 0)
+        self.assertEqual(sum(count for (name, count) in counts.items() if name.startswith("request_")), counts["finish_request"])
+        self.assertEqual(sum(1 for record in records if record.flags & AWAIT_REPLY), counts["finish_request"])
+        self.assertEqual([record.time for record in records], sorted(record.time for record in records))
+
+    def test_RequestMix(self):
+        counts = verify(Workload(Profile(minutes=5, requestsPerMinute=10, requests=requestMix("dice_roll=1"))).records())
+
+        self.assertGreater(counts["request_dice_roll"], 0)
+        self.assertNotIn("request_confirm", counts)
+
+    def test_InvalidProfile(self):
+        self.assertRaises(InvalidProfile, requestMix, "teleport=1")
+        self.assertRaises(InvalidProfile, Workload, Profile(players=300))
+
+
+class ScenarioFile(unittest.TestCase):
+    def test_SaveLoad(self):
+        records = Workload(Profile(minutes=1)).records()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "scenario.rbo")
+            save(path, records)
+            loaded = load(path)
+
+        self.assertEqual([(record.frame, record.flags) for record in loaded], [(record.frame, record.flags) for record in records])
+        for (record, original) in zip(loaded, records):
+            self.assertAlmostEqual(record.time, original.time, places=3)
+
+
+if __name__ == "__main__":
+    unittest.main()